@@ -1,7 +1,7 @@
 from flask import Flask, redirect, url_for, session, render_template, g
 import os
 from datetime import timedelta
-from MyFlaskapp.db import create_tables
+from MyFlaskapp.db import create_tables, init_app as init_db
 from flask_mail import Mail
 from flask_wtf.csrf import CSRFProtect
 from dotenv import load_dotenv
@@ -14,6 +14,11 @@ def create_app():
 
     app = Flask(__name__, template_folder=templates_path, static_folder=static_path)
     
+    # Defaults for every setting documented in config.py (FLASK_ENV picks the profile);
+    # the explicit settings below keep their existing values
+    from MyFlaskapp.config import config_by_name
+    app.config.from_object(config_by_name.get(os.environ.get('FLASK_ENV', 'production'), config_by_name['production']))
+    
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)
     app.config['SESSION_COOKIE_SECURE'] = True  # Set to True for production HTTPS
@@ -34,6 +39,9 @@ def create_app():
     # Initialize CSRF protection
     csrf = CSRFProtect(app)
     
+    # Release the request-scoped database connection on teardown
+    init_db(app)
+    
     from MyFlaskapp.auth import auth_bp
     from MyFlaskapp.user import user_bp
     from MyFlaskapp.admin import admin_bp
@@ -1,10 +1,11 @@
 from flask import render_template, session, redirect, url_for, request, flash, current_app
 from functools import wraps
 from . import admin_bp
-from MyFlaskapp.db import get_db_connection
+from MyFlaskapp.db import get_db_connection, get_db
 from werkzeug.security import generate_password_hash
 from MyFlaskapp.utils import validate_email, validate_password, generate_otp, send_otp_email, store_otp, verify_otp, check_duplicate_user, can_resend_otp, Alert_Success, Alert_Fail
 from MyFlaskapp.games.routes import scan_games_directory
+from MyFlaskapp.rate_limiter import api_rate_limit
 import random
 import os
 
@@ -29,7 +30,7 @@ def admin_required(f):
 @login_required
 @admin_required
 def admin_dashboard():
-    conn = get_db_connection()
+    conn = get_db()
     users = []
     games = []
     scores = []
@@ -45,7 +46,6 @@ def admin_dashboard():
         # Get scores from database (if any exist)
         cursor.execute("SELECT l.*, g.name as game_name, u.username FROM leaderboards l JOIN games g ON l.game_id = g.id JOIN user_tb u ON l.user_id = u.id ORDER BY l.score DESC LIMIT 10")
         scores = cursor.fetchall()
-        conn.close()
     
     # Use scanned games instead of database games
     games = scanned_games
@@ -184,6 +184,7 @@ def add_game():
 @admin_bp.route('/user/<user_id>', methods=['GET', 'PUT', 'DELETE'])
 @login_required
 @admin_required
+@api_rate_limit()
 def manage_user(user_id):
     from flask import jsonify
     conn = get_db_connection()
@@ -245,6 +246,7 @@ def toggle_active(user_id):
 @admin_bp.route('/user/<user_id>/games', methods=['GET', 'POST'])
 @login_required
 @admin_required
+@api_rate_limit()
 def manage_user_games(user_id):
     from flask import jsonify
     
@@ -287,7 +289,7 @@ def manage_user_games(user_id):
             
             # Get all scanned games
             scanned_games = scan_games_directory()
-            all_game_filenames = [game['filename'] for game in scanned_games]
+            all_game_filenames = {game['filename'] for game in scanned_games}
             
             # Get current user access
             cursor.execute("SELECT game_filename, is_enabled FROM user_scanned_game_access_tb WHERE user_id = %s", (user_id,))
@@ -342,4 +344,31 @@ def reset_leaderboard(game_id):
         flash('Leaderboard reset successfully.', 'success')
     else:
         flash('Failed to reset leaderboard.', 'danger')
-    return redirect(url_for('admin.admin_dashboard'))
\ No newline at end of file
+    return redirect(url_for('admin.admin_dashboard'))
+
+@admin_bp.route('/launch_queue')
+@login_required
+@admin_required
+def launch_queue_stats():
+    """Report launch queue depth and active launch counts for monitoring."""
+    from flask import jsonify
+    from MyFlaskapp.games.launch_jobs import get_launch_queue
+    return jsonify(get_launch_queue().stats())
+
+@admin_bp.route('/mail_queue')
+@login_required
+@admin_required
+def mail_queue_stats():
+    """Report outbound mail queue depth and delivery counters for monitoring."""
+    from flask import jsonify
+    from MyFlaskapp.mail_queue import get_mail_queue
+    return jsonify(get_mail_queue().stats())
+
+@admin_bp.route('/cache_stats')
+@login_required
+@admin_required
+def cache_stats():
+    """Report leaderboard cache hit/miss counters for monitoring."""
+    from flask import jsonify
+    from MyFlaskapp.db import get_top_scores_cache_stats
+    return jsonify({'top_scores': get_top_scores_cache_stats()})
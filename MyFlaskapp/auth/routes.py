@@ -20,7 +20,7 @@ def test():
     return "Test endpoint working"
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
-# @rate_limit(max_attempts=5, window_seconds=5)  # 5 attempts per 5 seconds - DISABLED
+@rate_limit(max_attempts=5, window_seconds=5, methods=('POST',))  # 5 attempts per 5 seconds
 def login():
     if request.method == 'POST':
         print(f"DEBUG: Login request received")
@@ -91,7 +91,7 @@ def logout():
     return redirect(url_for('index'))
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
-# @rate_limit(max_attempts=3, window_seconds=600)  # 3 registration attempts per 10 minutes - DISABLED
+@rate_limit(max_attempts=3, window_seconds=600, methods=('POST',))  # 3 registration attempts per 10 minutes
 def register():
     if request.method == 'POST':
         firstname = request.form.get('firstname')
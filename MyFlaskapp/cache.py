@@ -0,0 +1,436 @@
+"""
+Cache - TTL cache with single-flight refresh over pluggable storage.
+
+Entries are fresh for `ttl` seconds and then stale for another
+`stale_ttl` seconds. While an entry is stale one caller claims the
+refresh and reloads it; everyone else keeps getting the stale value
+instead of stampeding the database. Missing keys are loaded by one
+caller while the others wait for its result.
+
+Writers can update cached values in place (write-through) or invalidate
+them; a load that was in flight when its key changed is stored already
+stale so the next reader refreshes it.
+
+Values live in a backend chosen by CACHE_BACKEND:
+    memory  per-process LRU (the default; every worker has its own cache)
+    sqlite  a WAL-mode SQLite file shared by every worker on the host
+    redis   a Redis server shared by every host (needs the redis package)
+Claims are stored in the backend too, so with a shared backend a key is
+refreshed by one worker at a time rather than one per worker.
+
+Shared backends store values as JSON, never pickle: anyone able to write
+to the SQLite file or the Redis server could otherwise run code in every
+worker. Cached values are therefore limited to JSON types plus datetimes
+(such as the date_played of top-score rows), which round-trip as ISO
+strings. Tuples come back as lists.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+_BACKEND_LOCK = threading.Lock()
+
+
+def connect_sqlite(path):
+    """Open an autocommit SQLite connection in WAL mode, for state shared between workers."""
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Cannot cache {type(value).__name__} values in a shared backend")
+
+
+def _json_object(obj):
+    if len(obj) == 1 and '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+def dumps(value):
+    """Serialise a cache value for a shared backend."""
+    return json.dumps(value, default=_json_default, separators=(',', ':'))
+
+
+def loads(raw):
+    """Inverse of dumps()."""
+    return json.loads(raw, object_hook=_json_object)
+
+
+class MemoryBackend:
+    """Per-process storage: a dict kept in LRU order and bounded to max_entries."""
+
+    shared = False
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key, value, ttl):
+        """Store value only if key is absent or expired. Returns True if it was stored."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def _store(self, key, value, ttl):
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def keys(self, prefix):
+        now = time.time()
+        with self._lock:
+            return [key for key, (expires_at, _) in self._entries.items()
+                    if key.startswith(prefix) and expires_at > now]
+
+    def clear(self, prefix=''):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+class SQLiteBackend:
+    """
+    Storage shared by every process on the host through one SQLite file.
+
+    WAL mode lets readers proceed while another worker writes. Expired rows
+    are pruned, and the soonest-expiring rows evicted past max_entries,
+    every `prune_every` writes.
+    """
+
+    shared = True
+
+    def __init__(self, path, max_entries=1024, prune_every=100):
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self.evictions = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                expires_at REAL
+            )
+        """)
+        self._execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at)")
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def _execute(self, sql, params=()):
+        return self._connection().execute(sql, params)
+
+    def get(self, key):
+        row = self._execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        self._execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, dumps(value), time.time() + ttl)
+        )
+        self._wrote()
+
+    def add(self, key, value, ttl):
+        """Store value only if key is absent or expired. Returns True if it was stored."""
+        now = time.time()
+        cursor = self._execute("""
+            INSERT INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+            WHERE cache_entries.expires_at <= ?
+        """, (key, dumps(value), now + ttl, now))
+        self._wrote()
+        return cursor.rowcount == 1
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Delete expired rows and evict the soonest-expiring ones past max_entries."""
+        conn = self._connection()
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        count = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        if count > self.max_entries:
+            cursor = conn.execute("""
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?
+                )
+            """, (count - self.max_entries,))
+            self.evictions += cursor.rowcount
+
+    def delete(self, *keys):
+        if keys:
+            self._execute(
+                f"DELETE FROM cache_entries WHERE key IN ({', '.join(['?'] * len(keys))})", keys
+            )
+
+    def _prefix_range(self, prefix):
+        # Range scan on the primary key instead of LIKE, which would need escaping
+        return prefix, prefix + '\U0010ffff'
+
+    def keys(self, prefix):
+        rows = self._execute(
+            "SELECT key FROM cache_entries WHERE key >= ? AND key < ? AND expires_at > ?",
+            (*self._prefix_range(prefix), time.time())
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def clear(self, prefix=''):
+        self._execute("DELETE FROM cache_entries WHERE key >= ? AND key < ?", self._prefix_range(prefix))
+
+
+class RedisBackend:
+    """Storage shared by every host through a Redis server; Redis handles expiry and eviction."""
+
+    shared = True
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        self.evictions = 0  # Reported by Redis itself (INFO stats)
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(key)
+        return loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(key, dumps(value), px=max(1, int(ttl * 1000)))
+
+    def add(self, key, value, ttl):
+        """Store value only if key is absent or expired. Returns True if it was stored."""
+        return bool(self._client.set(key, dumps(value), px=max(1, int(ttl * 1000)), nx=True))
+
+    def delete(self, *keys):
+        if keys:
+            self._client.delete(*keys)
+
+    def keys(self, prefix):
+        pattern = ''.join('\\' + c if c in '*?[]\\' else c for c in prefix) + '*'
+        return [key.decode() for key in self._client.scan_iter(match=pattern)]
+
+    def clear(self, prefix=''):
+        self.delete(*self.keys(prefix))
+
+
+def create_backend(config, instance_path):
+    """Build the cache backend selected by CACHE_BACKEND."""
+    kind = config.get('CACHE_BACKEND', 'memory')
+    max_entries = config.get('CACHE_MAX_ENTRIES', 4096)
+    if kind == 'memory':
+        return MemoryBackend(max_entries)
+    if kind == 'sqlite':
+        path = config.get('CACHE_SQLITE_PATH')
+        if not path:
+            os.makedirs(instance_path, exist_ok=True)
+            path = os.path.join(instance_path, 'cache.sqlite3')
+        return SQLiteBackend(path, max_entries)
+    if kind == 'redis':
+        return RedisBackend(config.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'))
+    raise ValueError(f"Unknown CACHE_BACKEND: {kind}")
+
+
+def get_cache_backend():
+    """Return the app's cache backend, creating it from config on first use."""
+    backend = current_app.extensions.get('cache_backend')
+    if backend is None:
+        with _BACKEND_LOCK:
+            backend = current_app.extensions.get('cache_backend')
+            if backend is None:
+                backend = create_backend(current_app.config, current_app.instance_path)
+                current_app.extensions['cache_backend'] = backend
+    return backend
+
+
+class TTLCache:
+    def __init__(self, backend=None, namespace='cache', ttl=60, stale_ttl=240, claim_ttl=30):
+        """
+        Args:
+            backend: Storage for entries and claims (a private MemoryBackend if None)
+            namespace: Key prefix separating this cache from others on the same backend
+            ttl: Seconds an entry is served as fresh
+            stale_ttl: Further seconds an expired entry may be served while it is refreshed
+            claim_ttl: Seconds before a claim left by a crashed loader lapses
+        """
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.claim_ttl = claim_ttl
+
+        # Wakes waiters in this process; waits on other processes' claims poll the backend
+        self._cond = threading.Condition()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def _key(self, kind, key):
+        # kind is 'v' (value), 'claim' or 'changed' (claimed key written during its load)
+        return f"{self.namespace}:{kind}:{key}"
+
+    def _count(self, stat, n=1):
+        with self._cond:
+            self._stats[stat] += n
+
+    def lookup(self, key):
+        """
+        Return (value, fresh). value is None on a miss; fresh is False for a
+        stale value that should be refreshed.
+        """
+        entry = self.backend.get(self._key('v', key))
+        if entry is not None:
+            stored_at, value = entry
+            if time.time() - stored_at < self.ttl:
+                self._count('hits')
+                return value, True
+            self._count('stale_hits')
+            return value, False
+        self._count('misses')
+        return None, False
+
+    def claim(self, key):
+        """Claim the (re)load of key. Returns False if another caller is already loading it."""
+        return self.backend.add(self._key('claim', key), True, self.claim_ttl)
+
+    def set(self, key, value):
+        """Store a value (releasing any claim on key) and wake callers waiting for it."""
+        stored_at = time.time()
+        if self.backend.get(self._key('changed', key)):
+            # Written or invalidated while this value was being loaded; it may predate that
+            stored_at -= self.ttl
+        self.backend.set(self._key('v', key), (stored_at, value), self.ttl + self.stale_ttl)
+        self.release(key)
+
+    def release(self, key):
+        """Give up a claim without storing a value (e.g. the load failed)."""
+        self.backend.delete(self._key('claim', key), self._key('changed', key))
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self, key, timeout, poll=0.05):
+        """Wait for a claimed load of key to finish and return its value (None on timeout)."""
+        deadline = time.monotonic() + timeout
+        while self.backend.get(self._key('claim', key)):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            with self._cond:
+                self._cond.wait(min(remaining, poll))
+        entry = self.backend.get(self._key('v', key))
+        return entry[1] if entry is not None else None
+
+    def get_or_load(self, key, loader, wait_timeout=5):
+        """Return the cached value for key, loading it with loader() at most once at a time."""
+        value, fresh = self.lookup(key)
+        if fresh:
+            return value
+        if self.claim(key):
+            try:
+                value = loader()
+            except Exception:
+                self.release(key)
+                raise
+            self.set(key, value)
+            return value
+        if value is not None:
+            return value  # Someone else is refreshing; serve the stale value meanwhile
+        value = self.wait(key, wait_timeout)
+        return value if value is not None else loader()
+
+    def _mark_changed(self, prefix):
+        # Loads in flight for these keys may have read the database before the change
+        claims = self._key('claim', '')
+        for claim in self.backend.keys(claims + prefix):
+            self.backend.set(self._key('changed', claim[len(claims):]), True, self.claim_ttl)
+
+    def update(self, prefix, fn):
+        """
+        Write-through: replace every cached value whose key starts with prefix
+        with fn(key, value). With a shared backend this is a read-modify-write,
+        so a concurrent update from another process can be lost until the
+        entry is next refreshed.
+        """
+        values = self._key('v', '')
+        now = time.time()
+        for full_key in self.backend.keys(values + prefix):
+            entry = self.backend.get(full_key)
+            if entry is None:
+                continue
+            stored_at, value = entry
+            remaining = stored_at + self.ttl + self.stale_ttl - now
+            if remaining > 0:
+                self.backend.set(full_key, (stored_at, fn(full_key[len(values):], value)), remaining)
+        self._mark_changed(prefix)
+
+    def invalidate(self, prefix=''):
+        """Drop every cached value whose key starts with prefix (all of them by default)."""
+        keys = self.backend.keys(self._key('v', prefix))
+        self.backend.delete(*keys)
+        self._count('invalidations', len(keys))
+        self._mark_changed(prefix)
+
+    def clear(self):
+        """Forget every entry and claim in this cache's namespace."""
+        self.backend.clear(f"{self.namespace}:")
+
+    def stats(self):
+        """This process's hit/miss counters plus the cache's current size, for monitoring."""
+        with self._cond:
+            stats = dict(self._stats)
+        stats['size'] = len(self.backend.keys(self._key('v', '')))
+        stats['backend'] = type(self.backend).__name__
+        stats['evictions'] = self.backend.evictions
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else None
+        return stats
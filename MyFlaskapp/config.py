@@ -16,8 +16,13 @@ class Config:
     # Database Configuration
     DB_HOST = os.environ.get('DB_HOST', 'localhost')
     DB_USER = os.environ.get('DB_USER', 'root')
-    DB_PASSWORD = os.environ.get('DB_PASSWORD')
+    DB_PASSWORD = os.environ.get('DB_PASSWORD', '')
     DB_NAME = os.environ.get('DB_NAME', 'gemao_db')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10))
+    DB_POOL_RECYCLE_SECONDS = int(os.environ.get('DB_POOL_RECYCLE_SECONDS', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
+    DB_POOL_TIMEOUT_SECONDS = int(os.environ.get('DB_POOL_TIMEOUT_SECONDS', 30))
     
     # Flask-Mail Configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
@@ -26,12 +31,35 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+    MAIL_QUEUE_WORKERS = int(os.environ.get('MAIL_QUEUE_WORKERS', 2))  # 0 sends synchronously
+    MAIL_QUEUE_MAX_QUEUED = int(os.environ.get('MAIL_QUEUE_MAX_QUEUED', 1000))
+    MAIL_QUEUE_MAX_RETRIES = int(os.environ.get('MAIL_QUEUE_MAX_RETRIES', 3))
+    MAIL_QUEUE_RETRY_BACKOFF_SECONDS = int(os.environ.get('MAIL_QUEUE_RETRY_BACKOFF_SECONDS', 2))
+    MAIL_QUEUE_IDLE_SECONDS = int(os.environ.get('MAIL_QUEUE_IDLE_SECONDS', 30))
+    MAIL_QUEUE_SINK_DIR = os.environ.get('MAIL_QUEUE_SINK_DIR')  # Write .eml files here instead of sending
     
     # Security Configuration
     MAX_LOGIN_ATTEMPTS = int(os.environ.get('MAX_LOGIN_ATTEMPTS', 5))
-    LOGIN_ATTEMPT_TIMEOUT_MINUTES = int(os.environ.get('LOGIN_ATTEMPT_TIMEOUT_MINUTES', 0.083))  # ~5 seconds
+    LOGIN_ATTEMPT_TIMEOUT_MINUTES = float(os.environ.get('LOGIN_ATTEMPT_TIMEOUT_MINUTES', 0.083))  # ~5 seconds
     OTP_EXPIRY_MINUTES = int(os.environ.get('OTP_EXPIRY_MINUTES', 10))
     OTP_RESEND_COOLDOWN_SECONDS = int(os.environ.get('OTP_RESEND_COOLDOWN_SECONDS', 60))
+    OTP_STORE_BACKEND = os.environ.get('OTP_STORE_BACKEND', 'table')  # 'memory' keeps codes in this process only
+    OTP_PURGE_INTERVAL_SECONDS = int(os.environ.get('OTP_PURGE_INTERVAL_SECONDS', 3600))
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')  # 'sqlite' shares limits across workers
+    RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH')  # Defaults to the instance folder
+    
+    # API Rate Limiting (token buckets: sustained requests per minute, burst)
+    API_RATE_LIMIT_PER_MINUTE = int(os.environ.get('API_RATE_LIMIT_PER_MINUTE', 60))
+    API_RATE_LIMIT_BURST = int(os.environ.get('API_RATE_LIMIT_BURST', 20))
+    # Per-route policies: 'user' is each caller's bucket, 'route' an optional bucket shared by
+    # all callers. A route bucket is a last-resort load shed: one client exhausting it gets
+    # everyone 429s, so size it far above the expected aggregate request rate.
+    API_RATE_LIMITS = {
+        'leaderboard.leaderboard_api': {'user': (30, 10)},
+        'leaderboard.game_leaderboard_api': {'user': (60, 20)},
+        'admin.manage_user': {'user': (60, 20)},
+        'admin.manage_user_games': {'user': (60, 20)},
+    }
     
     # File Upload Configuration
     MAX_FILE_SIZE_BYTES = int(os.environ.get('MAX_FILE_SIZE_BYTES', 5242880))
@@ -40,6 +68,44 @@ class Config:
     # Game Execution Configuration
     GAME_TIMEOUT_SECONDS = int(os.environ.get('GAME_TIMEOUT_SECONDS', 300))
     ALLOWED_GAME_EXTENSIONS = os.environ.get('ALLOWED_GAME_EXTENSIONS', '.py')
+    LAUNCH_MAX_WORKERS = int(os.environ.get('LAUNCH_MAX_WORKERS', 4))
+    LAUNCH_MAX_PER_USER = int(os.environ.get('LAUNCH_MAX_PER_USER', 1))
+    LAUNCH_MAX_QUEUED = int(os.environ.get('LAUNCH_MAX_QUEUED', 20))
+    LAUNCH_SLOTS_BACKEND = os.environ.get('LAUNCH_SLOTS_BACKEND', 'sqlite')  # 'memory' limits each worker separately
+    LAUNCH_SLOTS_SQLITE_PATH = os.environ.get('LAUNCH_SLOTS_SQLITE_PATH')  # Defaults to the instance folder
+    LAUNCH_RETRY_AFTER_SECONDS = int(os.environ.get('LAUNCH_RETRY_AFTER_SECONDS', 30))
+    LAUNCH_WARM_POOL_SIZE = int(os.environ.get('LAUNCH_WARM_POOL_SIZE', 2))
+    LAUNCH_WARM_POOL_MAX_RUNS = int(os.environ.get('LAUNCH_WARM_POOL_MAX_RUNS', 20))
+    LAUNCH_MAX_OUTPUT_CHARS = int(os.environ.get('LAUNCH_MAX_OUTPUT_CHARS', 65536))
+    LAUNCH_STOP_ON_SCORE = os.environ.get('LAUNCH_STOP_ON_SCORE', 'False').lower() == 'true'
+    LAUNCH_JOB_RETENTION_SECONDS = int(os.environ.get('LAUNCH_JOB_RETENTION_SECONDS', 3600))
+    
+    # Leaderboard Configuration
+    LEADERBOARD_INDEX_MAX_AGE_SECONDS = int(os.environ.get('LEADERBOARD_INDEX_MAX_AGE_SECONDS', 300))  # Backstop reload
+    # Seconds between reads of score_events that bring each game's index up to date with other workers
+    LEADERBOARD_INDEX_SYNC_SECONDS = float(os.environ.get('LEADERBOARD_INDEX_SYNC_SECONDS', 1))
+    LEADERBOARD_PAGE_SIZE = int(os.environ.get('LEADERBOARD_PAGE_SIZE', 50))
+    LEADERBOARD_MAX_PAGE_SIZE = int(os.environ.get('LEADERBOARD_MAX_PAGE_SIZE', 200))
+    # Seconds after a period ends (on the database clock) before it is served as closed and immutable
+    LEADERBOARD_PERIOD_CLOSE_GRACE_SECONDS = int(os.environ.get('LEADERBOARD_PERIOD_CLOSE_GRACE_SECONDS', 300))
+    LEADERBOARD_STREAM_HISTORY = int(os.environ.get('LEADERBOARD_STREAM_HISTORY', 256))
+    LEADERBOARD_STREAM_KEEPALIVE_SECONDS = int(os.environ.get('LEADERBOARD_STREAM_KEEPALIVE_SECONDS', 15))
+    LEADERBOARD_STREAM_MAX_SECONDS = int(os.environ.get('LEADERBOARD_STREAM_MAX_SECONDS', 60))
+    # Each open stream holds a worker thread: streams are only served by threaded
+    # servers (or async workers when this is set), at most MAX_CLIENTS per process
+    LEADERBOARD_STREAM_MAX_CLIENTS = int(os.environ.get('LEADERBOARD_STREAM_MAX_CLIENTS', 32))
+    LEADERBOARD_STREAM_ASYNC_WORKERS = os.environ.get('LEADERBOARD_STREAM_ASYNC_WORKERS', 'False').lower() == 'true'
+    LEADERBOARD_EVENTS_POLL_SECONDS = float(os.environ.get('LEADERBOARD_EVENTS_POLL_SECONDS', 1))
+    LEADERBOARD_EVENTS_RETENTION_SECONDS = int(os.environ.get('LEADERBOARD_EVENTS_RETENTION_SECONDS', 86400))
+    LEADERBOARD_EVENTS_PRUNE_SECONDS = int(os.environ.get('LEADERBOARD_EVENTS_PRUNE_SECONDS', 3600))
+    TOP_SCORES_CACHE_TTL_SECONDS = int(os.environ.get('TOP_SCORES_CACHE_TTL_SECONDS', 60))
+    TOP_SCORES_CACHE_STALE_SECONDS = int(os.environ.get('TOP_SCORES_CACHE_STALE_SECONDS', 240))
+
+    # Cache Configuration (memory, sqlite or redis; sqlite/redis are shared by all workers)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 4096))
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH')  # Defaults to the instance folder
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -2,33 +2,110 @@
 import mysql.connector
 from mysql.connector import Error
 from werkzeug.security import generate_password_hash
-from flask import current_app
-import time
+from flask import current_app, g, has_app_context
+from MyFlaskapp.db_pool import get_pool
+from MyFlaskapp.score_index import ScoreIndex
+from MyFlaskapp.score_events import SCORE, RESET
+from MyFlaskapp.score_periods import PERIODS, period_start_sql
+from MyFlaskapp.cache import TTLCache, get_cache_backend
+import json
 import threading
+import time
+from datetime import datetime, timedelta
 
-_TOP_SCORES_CACHE = {}
 _TOP_SCORES_LOCK = threading.Lock()
-_TOP_SCORES_TTL = 60  # seconds
+_TOP_SCORES_WAIT = 5  # seconds to wait for another request's load of the same key
+_SCORE_INDEX_LOCK = threading.Lock()
+_SCORE_EVENTS_PRUNE = {'last': time.time()}  # when this process last pruned score_events
 
 
 def get_db_connection():
-    """Establishes a connection to the MySQL database."""
+    """
+    Checks out a MySQL connection from the shared connection pool.
+
+    Calling close() on the returned connection hands it back to the pool.
+    Pool behaviour is tuned with the DB_POOL_* config settings.
+    """
     try:
-        conn = mysql.connector.connect(
-            host=current_app.config.get('DB_HOST', 'localhost'),
-            user=current_app.config.get('DB_USER', 'root'),
-            password=current_app.config.get('DB_PASSWORD', ''),
-            database=current_app.config.get('DB_NAME', 'gemao_db')
+        config = current_app.config
+        connect_args = {
+            'host': config.get('DB_HOST', 'localhost'),
+            'user': config.get('DB_USER', 'root'),
+            'password': config.get('DB_PASSWORD', ''),
+            'database': config.get('DB_NAME', 'gemao_db'),
+        }
+        pool = get_pool(
+            connect_args,
+            pool_size=config.get('DB_POOL_SIZE', 5),
+            max_overflow=config.get('DB_POOL_MAX_OVERFLOW', 10),
+            recycle_seconds=config.get('DB_POOL_RECYCLE_SECONDS', 1800),
+            pre_ping=config.get('DB_POOL_PRE_PING', True),
+            timeout=config.get('DB_POOL_TIMEOUT_SECONDS', 30)
         )
-        if conn.is_connected():
-            print("Connected to database:   gemao_db")
-            return conn
+        conn = pool.acquire()
+        if has_app_context():
+            g.db_connection_count = g.get('db_connection_count', 0) + 1
+        return conn
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
 
+class RequestConnection:
+    """
+    Request-scoped view of a pooled connection stored on flask.g.
+
+    close() is a no-op so helpers can share the connection; the real
+    release back to the pool happens in close_db() at teardown. Cursors
+    are buffered by default so one helper's unread rows never block the next.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('buffered', True)
+        return self._conn.cursor(*args, **kwargs)
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def get_db():
+    """Returns the connection bound to the current request, opening it on first use."""
+    if 'db_conn' not in g:
+        conn = get_db_connection()
+        if conn is None:
+            return None
+        g.db_conn = RequestConnection(conn)
+    return g.db_conn
+
+
+def close_db(e=None):
+    """Releases the request-scoped connection back to the pool."""
+    request_conn = g.pop('db_conn', None)
+    if request_conn is not None:
+        request_conn._conn.close()
+
+
+def get_request_connection_count():
+    """Number of pooled connections checked out during the current request."""
+    return g.get('db_connection_count', 0)
+
+
+def init_app(app):
+    """Registers request-scoped connection teardown on the app."""
+    app.teardown_appcontext(close_db)
+
 def create_tables():
-    """Creates the necessary tables in the database."""
+    """
+    Creates the necessary tables in the database.
+
+    Tables that already exist are left as they are; existing databases are
+    brought up to date by scripts/migrate_leaderboard_schema.py.
+    """
     conn = get_db_connection()
     if conn:
         try:
@@ -85,7 +162,54 @@ def create_tables():
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (user_id) REFERENCES user_tb(id),
                     FOREIGN KEY (game_id) REFERENCES games_tb(id),
-                    INDEX idx_game_score (game_id, score)
+                    INDEX idx_game_score (game_id, score),
+                    INDEX idx_user_score (user_id, score, leaderboard_id),
+                    INDEX idx_created_at (created_at)
+                )
+            """)
+            # Best score per player per game, maintained by submit_score
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_best_scores (
+                    user_id INT,
+                    game_id INT,
+                    best_score INT,
+                    leaderboard_id INT,
+                    achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    play_count INT DEFAULT 0,
+                    PRIMARY KEY (user_id, game_id),
+                    FOREIGN KEY (user_id) REFERENCES user_tb(id),
+                    FOREIGN KEY (game_id) REFERENCES games_tb(id),
+                    INDEX idx_game_best (game_id, best_score, leaderboard_id)
+                )
+            """)
+            # Best score per player per game for each day, week and month
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS score_rollups (
+                    period_type VARCHAR(10),
+                    period_start DATE,
+                    game_id INT,
+                    user_id INT,
+                    best_score INT,
+                    leaderboard_id INT,
+                    achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    play_count INT DEFAULT 0,
+                    PRIMARY KEY (period_type, period_start, game_id, user_id),
+                    FOREIGN KEY (user_id) REFERENCES user_tb(id),
+                    FOREIGN KEY (game_id) REFERENCES games_tb(id),
+                    INDEX idx_period_best (period_type, period_start, game_id, best_score, leaderboard_id)
+                )
+            """)
+            # Append-only log of leaderboard changes, shared by every worker: the
+            # latest id per game versions its leaderboards (ETags)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS score_events (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    kind VARCHAR(10),
+                    game_id INT,
+                    data TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_game_event (game_id, id),
+                    INDEX idx_event_created (created_at)
                 )
             """)
             
@@ -97,7 +221,8 @@ def create_tables():
                     otp VARCHAR(6),
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     expires_at TIMESTAMP NULL DEFAULT NULL,
-                    verified BOOLEAN DEFAULT FALSE
+                    verified BOOLEAN DEFAULT FALSE,
+                    INDEX idx_otp_expires (expires_at)
                 )
             """)
             conn.commit()
@@ -145,80 +270,520 @@ def create_tables():
 if __name__ == '__main__':
     create_tables()
 
+def _load_game_scores(game_id):
+    """Loads every score row for a game; used to build its ranked index."""
+    conn = get_db()
+    if not conn:
+        raise Error("No database connection")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT l.leaderboard_id, l.user_id, l.score, u.username, l.created_at as date_played
+        FROM scores_tb l
+        JOIN user_tb u ON l.user_id = u.id
+        WHERE l.game_id = %s
+    """, (game_id,))
+    return cursor.fetchall()
+
+def get_score_index():
+    """Returns the app's ranked score index, creating it from config on first use."""
+    index = current_app.extensions.get('score_index')
+    if index is None:
+        with _SCORE_INDEX_LOCK:
+            index = current_app.extensions.get('score_index')
+            if index is None:
+                index = ScoreIndex(
+                    _load_game_scores,
+                    max_age=current_app.config.get('LEADERBOARD_INDEX_MAX_AGE_SECONDS', 300),
+                    log=ScoreEventLog(current_app._get_current_object()),
+                    sync_seconds=current_app.config.get('LEADERBOARD_INDEX_SYNC_SECONDS', 1)
+                )
+                current_app.extensions['score_index'] = index
+    return index
+
+def get_top_scores_cache():
+    """
+    Returns the app's top-scores cache ("game_id:limit" -> top score rows),
+    stored in the configured cache backend.
+    """
+    cache = current_app.extensions.get('top_scores_cache')
+    if cache is None:
+        with _TOP_SCORES_LOCK:
+            cache = current_app.extensions.get('top_scores_cache')
+            if cache is None:
+                cache = TTLCache(
+                    get_cache_backend(),
+                    namespace='top_scores',
+                    ttl=current_app.config.get('TOP_SCORES_CACHE_TTL_SECONDS', 60),
+                    stale_ttl=current_app.config.get('TOP_SCORES_CACHE_STALE_SECONDS', 240)
+                )
+                current_app.extensions['top_scores_cache'] = cache
+    return cache
+
 def get_top_scores_for_game(game_id, limit=10):
-    key = (game_id, limit)
-    now = time.time()
-    with _TOP_SCORES_LOCK:
-        cached = _TOP_SCORES_CACHE.get(key)
-        if cached is not None:
-            ts, data = cached
-            if now - ts < _TOP_SCORES_TTL:
-                return data
-    conn = get_db_connection()
-    scores = []
+    try:
+        return get_score_index().top(game_id, limit)
+    except Error as e:
+        print(f"Error loading scores for game {game_id}: {e}")
+        return []
+
+def _query_top_scores(game_ids, limit):
+    # One windowed query for the top `limit` scores of every game in game_ids
+    fetched = {game_id: [] for game_id in game_ids}
+    conn = get_db()
     if conn:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT l.score, u.username, l.created_at as date_played
-            FROM scores_tb l
-            JOIN user_tb u ON l.user_id = u.id
-            WHERE l.game_id = %s
-            ORDER BY l.score DESC
-            LIMIT %s
-        """, (game_id, limit))
-        scores = cursor.fetchall()
-        conn.close()
-    current_ts = time.time()
-    with _TOP_SCORES_LOCK:
-        _TOP_SCORES_CACHE[key] = (current_ts, scores)
-    return scores
+        placeholders = ', '.join(['%s'] * len(game_ids))
+        cursor.execute(f"""
+            SELECT game_id, score, username, date_played
+            FROM (
+                SELECT l.game_id, l.score, u.username, l.created_at as date_played,
+                       ROW_NUMBER() OVER (PARTITION BY l.game_id ORDER BY l.score DESC, l.leaderboard_id) AS game_rank
+                FROM scores_tb l
+                JOIN user_tb u ON l.user_id = u.id
+                WHERE l.game_id IN ({placeholders})
+            ) ranked
+            WHERE game_rank <= %s
+            ORDER BY game_id, game_rank
+        """, (*game_ids, limit))
+        for row in cursor.fetchall():
+            game_id = row.pop('game_id')
+            fetched.setdefault(game_id, []).append(row)
+    return fetched
+
+def get_top_scores_for_games(game_ids, limit=10):
+    """
+    Batched get_top_scores_for_game: returns {game_id: [top scores]} for every
+    requested game using one windowed query for all cache misses.
+
+    Stale entries are served while one request refreshes them, and games already
+    being loaded by another request are waited for instead of queried again.
+    """
+    cache = get_top_scores_cache()
+    results = {}
+    load = []
+    pending = []
+    for game_id in dict.fromkeys(game_ids):
+        key = f"{game_id}:{limit}"
+        scores, fresh = cache.lookup(key)
+        if fresh:
+            results[game_id] = scores
+        elif cache.claim(key):
+            load.append(game_id)
+        elif scores is not None:
+            results[game_id] = scores
+        else:
+            pending.append(game_id)
+
+    if load:
+        try:
+            fetched = _query_top_scores(load, limit)
+        except Exception:
+            for game_id in load:
+                cache.release(f"{game_id}:{limit}")
+            raise
+        for game_id in load:
+            cache.set(f"{game_id}:{limit}", fetched[game_id])
+        results.update(fetched)
+
+    missing = []
+    for game_id in pending:
+        scores = cache.wait(f"{game_id}:{limit}", _TOP_SCORES_WAIT)
+        if scores is None:
+            missing.append(game_id)
+        else:
+            results[game_id] = scores
+    if missing:
+        # The other request's load failed or timed out; query without caching
+        results.update(_query_top_scores(missing, limit))
+    return results
+
+def _write_through_top_score(game_id, row):
+    # Fold a new score into every cached top list for the game, behind equal scores
+    entry = {'score': row['score'], 'username': row['username'], 'date_played': row['date_played']}
+
+    def insert(key, scores):
+        limit = int(key.rsplit(':', 1)[1])
+        position = next((i for i, s in enumerate(scores) if s['score'] < entry['score']), len(scores))
+        return (scores[:position] + [entry] + scores[position:])[:limit]
+
+    get_top_scores_cache().update(f"{game_id}:", insert)
+
+def get_top_scores_cache_stats():
+    """Hit/miss counters for the batched top-scores cache."""
+    return get_top_scores_cache().stats()
 
 def get_all_scores_for_game(game_id):
-    conn = get_db_connection()
-    scores = []
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT l.leaderboard_id, l.score, u.username, l.created_at as date_played
-            FROM scores_tb l
-            JOIN user_tb u ON l.user_id = u.id
-            WHERE l.game_id = %s
-            ORDER BY l.score DESC
-        """, (game_id,))
-        scores = cursor.fetchall()
-        conn.close()
-    return scores
+    try:
+        return get_score_index().top(game_id)
+    except Error as e:
+        print(f"Error loading scores for game {game_id}: {e}")
+        return []
+
+def get_scores_page_for_game(game_id, after=None, limit=50, user_db_id=None):
+    """
+    Returns (rows, has_more) for one page of a game's scores, best first, starting
+    after the (score, leaderboard_id) cursor. Pass user_db_id for one player's scores.
+    """
+    try:
+        return get_score_index().page(game_id, after, limit, user_db_id)
+    except Error as e:
+        print(f"Error loading scores for game {game_id}: {e}")
+        return [], False
+
+def get_user_scores_page(user_db_id, after=None, limit=50):
+    """
+    Returns (rows, has_more) for one page of a player's scores across all games,
+    best first, starting after the (score, leaderboard_id) cursor.
+    """
+    conn = get_db()
+    if not conn:
+        return [], False
+    cursor = conn.cursor(dictionary=True)
+    keyset = ""
+    params = [user_db_id]
+    if after is not None:
+        keyset = "AND (l.score < %s OR (l.score = %s AND l.leaderboard_id > %s))"
+        params += [after[0], after[0], after[1]]
+    # Fetch one extra row to learn whether another page follows
+    cursor.execute(f"""
+        SELECT l.leaderboard_id, l.score, g.name as game_name, u.username, l.created_at as date_played
+        FROM scores_tb l
+        JOIN games_tb g ON l.game_id = g.id
+        JOIN user_tb u ON l.user_id = u.id
+        WHERE l.user_id = %s {keyset}
+        ORDER BY l.score DESC, l.leaderboard_id ASC
+        LIMIT %s
+    """, (*params, limit + 1))
+    rows = cursor.fetchall()
+    return rows[:limit], len(rows) > limit
+
+def get_best_scores_page(game_id, after=None, limit=50):
+    """
+    Returns (rows, has_more) for one page of a game's "best per player" leaderboard
+    from user_best_scores, starting after the (score, leaderboard_id) cursor.
+    """
+    conn = get_db()
+    if not conn:
+        return [], False
+    cursor = conn.cursor(dictionary=True)
+    keyset = ""
+    params = [game_id]
+    if after is not None:
+        keyset = "AND (b.best_score < %s OR (b.best_score = %s AND b.leaderboard_id > %s))"
+        params += [after[0], after[0], after[1]]
+    # Fetch one extra row to learn whether another page follows
+    cursor.execute(f"""
+        SELECT b.leaderboard_id, b.best_score as score, u.username, b.achieved_at as date_played, b.play_count
+        FROM user_best_scores b
+        JOIN user_tb u ON b.user_id = u.id
+        WHERE b.game_id = %s {keyset}
+        ORDER BY b.best_score DESC, b.leaderboard_id ASC
+        LIMIT %s
+    """, (*params, limit + 1))
+    rows = cursor.fetchall()
+    return rows[:limit], len(rows) > limit
+
+def get_period_scores_page(game_id, period, start, after=None, limit=50):
+    """
+    Returns (rows, has_more) for one page of a game's leaderboard for one day,
+    week or month (best score per player, from score_rollups), starting after
+    the (score, leaderboard_id) cursor.
+    """
+    conn = get_db()
+    if not conn:
+        return [], False
+    cursor = conn.cursor(dictionary=True)
+    keyset = ""
+    params = [period, start, game_id]
+    if after is not None:
+        keyset = "AND (r.best_score < %s OR (r.best_score = %s AND r.leaderboard_id > %s))"
+        params += [after[0], after[0], after[1]]
+    # Fetch one extra row to learn whether another page follows
+    cursor.execute(f"""
+        SELECT r.leaderboard_id, r.best_score as score, u.username, r.achieved_at as date_played, r.play_count
+        FROM score_rollups r
+        JOIN user_tb u ON r.user_id = u.id
+        WHERE r.period_type = %s AND r.period_start = %s AND r.game_id = %s {keyset}
+        ORDER BY r.best_score DESC, r.leaderboard_id ASC
+        LIMIT %s
+    """, (*params, limit + 1))
+    rows = cursor.fetchall()
+    return rows[:limit], len(rows) > limit
+
+def get_period_player_best(game_id, period, start, user_db_id):
+    """Returns a player's best row (with its rank) for one day, week or month, or None."""
+    conn = get_db()
+    if not conn:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT r.leaderboard_id, r.best_score as score, u.username, r.achieved_at as date_played, r.play_count
+        FROM score_rollups r
+        JOIN user_tb u ON r.user_id = u.id
+        WHERE r.period_type = %s AND r.period_start = %s AND r.game_id = %s AND r.user_id = %s
+    """, (period, start, game_id, user_db_id))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    cursor.execute("""
+        SELECT COUNT(*) as better
+        FROM score_rollups
+        WHERE period_type = %s AND period_start = %s AND game_id = %s
+          AND (best_score > %s OR (best_score = %s AND leaderboard_id < %s))
+    """, (period, start, game_id, row['score'], row['score'], row['leaderboard_id']))
+    row['rank'] = cursor.fetchone()['better'] + 1
+    return row
+
+def get_player_rank(game_id, user_db_id):
+    """
+    Returns a player's standing on a game: their best score, rank among all
+    players (by best score), total players and percentile. None if the player
+    has no score on the game or the scores could not be loaded.
+    """
+    try:
+        standing = get_score_index().player_rank(game_id, user_db_id)
+    except Error as e:
+        print(f"Error loading scores for game {game_id}: {e}")
+        return None
+    if standing is None:
+        return None
+    rank, best, total_players = standing
+    return {
+        'rank': rank,
+        'best_score': best['score'],
+        'date_played': best['date_played'],
+        'total_players': total_players,
+        # Share of players ranked at or below this one
+        'percentile': round(100 * (total_players - rank + 1) / total_players, 1)
+    }
 
 def submit_score(user_id, game_id, score):
-    conn = get_db_connection()
+    conn = get_db()
     if conn:
         cursor = conn.cursor(dictionary=True)
         # Get the user id (INT) from user_id (VARCHAR)
-        cursor.execute("SELECT id FROM user_tb WHERE user_id = %s", (user_id,))
+        cursor.execute("SELECT id, username FROM user_tb WHERE user_id = %s", (user_id,))
         user = cursor.fetchone()
         if not user:
-            conn.close()
             return False
             
         user_db_id = user['id']
         
-        cursor.execute("SELECT max_score FROM games_tb WHERE id = %s", (game_id,))
+        cursor.execute("SELECT name, max_score FROM games_tb WHERE id = %s", (game_id,))
         game = cursor.fetchone()
         if game and game['max_score'] and score > game['max_score']:
             score = game['max_score']
         # Insert score using the database id
         cursor.execute("INSERT INTO scores_tb (user_id, game_id, score) VALUES (%s, %s, %s)", (user_db_id, game_id, score))
+        leaderboard_id = cursor.lastrowid
+        # Same transaction: best_score is assigned last because MySQL applies the
+        # assignments in order and the others compare against the old best
+        cursor.execute("""
+            INSERT INTO user_best_scores (user_id, game_id, best_score, leaderboard_id, achieved_at, play_count)
+            VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP, 1)
+            ON DUPLICATE KEY UPDATE
+                play_count = play_count + 1,
+                leaderboard_id = IF(VALUES(best_score) > best_score, VALUES(leaderboard_id), leaderboard_id),
+                achieved_at = IF(VALUES(best_score) > best_score, VALUES(achieved_at), achieved_at),
+                best_score = GREATEST(best_score, VALUES(best_score))
+        """, (user_db_id, game_id, score, leaderboard_id))
+        # Roll the score into its day's, week's and month's boards. The periods come
+        # from the row's created_at, the same clock compaction and is_closed use
+        periods = ' UNION ALL '.join(
+            f"SELECT %s AS rollup_period, {period_start_sql(period, 'created_at')} AS rollup_start, "
+            "game_id AS rollup_game, user_id AS rollup_user, score AS rollup_score, created_at AS rollup_at "
+            "FROM scores_tb WHERE leaderboard_id = %s"
+            for period in PERIODS
+        )
+        cursor.execute(f"""
+            INSERT INTO score_rollups (period_type, period_start, game_id, user_id, best_score, leaderboard_id, achieved_at, play_count)
+            SELECT rollup_period, rollup_start, rollup_game, rollup_user, rollup_score, %s, rollup_at, 1
+            FROM ({periods}) AS rolled
+            ON DUPLICATE KEY UPDATE
+                play_count = play_count + 1,
+                leaderboard_id = IF(VALUES(best_score) > best_score, VALUES(leaderboard_id), leaderboard_id),
+                achieved_at = IF(VALUES(best_score) > best_score, VALUES(achieved_at), achieved_at),
+                best_score = GREATEST(best_score, VALUES(best_score))
+        """, (leaderboard_id,) + tuple(value for period in PERIODS for value in (period, leaderboard_id)))
+        row = {
+            'leaderboard_id': leaderboard_id,
+            'user_id': user_db_id,
+            'username': user['username'],
+            'score': score,
+            'date_played': datetime.now().replace(microsecond=0)
+        }
+        event = dict(row, game_name=game['name'] if game else None)
+        _record_score_event(cursor, SCORE, game_id, event)
         conn.commit()
-        conn.close()
+        get_score_index().add_score(game_id, row)
+        _write_through_top_score(game_id, row)
+        _prune_score_events(conn)
         return True
     return False
 
 def delete_scores_for_game(game_id):
-    conn = get_db_connection()
+    conn = get_db()
     if conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM scores_tb WHERE game_id = %s", (game_id,))
+        cursor.execute("DELETE FROM user_best_scores WHERE game_id = %s", (game_id,))
+        cursor.execute("DELETE FROM score_rollups WHERE game_id = %s", (game_id,))
+        _record_score_event(cursor, RESET, game_id)
         conn.commit()
-        conn.close()
+        get_score_index().invalidate(game_id)
+        get_top_scores_cache().invalidate(f"{game_id}:")
         return True
     return False
+
+def _record_score_event(cursor, kind, game_id, data=None):
+    # Logged in the caller's transaction, so the version moves exactly when the scores do
+    cursor.execute(
+        "INSERT INTO score_events (kind, game_id, data) VALUES (%s, %s, %s)",
+        (kind, game_id, json.dumps(data or {}, default=str))
+    )
+    return cursor.lastrowid
+
+def _prune_score_events(conn):
+    # Drop old events now and then, always keeping each game's latest (its version)
+    config = current_app.config
+    if time.time() - _SCORE_EVENTS_PRUNE['last'] < config.get('LEADERBOARD_EVENTS_PRUNE_SECONDS', 3600):
+        return
+    _SCORE_EVENTS_PRUNE['last'] = time.time()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE e FROM score_events e
+            JOIN (SELECT game_id, MAX(id) AS latest_id FROM score_events GROUP BY game_id) latest
+                ON e.game_id = latest.game_id
+            WHERE e.id < latest.latest_id AND e.created_at < NOW() - INTERVAL %s SECOND
+        """, (config.get('LEADERBOARD_EVENTS_RETENTION_SECONDS', 86400),))
+        conn.commit()
+    except Error as e:
+        print(f"Error pruning score events: {e}")
+
+class ScoreEventLog:
+    """
+    The score_events table as the source a ScoreEventHub tails.
+
+    Rows are only read once settle_seconds old, so a transaction that took an
+    id before another one committed is not skipped by a reader that has
+    already moved past it.
+    """
+
+    def __init__(self, app, settle_seconds=2):
+        self.app = app
+        self.settle_seconds = settle_seconds
+
+    def _query(self, sql, params):
+        if has_app_context():
+            # Called during a request (a score index catching up): reuse its connection
+            conn = get_db()
+            if not conn:
+                return []
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        # On the hub's poller thread, outside any request
+        with self.app.app_context():
+            conn = get_db_connection()
+            if not conn:
+                return []
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                conn.close()
+
+    def latest_id(self, game_id=None):
+        """Id of the newest settled event, or of one game's (0 if there is none)."""
+        if game_id is None:
+            rows = self._query(
+                "SELECT MAX(id) AS id FROM score_events WHERE created_at <= NOW() - INTERVAL %s SECOND",
+                (self.settle_seconds,)
+            )
+        else:
+            rows = self._query(
+                "SELECT MAX(id) AS id FROM score_events WHERE game_id = %s AND created_at <= NOW() - INTERVAL %s SECOND",
+                (game_id, self.settle_seconds)
+            )
+        return (rows[0]['id'] or 0) if rows else None
+
+    def events_after(self, event_id, limit):
+        """Settled events newer than event_id, oldest first, as hub event tuples."""
+        rows = self._query("""
+            SELECT id, kind, game_id, data
+            FROM score_events
+            WHERE id > %s AND created_at <= NOW() - INTERVAL %s SECOND
+            ORDER BY id
+            LIMIT %s
+        """, (event_id, self.settle_seconds, limit))
+        return [(row['id'], row['kind'], row['game_id'], json.loads(row['data'] or '{}')) for row in rows]
+
+    def game_events_after(self, game_id, event_id, limit):
+        """
+        One game's events newer than event_id, settled or not, oldest first, as
+        (event_id, kind, data, settled) tuples; score rows get their date_played back.
+        """
+        rows = self._query("""
+            SELECT id, kind, data, created_at <= NOW() - INTERVAL %s SECOND AS settled
+            FROM score_events
+            WHERE game_id = %s AND id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (self.settle_seconds, game_id, event_id, limit))
+        events = []
+        for row in rows:
+            data = json.loads(row['data'] or '{}')
+            if isinstance(data.get('date_played'), str):
+                # Stored with json.dumps(default=str)
+                data['date_played'] = datetime.fromisoformat(data['date_played'])
+            events.append((row['id'], row['kind'], data, bool(row['settled'])))
+        return events
+
+# Offset of MySQL's clock from this server's, re-read every DATABASE_CLOCK_CHECK_SECONDS
+_DATABASE_CLOCK = {'offset': None, 'checked': 0}
+DATABASE_CLOCK_CHECK_SECONDS = 600
+
+def get_database_today(lag_seconds=0):
+    """
+    Today's date on MySQL's clock, which buckets scores into periods, as of
+    lag_seconds ago. Falls back to this server's clock while the database is
+    unavailable.
+    """
+    now = time.time()
+    if _DATABASE_CLOCK['offset'] is None or now - _DATABASE_CLOCK['checked'] >= DATABASE_CLOCK_CHECK_SECONDS:
+        conn = get_db()
+        if conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT NOW()")
+            row = cursor.fetchone()
+            if row and isinstance(row[0], datetime):
+                _DATABASE_CLOCK.update(offset=(row[0] - datetime.now()).total_seconds(), checked=now)
+    offset = _DATABASE_CLOCK['offset'] or 0
+    return (datetime.now() + timedelta(seconds=offset - lag_seconds)).date()
+
+def get_score_version(game_id=None):
+    """
+    Returns (version, modified) for one game's leaderboards, or any game's when
+    game_id is None: the id and UNIX time of the latest score event, (0, None)
+    before the first one, or (None, None) when the database is unavailable.
+
+    Every worker reads the same score_events table, so a score submitted on
+    one worker changes the version seen by all of them.
+    """
+    conn = get_db()
+    if not conn:
+        return None, None
+    cursor = conn.cursor(dictionary=True)
+    if game_id is None:
+        cursor.execute("SELECT id, UNIX_TIMESTAMP(created_at) AS modified FROM score_events ORDER BY id DESC LIMIT 1")
+    else:
+        cursor.execute(
+            "SELECT id, UNIX_TIMESTAMP(created_at) AS modified FROM score_events WHERE game_id = %s ORDER BY id DESC LIMIT 1",
+            (game_id,)
+        )
+    latest = cursor.fetchone()
+    if not latest:
+        return 0, None
+    return latest['id'], latest['modified']
@@ -0,0 +1,188 @@
+"""
+Connection pooling for the MySQL database.
+
+get_db_connection() hands out PooledConnection wrappers; calling close() on
+one returns the underlying connection to its pool instead of tearing down
+the TCP connection, so existing callers get pooling for free.
+"""
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+
+class PooledConnection:
+    """Proxy around a raw MySQL connection that returns it to the pool on close()."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._closed = False
+
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._release(self._conn)
+        self._conn = None
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise PoolError("Connection has already been returned to the pool")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQL connections.
+
+    Args:
+        connect_args: Keyword arguments passed to mysql.connector.connect()
+        pool_size: Number of idle connections kept open
+        max_overflow: Extra connections allowed beyond pool_size under load
+        recycle_seconds: Idle connections older than this are reopened
+        pre_ping: Check idle connections are alive before handing them out
+        timeout: Seconds to wait for a free connection when the pool is exhausted
+    """
+
+    def __init__(self, connect_args, pool_size=5, max_overflow=10,
+                 recycle_seconds=1800, pre_ping=True, timeout=30):
+        self.connect_args = dict(connect_args)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.recycle_seconds = recycle_seconds
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+
+        self._idle = deque()  # (connection, last_used) pairs
+        self._checked_out = 0
+        self._cond = threading.Condition()
+
+    @property
+    def max_connections(self):
+        return self.pool_size + self.max_overflow
+
+    def status(self):
+        """Return current pool counters for monitoring."""
+        with self._cond:
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+            }
+
+    def acquire(self):
+        """Check out a connection, reusing an idle one when possible."""
+        deadline = time.time() + self.timeout
+        while True:
+            candidate = None
+            with self._cond:
+                while not self._idle and self._checked_out >= self.max_connections:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise PoolError("Connection pool exhausted")
+                    self._cond.wait(remaining)
+                # Reserve the slot; health checks and connects happen outside the lock
+                self._checked_out += 1
+                if self._idle:
+                    candidate = self._idle.pop()
+
+            if candidate is None:
+                break
+
+            conn, last_used = candidate
+            if self._is_usable(conn, last_used):
+                return PooledConnection(self, conn)
+            self._discard(conn)
+            with self._cond:
+                self._checked_out -= 1
+
+        try:
+            conn = mysql.connector.connect(**self.connect_args)
+        except Exception:
+            with self._cond:
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, conn)
+
+    def _is_usable(self, conn, last_used):
+        if self.recycle_seconds and time.time() - last_used > self.recycle_seconds:
+            return False
+        if self.pre_ping:
+            try:
+                return conn.is_connected()
+            except Exception:
+                return False
+        return True
+
+    def _release(self, conn):
+        # Never hand a connection with an open transaction to the next caller
+        try:
+            if conn.is_connected() and conn.in_transaction:
+                conn.rollback()
+            healthy = conn.is_connected()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._checked_out -= 1
+            if healthy and len(self._idle) < self.pool_size:
+                self._idle.append((conn, time.time()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Close every idle connection held by the pool."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(connect_args, **pool_options):
+    """Return the shared pool for these connection arguments, creating it on first use."""
+    key = tuple(sorted(connect_args.items()))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ConnectionPool(connect_args, **pool_options)
+            _POOLS[key] = pool
+        return pool
+
+
+def dispose_pools():
+    """Close all idle pooled connections and forget every pool."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.dispose()
@@ -1,6 +1,9 @@
+import time
 import tkinter as tk
 from abc import ABC, abstractmethod
 
+from score_channel import ScoreChannel
+
 class GameBase(ABC):
     """
     Abstract base class for all Naruto-themed mini-games using Tkinter.
@@ -33,6 +36,13 @@ class GameBase(ABC):
         self.game_over = False
         self.score = 0
         
+        # Session telemetry, reported to the launcher over the score channel (if any)
+        self.frames = 0
+        self.started_at = time.time()
+        self.score_channel = ScoreChannel.from_environment()
+        if self.score_channel:
+            self.score_channel.send('start', title=title)
+        
         # Input State (To allow smooth movement in subclasses)
         self.keys_pressed = set()
         
@@ -98,9 +108,27 @@ class GameBase(ABC):
         """Restart the game - to be overridden by subclasses"""
         self.game_over = False
         self.score = 0
+        self.report_event('restart')
         # Subclasses should override this to reset their specific game state,
         # but they must call super().restart_game() or reset these flags themselves.
     
+    def report_event(self, name, **data):
+        """Send a named gameplay event (e.g. level_up) to the launcher, if it is listening."""
+        if self.score_channel:
+            self.score_channel.send('event', name=name, **data)
+    
+    def report_final_score(self):
+        """Send the final score with session duration and frame count, then close the channel."""
+        if self.score_channel:
+            self.score_channel.send(
+                'score',
+                score=int(self.score),
+                duration=round(time.time() - self.started_at, 3),
+                frames=self.frames
+            )
+            self.score_channel.close()
+            self.score_channel = None
+    
     def quit_game(self):
         """Safely close the window"""
         self.running = False
@@ -136,6 +164,8 @@ class GameBase(ABC):
                 return
 
             if not self.game_over:
+                self.frames += 1
+                
                 # 1. Update Game Logic
                 self.update()
                 
@@ -156,4 +186,5 @@ class GameBase(ABC):
         game_loop()
         self.root.mainloop()
         
+        self.report_final_score()
         return self.score
\ No newline at end of file
@@ -2,47 +2,101 @@
 """
 Game Launcher - Bridges web interface with Python games (Tkinter/Pygame)
 Launches games in a controlled subprocess and captures scores.
+
+The web routes use GameLauncher directly, so each play costs a single child
+process (or none, on a warm pool worker) and the score comes back as a dict.
+Running this file from the command line is kept for manual testing.
 """
 
 import sys
 import os
 import subprocess
 import re  # IMPORT ADDED: For smarter score extraction
+import threading
+from collections import deque
+
+try:
+    from MyFlaskapp.games.score_channel import SCORE_FD_ENV, open_score_pipe
+except ImportError:  # Run as a script from the games directory
+    from score_channel import SCORE_FD_ENV, open_score_pipe
+
+FINAL_SCORE_PATTERN = re.compile(r'FINAL_SCORE:(\d+)')
+
+# Games' output is read in chunks of at most this many characters
+READ_CHUNK_SIZE = 8192
+
+
+class OutputTail:
+    """Keeps only the last max_chars characters written to it."""
+    
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.truncated = False
+        self._chunks = deque()
+        self._size = 0
+    
+    def append(self, text):
+        self._chunks.append(text)
+        self._size += len(text)
+        while self._size > self.max_chars:
+            self.truncated = True
+            excess = self._size - self.max_chars
+            oldest = self._chunks[0]
+            if len(oldest) <= excess:
+                self._chunks.popleft()
+                self._size -= len(oldest)
+            else:
+                self._chunks[0] = oldest[excess:]
+                self._size -= excess
+    
+    def text(self):
+        return ''.join(self._chunks)
+
 
 class GameLauncher:
-    def __init__(self, game_file_path, timeout=300):
+    def __init__(self, game_file_path, timeout=300, warm_pool=None,
+                 max_output_chars=65536, stop_on_score=False):
         self.game_file_path = game_file_path
         self.timeout = timeout
+        self.warm_pool = warm_pool  # Optional WarmInterpreterPool to run the game on
+        self.max_output_chars = max_output_chars  # Output kept per stream; older output is dropped
+        self.stop_on_score = stop_on_score  # Terminate the game as soon as it prints FINAL_SCORE
         
     def launch_game(self):
         """Launch the game and return the score"""
         try:
-            # Execute the game as subprocess to handle imports correctly
-            # Note: sys.executable ensures we use the same python interpreter
-            result = subprocess.run(
-                [sys.executable, self.game_file_path],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-                cwd=os.path.dirname(self.game_file_path),
-                shell=False
-            )
+            if self.warm_pool is not None:
+                return self.warm_pool.run_game(self.game_file_path, self.timeout, stop_on_score=self.stop_on_score)
+            
+            # Hand the game the write end of a score pipe (GameBase reports through it)
+            reader, write_fd = open_score_pipe()
+            extra = {}
+            if reader is not None:
+                extra = {'env': dict(os.environ, **{SCORE_FD_ENV: str(write_fd)}), 'pass_fds': (write_fd,)}
             
-            # Extract score from stdout
-            score = self._extract_score_from_output(result.stdout)
+            try:
+                stdout, stderr, returncode, marker_score = self._run_streaming(extra)
+            finally:
+                if write_fd is not None:
+                    os.close(write_fd)
+            
+            score, telemetry = self.collect_score(reader, stdout.text(), marker_score)
             
             return {
                 'success': True,
                 'score': score,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
-                'returncode': result.returncode
+                'telemetry': telemetry,
+                'stdout': stdout.text(),
+                'stderr': stderr.text(),
+                'output_truncated': stdout.truncated or stderr.truncated,
+                'returncode': returncode
             }
                 
         except subprocess.TimeoutExpired:
             return {
                 'success': False,
                 'error': 'Game timed out',
+                'timed_out': True,
                 'score': 0
             }
         except Exception as e:
@@ -52,6 +106,86 @@ class GameLauncher:
                 'score': 0
             }
     
+    def _run_streaming(self, extra):
+        """
+        Run the game, consuming stdout/stderr line by line as it is produced.
+        
+        Only the last max_output_chars of each stream are kept, so memory stays
+        bounded however much the game prints. A FINAL_SCORE marker is picked
+        up as soon as it appears, even if later output pushes it out of the
+        kept tail.
+        
+        Returns (stdout OutputTail, stderr OutputTail, returncode, marker score or None).
+        Raises subprocess.TimeoutExpired after killing the game if it overruns.
+        """
+        # Execute the game as subprocess to handle imports correctly
+        # Note: sys.executable ensures we use the same python interpreter
+        process = subprocess.Popen(
+            [sys.executable, self.game_file_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors='replace',
+            cwd=os.path.dirname(self.game_file_path),
+            shell=False,
+            **extra
+        )
+        stdout = OutputTail(self.max_output_chars)
+        stderr = OutputTail(self.max_output_chars)
+        marker = {}
+        
+        def on_stdout(chunk):
+            match = FINAL_SCORE_PATTERN.search(chunk)
+            if match and 'score' not in marker:
+                marker['score'] = int(match.group(1))
+                if self.stop_on_score:
+                    process.terminate()
+        
+        readers = [
+            threading.Thread(target=self._pump, args=(process.stdout, stdout, on_stdout), daemon=True),
+            threading.Thread(target=self._pump, args=(process.stderr, stderr, None), daemon=True)
+        ]
+        for thread in readers:
+            thread.start()
+        
+        try:
+            returncode = process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            for thread in readers:
+                thread.join(timeout=1)
+        
+        return stdout, stderr, returncode, marker.get('score')
+    
+    @staticmethod
+    def _pump(stream, tail, on_chunk):
+        with stream:
+            while True:
+                chunk = stream.readline(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                tail.append(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+    
+    def collect_score(self, reader, output, marker_score=None):
+        """
+        Return (score, telemetry) for a finished game.
+        Prefers the score reported on the score channel, then a FINAL_SCORE marker
+        seen while streaming; falls back to parsing the kept stdout.
+        """
+        if reader is not None:
+            # The game has exited; only a grandchild still holding the pipe could delay EOF
+            reader.wait(timeout=1)
+            if reader.score is not None:
+                return reader.score, reader.telemetry()
+        if marker_score is not None:
+            return marker_score, None
+        return self._extract_score_from_output(output), None
+    
     def _extract_score_from_output(self, output):
         """
         Extract score from stdout. 
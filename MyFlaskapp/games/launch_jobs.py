@@ -0,0 +1,448 @@
+"""
+Launch Jobs - runs game launches on a bounded worker pool.
+
+Routes enqueue a launch and return a job id straight away instead of
+blocking a request thread for the whole game session. Clients poll the
+job (see /games/jobs/<job_id>) for its status and captured score.
+
+Admission control: at most max_workers games run at once and at most
+max_per_user per player; further launches wait in a bounded queue and
+are rejected with LaunchQueueFull once it holds max_queued jobs.
+Running games hold slots in a store selected by LAUNCH_SLOTS_BACKEND:
+    sqlite  a SQLite file shared by every worker on the host (the default),
+            so the limits apply to the host rather than to each process
+    memory  per-process counts, for a single worker
+Shared slots are leases: a worker that dies mid-game frees its slots
+once the game's timeout has passed.
+
+A job runs in the process that accepted it, but its status is also
+written to the shared cache backend (CACHE_BACKEND=sqlite or redis)
+whenever it changes, so a status poll landing on any worker finds it.
+With the per-process memory backend, status is only known to the
+accepting worker.
+"""
+
+import os
+import subprocess
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from MyFlaskapp.cache import connect_sqlite, get_cache_backend
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+TIMED_OUT = 'timed_out'
+
+FINISHED_STATUSES = {COMPLETED, FAILED, TIMED_OUT}
+
+# Shared store key prefix for job records
+JOB_KEY_PREFIX = 'launch_job:'
+
+
+class LaunchQueueFull(Exception):
+    """Raised when a launch cannot start now and the wait queue is already full."""
+
+
+class LaunchJob:
+    def __init__(self, user_id, game_name):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.game_name = game_name
+        self.status = QUEUED
+        self.score = None
+        self.score_saved = False
+        self.telemetry = None
+        self.message = 'Waiting for a free launcher.'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def to_record(self):
+        """JSON-serialisable copy of the job's state, for the shared store."""
+        return dict(vars(self))
+
+    @classmethod
+    def from_record(cls, record):
+        """Rebuild a job published by another process."""
+        job = cls.__new__(cls)
+        vars(job).update(record)
+        return job
+
+    def to_dict(self, queue_position=None):
+        """JSON-serialisable view of the job for the status endpoint."""
+        now = time.time()
+        if self.started_at is None:
+            elapsed = 0
+        else:
+            elapsed = (self.finished_at or now) - self.started_at
+        return {
+            'job_id': self.id,
+            'game': self.game_name,
+            'status': self.status,
+            'finished': self.finished,
+            'score': self.score,
+            'score_saved': self.score_saved,
+            'telemetry': self.telemetry,
+            'message': self.message,
+            'queue_position': queue_position,
+            'queued_seconds': round((self.started_at or now) - self.created_at, 1),
+            'elapsed_seconds': round(elapsed, 1)
+        }
+
+
+class MemoryLaunchSlots:
+    """Running-game slots counted in this process only."""
+
+    shared = False
+
+    def __init__(self, max_active, max_per_user):
+        self.max_active = max_active
+        self.max_per_user = max_per_user
+        self._users = {}  # job_id -> user_id
+        self._by_user = Counter()
+        self._lock = threading.Lock()
+
+    def acquire(self, job_id, user_id):
+        """Take a slot for the job if both limits allow it. Returns True if taken."""
+        with self._lock:
+            if len(self._users) >= self.max_active or self._by_user[user_id] >= self.max_per_user:
+                return False
+            self._users[job_id] = user_id
+            self._by_user[user_id] += 1
+            return True
+
+    def release(self, job_id):
+        with self._lock:
+            user_id = self._users.pop(job_id, None)
+            if user_id is not None:
+                self._by_user[user_id] -= 1
+                if self._by_user[user_id] <= 0:
+                    del self._by_user[user_id]
+
+    def counts(self):
+        """(running games, players with a running game)"""
+        with self._lock:
+            return len(self._users), len(self._by_user)
+
+
+class SQLiteLaunchSlots:
+    shared = True
+
+    def __init__(self, path, max_active, max_per_user, lease_seconds=360):
+        """
+        Running-game slots shared by every worker on the host through a SQLite file.
+
+        A slot is taken by checking both limits and inserting the job's row in
+        one write transaction, so concurrent workers cannot both take the last
+        slot. Rows expire after lease_seconds in case their worker never
+        releases them.
+
+        Args:
+            path: SQLite database file (created if missing)
+            max_active: Maximum number of games running on the host
+            max_per_user: Maximum number of games one user may have running
+            lease_seconds: Seconds before an unreleased slot is reclaimed
+        """
+        self.path = path
+        self.max_active = max_active
+        self.max_per_user = max_per_user
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS launch_slots (
+                job_id TEXT PRIMARY KEY,
+                user_id TEXT,
+                expires_at REAL
+            ) WITHOUT ROWID
+        """)
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def acquire(self, job_id, user_id):
+        """Take a slot for the job if both limits allow it. Returns True if taken."""
+        now = time.time()
+        conn = self._connection()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM launch_slots WHERE expires_at <= ?", (now,))
+            active, user_active = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(user_id = ?), 0) FROM launch_slots", (str(user_id),)
+            ).fetchone()
+            allowed = active < self.max_active and user_active < self.max_per_user
+            if allowed:
+                conn.execute(
+                    "INSERT INTO launch_slots (job_id, user_id, expires_at) VALUES (?, ?, ?)",
+                    (job_id, str(user_id), now + self.lease_seconds)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed
+
+    def release(self, job_id):
+        self._connection().execute("DELETE FROM launch_slots WHERE job_id = ?", (job_id,))
+
+    def counts(self):
+        """(running games, players with a running game) across the host"""
+        return self._connection().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM launch_slots WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+
+
+class LaunchJobQueue:
+    """
+    Bounded pool of worker threads that run game launches.
+
+    Args:
+        max_workers: Maximum number of games running at the same time
+        max_per_user: Maximum number of games one user may have running at once
+        max_queued: Maximum number of launches waiting for a free slot
+        retention_seconds: How long finished jobs stay queryable
+        store: Optional cache backend shared by every worker; job status is
+            published to it so other processes can answer status polls
+        slots: Slot store enforcing max_workers and max_per_user (default: this
+            process only); with a shared one the limits cover every worker
+        poll_seconds: Seconds between retries of waiting jobs while their slots
+            may be freed by other workers
+    """
+
+    def __init__(self, max_workers=4, max_per_user=1, max_queued=20, retention_seconds=3600,
+                 store=None, slots=None, poll_seconds=1):
+        self.max_workers = max_workers
+        self.max_per_user = max_per_user
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.store = store
+        self.slots = slots if slots is not None else MemoryLaunchSlots(max_workers, max_per_user)
+        self.poll_seconds = poll_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='game-launch')
+        self._jobs = OrderedDict()
+        self._pending = deque()  # (job, run, on_finish) waiting for a slot, in arrival order
+        self._active = 0  # games running in this process
+        self._retry = None  # timer re-dispatching waiting jobs
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()  # a record is read and written in one step, so the newest state wins
+
+    def submit(self, user_id, game_name, run, on_finish=None):
+        """
+        Queue a launch and return its LaunchJob immediately.
+
+        Args:
+            run: Callable returning the captured score, or a launcher result dict
+                with 'score' and optional 'telemetry'; runs on a worker thread
+            on_finish: Optional callable(job) invoked after run, e.g. to save the score
+
+        Raises:
+            LaunchQueueFull: If the launch would have to wait and the queue is full
+        """
+        job = LaunchJob(user_id, game_name)
+        with self._lock:
+            self._prune()
+            self._pending.append((job, run, on_finish))
+            self._dispatch()
+            if job.status == QUEUED:
+                if len(self._pending) > self.max_queued:
+                    self._pending.pop()
+                    raise LaunchQueueFull('Too many games are waiting to launch. Please try again shortly.')
+                job.message = f'Waiting for a free launcher (position {len(self._pending)}).'
+            self._jobs[job.id] = job
+        self._publish(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id, user_id):
+        """
+        Status payload for one of user_id's jobs, whichever worker accepted it,
+        or None if the job is unknown or belongs to someone else.
+        """
+        job = self.get(job_id)
+        if job is not None:
+            return self.job_status(job) if job.user_id == user_id else None
+        if self.store is None:
+            return None
+        try:
+            record = self.store.get(JOB_KEY_PREFIX + job_id)
+        except Exception as e:
+            print(f"Error reading launch job {job_id}: {e}")
+            return None
+        if record is None or record.get('user_id') != user_id:
+            return None
+        # Queue positions are only known to the accepting worker
+        return LaunchJob.from_record(record).to_dict()
+
+    def _publish(self, job):
+        # Write the job's current state to the shared store (never under self._lock)
+        if self.store is None:
+            return
+        try:
+            with self._publish_lock:
+                self.store.set(JOB_KEY_PREFIX + job.id, job.to_record(), self.retention_seconds)
+        except Exception as e:
+            print(f"Error publishing launch job {job.id}: {e}")
+
+    def position(self, job):
+        """1-based position of a waiting job in the queue, or None if it is not waiting."""
+        with self._lock:
+            for index, (pending_job, _, _) in enumerate(self._pending, start=1):
+                if pending_job is job:
+                    return index
+        return None
+
+    def job_status(self, job):
+        """Status payload for a job, including its queue position while waiting."""
+        return job.to_dict(queue_position=self.position(job))
+
+    def stats(self):
+        """Queue depth and active launch counts for monitoring (active counts cover every worker sharing the slots)."""
+        active, active_users = self.slots.counts()
+        with self._lock:
+            return {
+                'active': active,
+                'local_active': self._active,
+                'queued': len(self._pending),
+                'max_workers': self.max_workers,
+                'max_per_user': self.max_per_user,
+                'max_queued': self.max_queued,
+                'active_users': active_users
+            }
+
+    def _acquire(self, job):
+        try:
+            return self.slots.acquire(job.id, job.user_id)
+        except Exception as e:
+            print(f"Error taking a launch slot for job {job.id}: {e}")
+            return False
+
+    def _dispatch(self):
+        # Start waiting jobs in arrival order, skipping users already at their limit (caller holds the lock)
+        if not self._pending:
+            return
+        waiting = deque()
+        while self._pending:
+            entry = self._pending.popleft()
+            job = entry[0]
+            if self._active < self.max_workers and self._acquire(job):
+                self._active += 1
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.message = 'Game is running.'
+                self._executor.submit(self._run_job, *entry)
+            else:
+                waiting.append(entry)
+        self._pending = waiting
+        if self._pending and self.slots.shared and self._retry is None:
+            # Slots may be freed by another worker, which cannot wake this one
+            self._retry = threading.Timer(self.poll_seconds, self._redispatch)
+            self._retry.daemon = True
+            self._retry.start()
+
+    def _redispatch(self):
+        with self._lock:
+            self._retry = None
+            self._dispatch()
+
+    def _run_job(self, job, run, on_finish):
+        self._publish(job)
+        try:
+            outcome = run()
+            if isinstance(outcome, dict):
+                job.score = outcome.get('score')
+                job.telemetry = outcome.get('telemetry')
+            else:
+                job.score = outcome
+            job.status = COMPLETED
+            job.message = 'Game completed.'
+        except subprocess.TimeoutExpired:
+            job.status = TIMED_OUT
+            job.message = 'Game timed out.'
+        except Exception as e:
+            job.status = FAILED
+            job.message = f'Error launching game: {e}'
+        finally:
+            job.finished_at = time.time()
+            try:
+                self.slots.release(job.id)
+            except Exception as e:
+                print(f"Error releasing the launch slot of job {job.id}: {e}")
+            with self._lock:
+                self._active -= 1
+                self._dispatch()
+
+        if on_finish is not None:
+            try:
+                on_finish(job)
+            except Exception as e:
+                print(f"Error finishing launch job {job.id}: {e}")
+        self._publish(job)
+
+    def _prune(self):
+        # Jobs are kept in creation order, so stop at the first one still in its retention window
+        cutoff = time.time() - self.retention_seconds
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if job.created_at >= cutoff:
+                break
+            if job.finished:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._retry is not None:
+                self._retry.cancel()
+                self._retry = None
+        self._executor.shutdown(wait=wait)
+
+
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_launch_queue():
+    """Return the app's launch queue, creating it from config on first use."""
+    queue = current_app.extensions.get('launch_queue')
+    if queue is None:
+        with _QUEUE_LOCK:
+            queue = current_app.extensions.get('launch_queue')
+            if queue is None:
+                backend = get_cache_backend()
+                max_workers = current_app.config.get('LAUNCH_MAX_WORKERS', 4)
+                max_per_user = current_app.config.get('LAUNCH_MAX_PER_USER', 1)
+                slots = None
+                if current_app.config.get('LAUNCH_SLOTS_BACKEND', 'sqlite') == 'sqlite':
+                    path = current_app.config.get('LAUNCH_SLOTS_SQLITE_PATH')
+                    if not path:
+                        os.makedirs(current_app.instance_path, exist_ok=True)
+                        path = os.path.join(current_app.instance_path, 'launch_slots.sqlite3')
+                    # A slot outlives its game's timeout only if the worker died
+                    lease_seconds = current_app.config.get('GAME_TIMEOUT_SECONDS', 300) + 60
+                    slots = SQLiteLaunchSlots(path, max_workers, max_per_user, lease_seconds)
+                queue = LaunchJobQueue(
+                    max_workers=max_workers,
+                    max_per_user=max_per_user,
+                    max_queued=current_app.config.get('LAUNCH_MAX_QUEUED', 20),
+                    retention_seconds=current_app.config.get('LAUNCH_JOB_RETENTION_SECONDS', 3600),
+                    store=backend if backend.shared else None,
+                    slots=slots
+                )
+                current_app.extensions['launch_queue'] = queue
+    return queue
@@ -0,0 +1,220 @@
+"""
+Game Metadata - extracts a game's title and class from its source with ast.
+
+Results are cached on disk in a JSON file keyed by the SHA-256 of the game
+source, so a fresh process does not re-parse games that have not changed.
+Shared by the web app (via GameRegistry) and scripts/sync_games_database.py.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+DEFAULT_CACHE_PATH = os.environ.get('GAME_METADATA_CACHE_PATH') or os.path.join(
+    os.path.dirname(__file__), '__pycache__', 'game_metadata.json'
+)
+
+# Title sources in priority order (lower wins)
+_ROOT_TITLE, _INIT_TITLE_KWARG, _TITLE_KWARG, _SET_CAPTION, _TITLE_ATTRIBUTE = range(5)
+
+
+def _string_value(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value.strip():
+        return node.value.strip()
+    return None
+
+
+def _attribute_name(node):
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _is_super_init(func):
+    return (isinstance(func, ast.Attribute) and func.attr == '__init__'
+            and isinstance(func.value, ast.Call) and _attribute_name(func.value.func) == 'super')
+
+
+def _find_title(tree):
+    """Return the best literal window title found in the module, or None."""
+    candidates = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            func = node.func
+            # root.title("...") / self.root.title("...")
+            if (isinstance(func, ast.Attribute) and func.attr == 'title'
+                    and _attribute_name(func.value) == 'root' and node.args):
+                value = _string_value(node.args[0])
+                if value:
+                    candidates.append((_ROOT_TITLE, node.lineno, value))
+            # pygame.display.set_caption("...")
+            elif _attribute_name(func) == 'set_caption' and node.args:
+                value = _string_value(node.args[0])
+                if value:
+                    candidates.append((_SET_CAPTION, node.lineno, value))
+            # super().__init__(title="...") or any other call(title="...")
+            for keyword in node.keywords:
+                if keyword.arg == 'title':
+                    value = _string_value(keyword.value)
+                    if value:
+                        kind = _INIT_TITLE_KWARG if _is_super_init(func) else _TITLE_KWARG
+                        candidates.append((kind, node.lineno, value))
+        # self.title = "..."
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Attribute) and target.attr == 'title':
+                    value = _string_value(node.value)
+                    if value:
+                        candidates.append((_TITLE_ATTRIBUTE, node.lineno, value))
+    if not candidates:
+        return None
+    return min(candidates)[2]
+
+
+def _is_main_guard(node):
+    test = node.test
+    return (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name)
+            and test.left.id == '__name__' and len(test.comparators) == 1
+            and _string_value(test.comparators[0]) == '__main__')
+
+
+def _find_game_class(tree):
+    """Pick the game class: the one started under __main__, else the most game-like class."""
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    if not classes:
+        return None
+    class_names = {cls.name for cls in classes}
+
+    for node in tree.body:
+        if isinstance(node, ast.If) and _is_main_guard(node):
+            for inner in ast.walk(node):
+                if (isinstance(inner, ast.Call) and isinstance(inner.func, ast.Name)
+                        and inner.func.id in class_names):
+                    return inner.func.id
+
+    for cls in classes:
+        if cls.name.endswith('Game') and cls.name != 'GameBase':
+            return cls.name
+    for cls in classes:
+        if any(_attribute_name(base) == 'GameBase' for base in cls.bases):
+            return cls.name
+    return classes[0].name
+
+
+def parse_game_source(source):
+    """Parse game source code and return {'title': ..., 'class_name': ...} (values may be None)."""
+    tree = ast.parse(source)
+    return {'title': _find_title(tree), 'class_name': _find_game_class(tree)}
+
+
+class MetadataCache:
+    """JSON file mapping a source hash to its parsed metadata."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def get(self, digest):
+        with self._lock:
+            self._load()
+            return self._entries.get(digest)
+
+    def put(self, digest, data):
+        with self._lock:
+            self._load()
+            self._entries[digest] = data
+            self._save()
+
+    def _save(self):
+        # Write to a temp file and swap it in so readers never see a partial file
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not write game metadata cache {self.path}: {e}")
+
+
+metadata_cache = MetadataCache()
+
+
+def generate_description_from_title(title, filename):
+    """Generate a description based on the game title and filename."""
+    # Keywords and their associated descriptions
+    descriptions = {
+        'typing': 'Test your typing speed in this Naruto-themed typing game.',
+        'shuriken': 'Practice your aim with shuriken target practice.',
+        'memory': 'Challenge your memory with ninja-themed patterns.',
+        'clash': 'Battle against opponents in intense jutsu combat.',
+        'cat': 'Help catch ninja cats in this fun mission.',
+        'tree': 'Master the art of tree climbing with chakra control.',
+        'ramen': 'Serve ramen to hungry ninja customers.',
+        'roof': 'Run endlessly across village rooftops.',
+        'hand': 'Learn and memorize ninja hand signs.',
+        'shadow': 'Test your reflexes with shadow clone training.',
+        'sharingan': 'Train your Sharingan to spot the differences.',
+        'whack': 'Test your speed with shadow clone whack-a-mole.'
+    }
+
+    title_lower = title.lower()
+    filename_lower = filename.lower()
+
+    for keyword, desc in descriptions.items():
+        if keyword in title_lower or keyword in filename_lower:
+            return desc
+
+    # Default description if no keywords match
+    return f'Experience the ninja world in {title}.'
+
+
+def extract_game_metadata(filepath, cache=None):
+    """Extract metadata from a game file, using the on-disk cache when the source is unchanged."""
+    cache = cache or metadata_cache
+    try:
+        with open(filepath, 'rb') as f:
+            source = f.read()
+
+        filename = os.path.basename(filepath)
+        digest = hashlib.sha256(source).hexdigest()
+
+        parsed = cache.get(digest)
+        if parsed is None:
+            try:
+                parsed = parse_game_source(source)
+            except SyntaxError as e:
+                print(f"Could not parse {filepath}: {e}")
+                parsed = {'title': None, 'class_name': None}
+            cache.put(digest, parsed)
+
+        # If no title found, use filename
+        title = parsed['title'] or filename.replace('.py', '').replace('_', ' ').title()
+
+        return {
+            'id': filename,  # Use filename as ID
+            'name': title,
+            'description': generate_description_from_title(title, filename),
+            'file_path': f'games/{filename}',  # Relative path for launcher
+            'filename': filename,
+            'class_name': parsed['class_name'] or 'UnknownGame'
+        }
+
+    except Exception as e:
+        print(f"Error extracting metadata from {filepath}: {e}")
+        return None
@@ -0,0 +1,90 @@
+"""
+Game Registry - caches metadata for the games in the games directory.
+
+Metadata is parsed once per file and kept in a filename -> metadata dict,
+so lookups are O(1). A file is only re-parsed when its mtime or size
+changes, and the directory itself is re-checked at most once per
+check_interval seconds.
+"""
+
+import os
+import threading
+import time
+
+# Files in the games directory that are not games (utility modules, etc.)
+NON_GAME_FILES = {
+    '__init__.py', 'game_launcher.py', 'game_base.py', 'routes.py', 'registry.py', 'metadata.py',
+    'launch_jobs.py', 'warm_pool.py', 'score_channel.py'
+}
+
+
+class GameRegistry:
+    def __init__(self, games_dir, loader, exclude_files=NON_GAME_FILES, check_interval=2.0):
+        """
+        Args:
+            games_dir: Directory containing the game modules
+            loader: Callable taking a file path and returning a metadata dict (or None)
+            exclude_files: Filenames that should never be treated as games
+            check_interval: Minimum seconds between directory revalidations
+        """
+        self.games_dir = games_dir
+        self.loader = loader
+        self.exclude_files = set(exclude_files)
+        self.check_interval = check_interval
+
+        self._entries = {}  # filename -> (mtime, size, metadata)
+        self._last_checked = None
+        self._lock = threading.Lock()
+
+    def _is_game_file(self, filename):
+        return filename.endswith('.py') and filename not in self.exclude_files
+
+    def refresh(self, force=False):
+        """Re-parse any game file that was added or changed since the last check."""
+        now = time.time()
+        with self._lock:
+            if (not force and self._last_checked is not None
+                    and now - self._last_checked < self.check_interval):
+                return
+
+            seen = set()
+            for filename in os.listdir(self.games_dir):
+                if not self._is_game_file(filename):
+                    continue
+                filepath = os.path.join(self.games_dir, filename)
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    continue
+                seen.add(filename)
+
+                cached = self._entries.get(filename)
+                if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+                    continue
+                self._entries[filename] = (stat.st_mtime, stat.st_size, self.loader(filepath))
+
+            for filename in set(self._entries) - seen:
+                del self._entries[filename]
+
+            self._last_checked = now
+
+    def invalidate(self):
+        """Forget all cached metadata so the next lookup re-parses every game."""
+        with self._lock:
+            self._entries.clear()
+            self._last_checked = None
+
+    def list_games(self):
+        """Return a copy of every game's metadata, ordered by filename."""
+        self.refresh()
+        with self._lock:
+            return [dict(entry[2]) for _, entry in sorted(self._entries.items()) if entry[2]]
+
+    def get(self, filename):
+        """Return a copy of the metadata for one game filename, or None."""
+        self.refresh()
+        with self._lock:
+            entry = self._entries.get(filename)
+        if entry is None or entry[2] is None:
+            return None
+        return dict(entry[2])
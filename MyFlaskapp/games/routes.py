@@ -1,11 +1,14 @@
-from flask import render_template, session, redirect, url_for, request, flash, current_app
+from flask import render_template, session, redirect, url_for, request, flash, current_app, jsonify
 from functools import wraps
 from . import games_bp
-from MyFlaskapp.db import get_db_connection
+from MyFlaskapp.db import get_db_connection, get_db
+from MyFlaskapp.games.registry import GameRegistry
+from MyFlaskapp.games.metadata import extract_game_metadata
+from MyFlaskapp.games.launch_jobs import get_launch_queue, LaunchQueueFull, COMPLETED, TIMED_OUT
+from MyFlaskapp.games.warm_pool import get_warm_pool
+from MyFlaskapp.games.game_launcher import GameLauncher
 import subprocess
-import sys
 import os
-import re
 import importlib.util
 
 def login_required(f):
@@ -29,7 +32,7 @@ def user_role_required(f):
 
 def get_or_create_game_in_db(game):
     """Find existing game in database or create a new entry."""
-    conn = get_db_connection()
+    conn = get_db()
     if not conn:
         return None
     
@@ -54,8 +57,6 @@ def get_or_create_game_in_db(game):
     except Exception as e:
         print(f"Error creating game in database: {e}")
         return None
-    finally:
-        conn.close()
 
 def safe_int_convert(value, default=0):
     """Safely convert a value to int, handling empty strings and errors."""
@@ -85,95 +86,96 @@ def check_game_access(user_id, game_filename):
     return True  # Default to enabled if DB connection fails
 
 def scan_games_directory():
-    """Scan the games directory and extract metadata from Python game files."""
-    games_dir = os.path.dirname(__file__)
-    games = []
-    
-    # List of game files to exclude (utility files, etc.)
-    exclude_files = {'__init__.py', 'game_launcher.py', 'game_base.py', 'routes.py'}
-    
-    for filename in os.listdir(games_dir):
-        if filename.endswith('.py') and filename not in exclude_files:
-            filepath = os.path.join(games_dir, filename)
-            game_info = extract_game_metadata(filepath)
-            if game_info:
-                games.append(game_info)
-    
-    return games
+    """Return metadata for every game in the games directory (served from the registry cache)."""
+    return game_registry.list_games()
 
-def extract_game_metadata(filepath):
-    """Extract metadata from a game file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        filename = os.path.basename(filepath)
-        
-        # Extract game title from various patterns
-        title_patterns = [
-            r'root\.title\(["\']([^"\']+)["\']\)',
-            r'super\(\).__init__\([^)]*title=["\']([^"\']+)["\']',
-            r'title=["\']([^"\']+)["\']',
-        ]
-        
-        title = None
-        for pattern in title_patterns:
-            match = re.search(pattern, content)
-            if match:
-                title = match.group(1).strip()
-                break
-        
-        # If no title found, use filename
-        if not title:
-            title = filename.replace('.py', '').replace('_', ' ').title()
-        
-        # Extract class name
-        class_match = re.search(r'class\s+(\w+Game|\w+)', content)
-        class_name = class_match.group(1) if class_match else 'UnknownGame'
-        
-        # Generate description based on filename and title
-        description = generate_description_from_title(title, filename)
-        
-        return {
-            'id': filename,  # Use filename as ID
-            'name': title,
-            'description': description,
-            'file_path': f'games/{filename}',  # Relative path for launcher
-            'filename': filename,
-            'class_name': class_name
-        }
-        
-    except Exception as e:
-        print(f"Error extracting metadata from {filepath}: {e}")
-        return None
+def get_game_by_filename(game_filename):
+    """Look up one game's metadata by filename, or None if it does not exist."""
+    return game_registry.get(game_filename)
+
+# Shared cache of game metadata, re-parsed only when a game file changes
+game_registry = GameRegistry(os.path.dirname(__file__), extract_game_metadata)
 
-def generate_description_from_title(title, filename):
-    """Generate a description based on the game title and filename."""
-    # Keywords and their associated descriptions
-    descriptions = {
-        'typing': 'Test your typing speed in this Naruto-themed typing game.',
-        'shuriken': 'Practice your aim with shuriken target practice.',
-        'memory': 'Challenge your memory with ninja-themed patterns.',
-        'clash': 'Battle against opponents in intense jutsu combat.',
-        'cat': 'Help catch ninja cats in this fun mission.',
-        'tree': 'Master the art of tree climbing with chakra control.',
-        'ramen': 'Serve ramen to hungry ninja customers.',
-        'roof': 'Run endlessly across village rooftops.',
-        'hand': 'Learn and memorize ninja hand signs.',
-        'shadow': 'Test your reflexes with shadow clone training.',
-        'sharingan': 'Train your Sharingan to spot the differences.',
-        'whack': 'Test your speed with shadow clone whack-a-mole.'
+def run_game_file(game_file_path, timeout, warm_pool=None, **launcher_options):
+    """
+    Run a game through GameLauncher in a single child process (or warm worker).
+    
+    launcher_options are passed to GameLauncher (max_output_chars, stop_on_score).
+    Returns the launcher result dict ('score', plus 'telemetry' when the game
+    reported over the score channel).
+    """
+    launcher = GameLauncher(game_file_path, timeout=timeout, warm_pool=warm_pool, **launcher_options)
+    result = launcher.launch_game()
+    if result.get('timed_out'):
+        raise subprocess.TimeoutExpired(game_file_path, timeout)
+    if not result['success']:
+        raise RuntimeError(result.get('error', 'Unknown error'))
+    return result
+
+def enqueue_game_launch(game_name, game_file_path, resolve_game_id, redirect_url):
+    """
+    Queue a game launch on the launch worker pool and respond immediately.
+    
+    AJAX callers get a 202 with the job id and status URL; browsers are
+    redirected to redirect_url, which polls the job via ?job=<id>.
+    If the launch queue is full the launch is rejected (429 for AJAX).
+    resolve_game_id is called on the worker (inside an app context) to find
+    the games_tb id the captured score should be saved against.
+    """
+    app = current_app._get_current_object()
+    user_id = session['user_id']
+    timeout = app.config.get('GAME_TIMEOUT_SECONDS', 300)
+    launcher_options = {
+        'max_output_chars': app.config.get('LAUNCH_MAX_OUTPUT_CHARS', 65536),
+        'stop_on_score': app.config.get('LAUNCH_STOP_ON_SCORE', False)
     }
     
-    title_lower = title.lower()
-    filename_lower = filename.lower()
+    def run():
+        with app.app_context():
+            warm_pool = get_warm_pool()
+        return run_game_file(game_file_path, timeout, warm_pool, **launcher_options)
     
-    for keyword, desc in descriptions.items():
-        if keyword in title_lower or keyword in filename_lower:
-            return desc
+    def on_finish(job):
+        if job.status == TIMED_OUT:
+            job.message = f'Game timed out after {timeout // 60} minutes.'
+            return
+        if job.status != COMPLETED:
+            return
+        if not job.score or job.score <= 0:
+            job.message = 'Game completed but no valid score was captured.'
+            return
+        with app.app_context():
+            from MyFlaskapp.db import submit_score as db_submit_score
+            game_db_id = resolve_game_id()
+            if game_db_id and db_submit_score(user_id, game_db_id, job.score):
+                job.score_saved = True
+                job.message = f'Game completed! Score: {job.score}'
+            else:
+                job.message = f'Game completed! Score: {job.score} (Note: Score not saved to leaderboard)'
     
-    # Default description if no keywords match
-    return f'Experience the ninja world in {title}.'
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    queue = get_launch_queue()
+    try:
+        job = queue.submit(user_id, game_name, run, on_finish)
+    except LaunchQueueFull as e:
+        if is_ajax:
+            response = jsonify({'success': False, 'message': str(e)})
+            response.headers['Retry-After'] = str(app.config.get('LAUNCH_RETRY_AFTER_SECONDS', 30))
+            return response, 429
+        flash(str(e), 'warning')
+        return redirect(redirect_url)
+    
+    if is_ajax:
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'queue_position': queue.position(job),
+            'status_url': url_for('games.launch_job_status', job_id=job.id)
+        }), 202
+    
+    flash(f'{game_name} is launching. Your score will be recorded when the game ends.', 'info')
+    separator = '&' if '?' in redirect_url else '?'
+    return redirect(f'{redirect_url}{separator}job={job.id}')
 
 @games_bp.route('/')
 @login_required
@@ -183,33 +185,28 @@ def games_list():
     games = scan_games_directory()
     
     # Try to get top scores from database for games that exist in database
-    conn = get_db_connection()
+    conn = get_db()
     if conn:
         cursor = conn.cursor(dictionary=True)
-        from MyFlaskapp.db import get_top_scores_for_game
+        from MyFlaskapp.db import get_top_scores_for_games
         
         # Create a mapping of game filenames to database game IDs
-        cursor.execute("SELECT * FROM games_tb")
+        cursor.execute("SELECT id, file_path FROM games_tb")
         db_games = cursor.fetchall()
-        game_mapping = {game['file_path']: game for game in db_games}
+        game_mapping = {game['file_path']: game['id'] for game in db_games}
         
-        # Add top scores for games that exist in database
         for game in games:
             if game['file_path'] in game_mapping:
-                db_game = game_mapping[game['file_path']]
-                game['db_id'] = db_game['id']
-                game['top_scores'] = get_top_scores_for_game(db_game['id'], 3)
+                game['db_id'] = game_mapping[game['file_path']]
             else:
                 # Try to create database entry for scanned games
-                game_db_id = get_or_create_game_in_db(game)
-                if game_db_id:
-                    game['db_id'] = game_db_id
-                    game['top_scores'] = get_top_scores_for_game(game_db_id, 3)
-                else:
-                    game['db_id'] = None
-                    game['top_scores'] = []
+                game['db_id'] = get_or_create_game_in_db(game)
         
-        conn.close()
+        # Fetch top scores for every game in a single query
+        db_ids = [game['db_id'] for game in games if game['db_id']]
+        top_scores = get_top_scores_for_games(db_ids, 3) if db_ids else {}
+        for game in games:
+            game['top_scores'] = top_scores.get(game['db_id'], [])
     else:
         # If no database connection, set empty top scores
         for game in games:
@@ -228,13 +225,7 @@ def play_game_by_filename(game_filename):
         flash('Access to this game has been restricted by the administrator.', 'danger')
         return redirect(url_for('games.games_list'))
     
-    games = scan_games_directory()
-    game = None
-    
-    for g in games:
-        if g['filename'] == game_filename:
-            game = g
-            break
+    game = get_game_by_filename(game_filename)
     
     if not game:
         flash('Game not found.', 'danger')
@@ -246,78 +237,36 @@ def play_game_by_filename(game_filename):
 @login_required
 @user_role_required
 def launch_game_by_filename(game_filename):
-    """Launch game using filename and capture score automatically."""
+    """Queue a launch of a directory-scanned game; the score is captured when it finishes."""
     # Check user access to this game
     if not check_game_access(session['user_id'], game_filename):
         flash('Access to this game has been restricted by the administrator.', 'danger')
         return redirect(url_for('games.games_list'))
     
-    games = scan_games_directory()
-    game = None
-    
-    for g in games:
-        if g['filename'] == game_filename:
-            game = g
-            break
+    game = get_game_by_filename(game_filename)
     
     if not game:
         flash('Game not found.', 'danger')
         return redirect(url_for('games.games_list'))
     
-    try:
-        # Get the full game file path
-        game_file_path = os.path.join(os.path.dirname(__file__), game_filename)
-        
-        # Validate game file exists
-        if not os.path.exists(game_file_path):
-            flash('Game file not found.', 'danger')
-            return redirect(url_for('games.games_list'))
-        
-        # Get the launcher script path
-        launcher_path = os.path.join(os.path.dirname(__file__), 'game_launcher.py')
-        
-        # Execute the game using the launcher
-        launcher_result = subprocess.run(
-            [sys.executable, launcher_path, game_file_path],
-            capture_output=True,
-            text=True,
-            timeout=current_app.config.get('GAME_TIMEOUT_SECONDS', 300),
-            cwd=os.path.dirname(game_file_path),
-            shell=False
-        )
-        
-        # Extract score from launcher output
-        score = safe_int_convert(launcher_result.stdout)
-        
-        # Try to submit score if game exists in database
-        if score > 0:
-            user_id = session['user_id']
-            from MyFlaskapp.db import submit_score as db_submit_score
-            
-            # If game has db_id, use it directly
-            if game.get('db_id'):
-                if db_submit_score(user_id, game['db_id'], score):
-                    flash(f'Game completed! Score: {score}', 'success')
-                else:
-                    flash('Failed to submit score.', 'danger')
-            else:
-                # Try to find or create game in database by filename
-                game_db_id = get_or_create_game_in_db(game)
-                if game_db_id and db_submit_score(user_id, game_db_id, score):
-                    flash(f'Game completed! Score: {score}', 'success')
-                else:
-                    flash(f'Game completed! Score: {score} (Note: Score not saved to leaderboard)', 'warning')
-        else:
-            flash('Game completed but no valid score was captured.', 'warning')
-            
-    except subprocess.TimeoutExpired:
-        flash('Game timed out after 5 minutes.', 'danger')
-    except subprocess.CalledProcessError as e:
-        flash(f'Game execution failed: {str(e)}', 'danger')
-    except Exception as e:
-        flash(f'Error launching game: {str(e)}', 'danger')
+    # Get the full game file path
+    game_file_path = os.path.join(os.path.dirname(__file__), game_filename)
     
-    return redirect(url_for('games.games_list'))
+    # Validate game file exists
+    if not os.path.exists(game_file_path):
+        flash('Game file not found.', 'danger')
+        return redirect(url_for('games.games_list'))
+    
+    def resolve_game_id():
+        # If game has db_id, use it directly, otherwise find or create it by filename
+        return game.get('db_id') or get_or_create_game_in_db(game)
+    
+    return enqueue_game_launch(
+        game['name'],
+        game_file_path,
+        resolve_game_id,
+        url_for('games.play_game_by_filename', game_filename=game_filename)
+    )
 
 @games_bp.route('/play/<int:game_id>')
 @login_required
@@ -340,7 +289,7 @@ def play_game(game_id):
 @login_required
 @user_role_required
 def launch_game(game_id):
-    """Launch game using the desktop launcher and capture score automatically."""
+    """Queue a launch through the desktop launcher; the score is captured when it finishes."""
     conn = get_db_connection()
     game = None
     if conn:
@@ -353,67 +302,38 @@ def launch_game(game_id):
         flash('Game not found.', 'danger')
         return redirect(url_for('games.games_list'))
     
-    try:
-        # Get the game file path
-        game_file_path = game.get('file_path', '')
-        if not game_file_path:
-            flash('Game file not specified.', 'danger')
-            return redirect(url_for('games.games_list'))
-        
-        # Validate game file path for security
-        from MyFlaskapp.security_utils import validate_game_file_path
-        # Extract just the filename if path includes 'games/' prefix
-        if game_file_path.startswith('games/'):
-            relative_path = game_file_path[6:]  # Remove 'games/' prefix
-        else:
-            relative_path = game_file_path
-        is_valid, result = validate_game_file_path(relative_path)
-        if not is_valid:
-            flash(f'Invalid game file: {result}', 'danger')
-            return redirect(url_for('games.games_list'))
-        
-        full_path = result  # validated path
-        
-        # Get the launcher script path
-        launcher_path = os.path.join(os.path.dirname(__file__), 'game_launcher.py')
-        
-        # Execute the game using the launcher
-        launcher_result = subprocess.run(
-            [sys.executable, launcher_path, full_path],
-            capture_output=True,
-            text=True,
-            timeout=current_app.config.get('GAME_TIMEOUT_SECONDS', 300),
-            cwd=os.path.dirname(full_path),
-            shell=False
-        )
-        
-        # Extract score from launcher output
-        score = safe_int_convert(launcher_result.stdout)
-        
-        if score > 0:
-            user_id = session['user_id']
-            from MyFlaskapp.db import submit_score as db_submit_score
-            if db_submit_score(user_id, game_id, score):
-                flash(f'Game completed! Score: {score}', 'success')
-            else:
-                flash('Failed to submit score.', 'danger')
-        else:
-            flash('Game completed but no valid score was captured.', 'warning')
-            
-    except subprocess.TimeoutExpired:
-        flash('Game timed out after 5 minutes.', 'danger')
-    except subprocess.CalledProcessError as e:
-        flash(f'Game execution failed: {str(e)}', 'danger')
-    except Exception as e:
-        flash(f'Error launching game: {str(e)}', 'danger')
+    # Get the game file path
+    game_file_path = game.get('file_path', '')
+    if not game_file_path:
+        flash('Game file not specified.', 'danger')
+        return redirect(url_for('games.games_list'))
     
-    return redirect(url_for('games.games_list'))
+    # Validate game file path for security
+    from MyFlaskapp.security_utils import validate_game_file_path
+    # Extract just the filename if path includes 'games/' prefix
+    if game_file_path.startswith('games/'):
+        relative_path = game_file_path[6:]  # Remove 'games/' prefix
+    else:
+        relative_path = game_file_path
+    is_valid, result = validate_game_file_path(relative_path)
+    if not is_valid:
+        flash(f'Invalid game file: {result}', 'danger')
+        return redirect(url_for('games.games_list'))
+    
+    full_path = result  # validated path
+    
+    return enqueue_game_launch(
+        game['name'],
+        full_path,
+        lambda: game_id,
+        url_for('games.games_list')
+    )
 
 @games_bp.route('/run_game/<int:game_id>')
 @login_required
 @user_role_required
 def run_game(game_id):
-    """Execute game as subprocess and capture score (legacy method for console games)."""
+    """Queue a game run (legacy route for console games)."""
     conn = get_db_connection()
     game = None
     if conn:
@@ -426,53 +346,36 @@ def run_game(game_id):
         flash('Game not found.', 'danger')
         return redirect(url_for('games.games_list'))
     
-    try:
-        # Get the game file path
-        game_file_path = game.get('file_path', '')
-        if not game_file_path:
-            flash('Game file not specified.', 'danger')
-            return redirect(url_for('games.games_list'))
-        
-        # Validate game file path for security
-        from MyFlaskapp.security_utils import validate_game_file_path
-        is_valid, result = validate_game_file_path(game_file_path)
-        if not is_valid:
-            flash(f'Invalid game file: {result}', 'danger')
-            return redirect(url_for('games.games_list'))
-        
-        full_path = result  # validated path
-        
-        # Execute the game as subprocess with additional security
-        result = subprocess.run(
-            [sys.executable, full_path],
-            capture_output=True,
-            text=True,
-            timeout=current_app.config.get('GAME_TIMEOUT_SECONDS', 300),
-            cwd=os.path.dirname(full_path),  # Run in game directory
-            shell=False  # Prevent shell injection
-        )
-        
-        # Safely extract score from stdout
-        score = safe_int_convert(result.stdout)
-        
-        if score > 0:
-            user_id = session['user_id']
-            from MyFlaskapp.db import submit_score as db_submit_score
-            if db_submit_score(user_id, game_id, score):
-                flash(f'Game completed! Score: {score}', 'success')
-            else:
-                flash('Failed to submit score.', 'danger')
-        else:
-            flash('Game completed but no valid score was returned.', 'warning')
-            
-    except subprocess.TimeoutExpired:
-        flash('Game timed out after 5 minutes.', 'danger')
-    except subprocess.CalledProcessError as e:
-        flash(f'Game execution failed: {str(e)}', 'danger')
-    except Exception as e:
-        flash(f'Error running game: {str(e)}', 'danger')
+    # Get the game file path
+    game_file_path = game.get('file_path', '')
+    if not game_file_path:
+        flash('Game file not specified.', 'danger')
+        return redirect(url_for('games.games_list'))
     
-    return redirect(url_for('games.games_list'))
+    # Validate game file path for security
+    from MyFlaskapp.security_utils import validate_game_file_path
+    is_valid, result = validate_game_file_path(game_file_path)
+    if not is_valid:
+        flash(f'Invalid game file: {result}', 'danger')
+        return redirect(url_for('games.games_list'))
+    
+    full_path = result  # validated path
+    
+    return enqueue_game_launch(
+        game['name'],
+        full_path,
+        lambda: game_id,
+        url_for('games.games_list')
+    )
+
+@games_bp.route('/jobs/<job_id>')
+@login_required
+def launch_job_status(job_id):
+    """Report the progress and captured score of a queued game launch."""
+    status = get_launch_queue().status(job_id, session['user_id'])
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status)
 
 @games_bp.route('/submit_score/<int:game_id>', methods=['POST'])
 @login_required
@@ -496,12 +399,7 @@ def submit_score_by_filename(game_filename):
     user_id = session['user_id']
     
     # Get or create game in database to get the ID
-    games = scan_games_directory()
-    game = None
-    for g in games:
-        if g['filename'] == game_filename:
-            game = g
-            break
+    game = get_game_by_filename(game_filename)
     
     if not game:
         flash('Game not found.', 'danger')
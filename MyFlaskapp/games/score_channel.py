@@ -0,0 +1,139 @@
+"""
+Score Channel - structured score reporting from a game to its launcher.
+
+The launcher opens a pipe and passes the write end to the game through the
+GAME_SCORE_FD environment variable. The game writes one JSON object per
+line:
+
+    {"type": "start", "title": "...", "time": ...}
+    {"type": "event", "name": "...", "time": ..., ...}
+    {"type": "score", "score": 120, "duration": 42.5, "frames": 2550, "time": ...}
+
+The launcher reads the pipe on a background thread as lines arrive, so it
+never has to buffer or regex-scan the game's stdout to find the score.
+Games started without a channel (or on Windows, where fds are not
+inherited) fall back to printing FINAL_SCORE:<n>.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+SCORE_FD_ENV = 'GAME_SCORE_FD'
+
+# Longest line the reader accepts; longer lines are dropped
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class ScoreChannel:
+    """Writer side, used by games (see GameBase)."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    @classmethod
+    def from_environment(cls):
+        """Open the channel passed in by the launcher, or return None if there is none."""
+        fd = os.environ.get(SCORE_FD_ENV)
+        if not fd:
+            return None
+        try:
+            # Duplicate the fd so closing the channel never closes the launcher's copy
+            return cls(os.fdopen(os.dup(int(fd)), 'w', encoding='utf-8', buffering=1))
+        except (OSError, ValueError):
+            return None
+
+    def send(self, message_type, **fields):
+        """Write one message; a broken channel is closed rather than crashing the game."""
+        if self._stream is None:
+            return
+        fields.update(type=message_type, time=time.time())
+        try:
+            self._stream.write(json.dumps(fields) + '\n')
+        except (OSError, TypeError, ValueError):
+            self.close()
+
+    def close(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except OSError:
+                pass
+            self._stream = None
+
+
+class ScoreReader:
+    """
+    Reader side, used by the launcher. Consumes messages on a background thread.
+
+    Args:
+        fd: Read end of the score pipe (owned and closed by the reader)
+        max_events: Number of most recent events kept
+    """
+
+    def __init__(self, fd, max_events=50):
+        self.score = None
+        self.duration = None
+        self.frames = None
+        self.events = deque(maxlen=max_events)
+        self._stream = os.fdopen(fd, 'r', encoding='utf-8', errors='replace')
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        with self._stream:
+            while True:
+                line = self._stream.readline(MAX_LINE_LENGTH)
+                if not line:
+                    break
+                if not line.endswith('\n') and len(line) >= MAX_LINE_LENGTH:
+                    self._skip_rest_of_line()
+                    continue
+                self._handle(line)
+
+    def _skip_rest_of_line(self):
+        while True:
+            chunk = self._stream.readline(MAX_LINE_LENGTH)
+            if not chunk or chunk.endswith('\n'):
+                return
+
+    def _handle(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+        if message.get('type') == 'score' and isinstance(message.get('score'), int):
+            self.score = message['score']
+            self.duration = message.get('duration')
+            self.frames = message.get('frames')
+        elif message.get('type') == 'event':
+            self.events.append(message)
+
+    def wait(self, timeout=None):
+        """Wait for the game to close its end of the pipe."""
+        self._thread.join(timeout)
+
+    def telemetry(self):
+        return {
+            'duration': self.duration,
+            'frames': self.frames,
+            'events': list(self.events)
+        }
+
+
+def open_score_pipe():
+    """
+    Create a score pipe for a game about to be launched.
+
+    Returns (reader, write_fd), or (None, None) where fds cannot be passed
+    to a child process. The caller must close write_fd once the game has
+    been started (or has finished, for in-process runs).
+    """
+    if os.name != 'posix':
+        return None, None
+    read_fd, write_fd = os.pipe()
+    return ScoreReader(read_fd), write_fd
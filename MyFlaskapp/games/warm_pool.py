@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Warm Interpreter Pool - runs games on pre-started Python worker processes.
+
+A cold launch pays interpreter startup plus the tkinter/pygame imports for
+every game. Pool workers are started ahead of time with game_base, tkinter
+and pygame already imported; a launch sends the game path to an idle worker,
+which runs it as __main__ and replies with the captured score. Workers are
+recycled after max_runs games so state leaked by one game cannot pile up.
+
+This file is also the worker entry point:
+    python warm_pool.py --worker <games_dir>
+Workers speak JSON lines: one {"path": ...} request per line on stdin, one
+result per line on the original stdout. The game's own stdout/stderr go to
+pipes drained into bounded tails, so a game printing to the console can
+neither corrupt replies nor fill memory or disk.
+Each run also gets its own score channel (see score_channel.py), so GameBase
+games report their score and telemetry structurally.
+"""
+
+import importlib
+import json
+import os
+import queue
+import runpy
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+# Modules every game needs; imported once per worker instead of once per launch
+PRELOAD_MODULES = ('tkinter', 'pygame', 'game_base')
+
+
+class _Worker:
+    """Handle on one worker process, owned by the pool."""
+
+    def __init__(self, games_dir, python):
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+        self.process = subprocess.Popen(
+            [python, WORKER_SCRIPT, '--worker', games_dir],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=games_dir,
+            env=env,
+            text=True,
+            bufsize=1,
+            shell=False
+        )
+        self.runs = 0
+        self._ready = False
+        self._messages = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            try:
+                self._messages.put(json.loads(line))
+            except ValueError:
+                continue
+        self._messages.put(None)  # EOF: the worker exited
+
+    def _receive(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise queue.Empty
+        message = self._messages.get(timeout=remaining)
+        if message is None:
+            raise RuntimeError('Launcher worker exited unexpectedly')
+        return message
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def wait_ready(self, timeout):
+        """Block until the worker has finished importing the preloaded modules."""
+        if not self._ready:
+            self._receive(time.monotonic() + timeout)
+            self._ready = True
+
+    def run(self, game_file_path, timeout, max_output_chars, stop_on_score=False):
+        """Run one game on this worker and return its result dict."""
+        deadline = time.monotonic() + timeout
+        if not self._ready:
+            self._receive(deadline)
+            self._ready = True
+        request = {'path': game_file_path, 'max_output_chars': max_output_chars, 'stop_on_score': stop_on_score}
+        self.process.stdin.write(json.dumps(request) + '\n')
+        self.process.stdin.flush()
+        self.runs += 1
+        return self._receive(deadline)
+
+    def stop(self):
+        """Ask the worker to exit once it is idle (EOF on stdin)."""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
+class WarmInterpreterPool:
+    """
+    Pool of pre-started worker processes that run games.
+
+    Args:
+        games_dir: Directory containing the game modules (workers run from here)
+        size: Number of idle workers kept warm
+        max_runs: Games a worker runs before it is replaced with a fresh one
+        max_output_chars: Characters of each output stream sent back per run
+        python: Interpreter used for the workers
+    """
+
+    def __init__(self, games_dir, size=2, max_runs=20, max_output_chars=65536, python=sys.executable):
+        self.games_dir = games_dir
+        self.size = size
+        self.max_runs = max_runs
+        self.max_output_chars = max_output_chars
+        self.python = python
+        self._idle = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start enough workers to fill the pool."""
+        self._replenish()
+
+    def _replenish(self):
+        with self._lock:
+            while not self._closed and len(self._idle) < self.size:
+                self._idle.append(_Worker(self.games_dir, self.python))
+
+    def _checkout(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop(0)
+                if worker.alive:
+                    return worker
+        # Every warm worker is busy: fall back to a fresh one rather than waiting
+        return _Worker(self.games_dir, self.python)
+
+    def _checkin(self, worker):
+        with self._lock:
+            keep = (not self._closed and worker.alive and worker.runs < self.max_runs
+                    and len(self._idle) < self.size)
+            if keep:
+                self._idle.append(worker)
+        if not keep:
+            worker.stop()
+        self._replenish()
+
+    def run_game(self, game_file_path, timeout=300, stop_on_score=False):
+        """
+        Run a game on a warm worker and return its result.
+
+        Returns the same shape as GameLauncher.launch_game:
+        {'success', 'score', 'telemetry', 'stdout', 'stderr', 'returncode'}.
+        With stop_on_score the run ends at the game's first FINAL_SCORE marker;
+        the worker exits to stop the game ('stopped_on_score' is set in the
+        result) and a fresh one takes its place.
+
+        Raises:
+            subprocess.TimeoutExpired: If the game runs longer than timeout seconds
+        """
+        game_file_path = os.path.abspath(game_file_path)
+        worker = self._checkout()
+        try:
+            result = worker.run(game_file_path, timeout, self.max_output_chars, stop_on_score)
+        except queue.Empty:
+            worker.kill()
+            self._replenish()
+            raise subprocess.TimeoutExpired([self.python, game_file_path], timeout)
+        except Exception:
+            worker.kill()
+            self._replenish()
+            raise
+        if result.get('stopped_on_score'):
+            worker.kill()  # already exiting; reap it and warm a replacement
+            self._replenish()
+        else:
+            self._checkin(worker)
+        return result
+
+    def wait_ready(self, timeout=30):
+        """Block until every idle worker has finished warming up."""
+        with self._lock:
+            workers = list(self._idle)
+        for worker in workers:
+            worker.wait_ready(timeout)
+
+    def status(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'max_runs': self.max_runs
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.stop()
+
+
+_POOL_LOCK = threading.Lock()
+
+
+def get_warm_pool():
+    """Return the app's warm pool (None when disabled), starting it on first use."""
+    from flask import current_app
+    if 'warm_pool' not in current_app.extensions:
+        with _POOL_LOCK:
+            if 'warm_pool' not in current_app.extensions:
+                pool = None
+                size = current_app.config.get('LAUNCH_WARM_POOL_SIZE', 2)
+                if size > 0:
+                    pool = WarmInterpreterPool(
+                        os.path.dirname(WORKER_SCRIPT),
+                        size=size,
+                        max_runs=current_app.config.get('LAUNCH_WARM_POOL_MAX_RUNS', 20),
+                        max_output_chars=current_app.config.get('LAUNCH_MAX_OUTPUT_CHARS', 65536)
+                    )
+                    pool.start()
+                current_app.extensions['warm_pool'] = pool
+    return current_app.extensions['warm_pool']
+
+
+def _run_request(game_file_path, max_output_chars=65536, stop_on_score=False, reply=None):
+    """
+    Run one game as __main__ in this worker, streaming its output at the fd level.
+
+    The game's stdout/stderr are pipes read on background threads into bounded
+    tails, so memory stays capped however much it prints. With stop_on_score,
+    the first FINAL_SCORE marker ends the run: the game holds the main thread
+    and cannot be interrupted safely, so the reader thread sends the result
+    through reply and exits the worker, and the pool replaces it.
+    """
+    from game_launcher import FINAL_SCORE_PATTERN, GameLauncher, OutputTail
+    from score_channel import SCORE_FD_ENV, open_score_pipe
+
+    reader, write_fd = open_score_pipe()
+    if reader is not None:
+        os.environ[SCORE_FD_ENV] = str(write_fd)
+    stdout = OutputTail(max_output_chars)
+    stderr = OutputTail(max_output_chars)
+    marker = {}
+    finished = threading.Lock()  # held once the game has returned; an early stop is then too late
+
+    def on_stdout(chunk):
+        match = FINAL_SCORE_PATTERN.search(chunk)
+        if not match or 'score' in marker:
+            return
+        marker['score'] = int(match.group(1))
+        if stop_on_score and reply is not None and finished.acquire(blocking=False):
+            if reader is not None and reader.score is not None:
+                score, telemetry = reader.score, reader.telemetry()
+            else:
+                score, telemetry = marker['score'], None
+            reply({
+                'success': True,
+                'score': score,
+                'telemetry': telemetry,
+                'stdout': stdout.text(),
+                'stderr': stderr.text(),
+                'output_truncated': stdout.truncated or stderr.truncated,
+                'returncode': None,
+                'stopped_on_score': True
+            })
+            os._exit(0)
+
+    returncode = 0
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+    pumps = []
+    for fd, tail, on_chunk in ((1, stdout, on_stdout), (2, stderr, None)):
+        read_fd, pipe_fd = os.pipe()
+        os.dup2(pipe_fd, fd)
+        os.close(pipe_fd)
+        stream = os.fdopen(read_fd, 'r', encoding='utf-8', errors='replace')
+        pump = threading.Thread(target=GameLauncher._pump, args=(stream, tail, on_chunk), daemon=True)
+        pump.start()
+        pumps.append(pump)
+    saved_argv = sys.argv
+    sys.argv = [game_file_path]
+    try:
+        runpy.run_path(game_file_path, run_name='__main__')
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            returncode = e.code or 0
+        else:
+            returncode = 1
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        if reader is not None:
+            os.environ.pop(SCORE_FD_ENV, None)
+            os.close(write_fd)
+        sys.argv = saved_argv
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Restoring fds 1 and 2 closes the pipes' write ends, so the pumps see EOF
+        os.dup2(saved_stdout, 1)
+        os.dup2(saved_stderr, 2)
+        os.close(saved_stdout)
+        os.close(saved_stderr)
+    finished.acquire()
+    for pump in pumps:
+        pump.join(timeout=1)
+
+    score, telemetry = GameLauncher(game_file_path).collect_score(reader, stdout.text(), marker.get('score'))
+    return {
+        'success': True,
+        'score': score,
+        'telemetry': telemetry,
+        'stdout': stdout.text(),
+        'stderr': stderr.text(),
+        'output_truncated': stdout.truncated or stderr.truncated,
+        'returncode': returncode
+    }
+
+
+def _worker_main(games_dir):
+    # Keep the real stdout for replies; anything else printed to fd 1 is discarded
+    replies = os.fdopen(os.dup(1), 'w', buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    os.chdir(games_dir)
+    if games_dir not in sys.path:
+        sys.path.insert(0, games_dir)
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass  # e.g. no display or pygame not installed; the game will report it
+
+    def reply(message):
+        replies.write(json.dumps(message) + '\n')
+        replies.flush()
+
+    reply({'ready': True, 'pid': os.getpid()})
+    for line in sys.stdin:
+        try:
+            request = json.loads(line)
+            result = _run_request(
+                request['path'],
+                request.get('max_output_chars', 65536),
+                request.get('stop_on_score', False),
+                reply
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'score': 0}
+        reply(result)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != '--worker':
+        print("Usage: python warm_pool.py --worker <games_dir>", file=sys.stderr)
+        sys.exit(1)
+    _worker_main(sys.argv[2])
@@ -1,7 +1,16 @@
-from flask import render_template, session, redirect, url_for, jsonify, request
+from flask import render_template, session, redirect, url_for, jsonify, request, Response, current_app
 from functools import wraps
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import json
+import time
 from . import leaderboard_bp
-from MyFlaskapp.db import get_db_connection, get_all_scores_for_game
+from MyFlaskapp.rate_limiter import api_rate_limit
+from MyFlaskapp.score_events import SCORE, get_score_events
+from MyFlaskapp.score_periods import PERIODS, period_start, next_period_start, is_closed
+from MyFlaskapp.db import (get_db, get_scores_page_for_game, get_user_scores_page, get_best_scores_page,
+                           get_period_scores_page, get_period_player_best, get_player_rank,
+                           get_score_index, get_score_version, get_database_today)
 
 def login_required(f):
     @wraps(f)
@@ -11,12 +20,118 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def _leaderboard_version(game_id=None, closed_period=None):
+    """
+    ETag and Last-Modified for a leaderboard API response, or (None, None) if the
+    version is unknown. The ETag covers the game's score version (shared by every
+    worker), when this worker's ranked index of the game was loaded, and everything
+    else the response depends on (viewer, view, page).
+    
+    A closed (period, start) never changes, so its ETag does not depend on the version.
+    """
+    viewer = f"{session.get('user_id')}:{request.query_string.decode()}"
+    if closed_period:
+        period, start = closed_period
+        raw = f"closed:{game_id}:{viewer}"
+        modified = datetime.combine(next_period_start(period, start), datetime.min.time(), timezone.utc)
+        return hashlib.sha1(raw.encode()).hexdigest()[:20], modified
+    version, modified = get_score_version(game_id)
+    if version is None:
+        return None, None
+    loaded_at = get_score_index().loaded_at(game_id) if game_id is not None else None
+    raw = f"{game_id}:{version}:{loaded_at}:{viewer}"
+    modified = datetime.fromtimestamp(int(modified), timezone.utc) if modified else None
+    return hashlib.sha1(raw.encode()).hexdigest()[:20], modified
+
+def _conditional(response, etag, modified, immutable=False):
+    """
+    Tag a response for revalidation; browsers resend the ETag on the next poll.
+    Immutable responses (closed periods) may be cached without revalidating.
+    """
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    response.last_modified = modified
+    response.cache_control.private = True
+    if immutable:
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+def _not_modified(etag, modified, immutable=False):
+    """Return a 304 response if the client already has this version, else None."""
+    if etag is not None and etag in request.if_none_match:
+        return _conditional(Response(status=304), etag, modified, immutable)
+    return None
+
+def _period_args():
+    """
+    Parse the time window from the query string: period is 'daily', 'weekly' or
+    'monthly' and start any day in it (default today). Returns (None, None) for
+    the all-time board.
+    """
+    period = request.args.get('period')
+    if period not in PERIODS:
+        return None, None
+    try:
+        day = date.fromisoformat(request.args.get('start', ''))
+    except ValueError:
+        day = get_database_today()
+    return period, period_start(period, day)
+
+def _is_closed(period, start):
+    """
+    True once the period has ended on the database's clock, which buckets the
+    scores. Closed periods are served as immutable, so they are only treated
+    as closed once LEADERBOARD_PERIOD_CLOSE_GRACE_SECONDS have passed, letting
+    scores submitted just before midnight land first.
+    """
+    if not period:
+        return False
+    grace = current_app.config.get('LEADERBOARD_PERIOD_CLOSE_GRACE_SECONDS', 300)
+    return is_closed(period, start, get_database_today(lag_seconds=grace))
+
+def _page_args():
+    """
+    Parse the keyset cursor and page size from the query string.
+    
+    The cursor ('after') is '<score>:<leaderboard_id>:<rank>' for the last row of
+    the previous page; a malformed cursor starts from the first page. Returns
+    (after, rank of that row, limit).
+    """
+    limit = request.args.get('limit', current_app.config.get('LEADERBOARD_PAGE_SIZE', 50), type=int)
+    limit = max(1, min(limit, current_app.config.get('LEADERBOARD_MAX_PAGE_SIZE', 200)))
+    try:
+        score, leaderboard_id, rank = (int(part) for part in request.args.get('after', '').split(':'))
+    except ValueError:
+        return None, 0, limit
+    return (score, leaderboard_id), rank, limit
+
+def _next_cursor(rows, has_more):
+    """Cursor for the page after rows, or None on the last page."""
+    if not has_more or not rows:
+        return None
+    last = rows[-1]
+    return f"{last['score']}:{last['leaderboard_id']}:{last['rank']}"
+
+def _numbered(page, rank):
+    # Number a (rows, has_more) page fetched from MySQL on from the cursor's rank
+    rows, has_more = page
+    for offset, row in enumerate(rows, rank + 1):
+        row['rank'] = offset
+    return rows, has_more
+
 @leaderboard_bp.route('/')
 @login_required
 def leaderboard():
     view_type = request.args.get('view', 'personal')  # 'personal' or 'global'
-    conn = get_db_connection()
+    after, rank, limit = _page_args()
+    conn = get_db()
     user_scores = []
+    user_has_more = False
     global_scores = []
     
     if conn:
@@ -28,17 +143,11 @@ def leaderboard():
         user_result = cursor.fetchone()
         user_db_id = user_result['id'] if user_result else None
         
-        # Get user's own scores
+        # Get one page of the user's own scores
         if user_db_id:
-            cursor.execute("""
-                SELECT l.score, g.name as game_name, u.username, l.created_at as date_played
-                FROM scores_tb l
-                JOIN games_tb g ON l.game_id = g.id
-                JOIN user_tb u ON l.user_id = u.id
-                WHERE l.user_id = %s
-                ORDER BY l.score DESC
-            """, (user_db_id,))
-            user_scores = cursor.fetchall()
+            user_scores, user_has_more = _numbered(get_user_scores_page(
+                user_db_id, after if view_type == 'personal' else None, limit),
+                rank if view_type == 'personal' else 0)
         
         # Get global scores (all users)
         cursor.execute("""
@@ -52,22 +161,31 @@ def leaderboard():
         global_scores = cursor.fetchall()
         
         print(f"DEBUG: User scores: {len(user_scores)}, Global scores: {len(global_scores)}")
-        conn.close()
     else:
         print("DEBUG: Failed to connect to database")
     
     return render_template('leaderboard/leaderboard.html', 
                          user_scores=user_scores, 
                          global_scores=global_scores, 
-                         view_type=view_type)
+                         view_type=view_type,
+                         after=request.args.get('after') if after else None,
+                         page_size=limit,
+                         user_next_cursor=_next_cursor(user_scores, user_has_more))
 
 @leaderboard_bp.route('/api/data')
 @login_required
+@api_rate_limit()
 def leaderboard_api():
     """API endpoint for real-time leaderboard data"""
     view_type = request.args.get('view', 'personal')  # 'personal' or 'global'
-    conn = get_db_connection()
+    etag, modified = _leaderboard_version()
+    not_modified = _not_modified(etag, modified)
+    if not_modified:
+        return not_modified
+    after, rank, limit = _page_args()
+    conn = get_db()
     user_scores = []
+    user_has_more = False
     global_scores = []
     
     if conn:
@@ -79,17 +197,11 @@ def leaderboard_api():
         user_result = cursor.fetchone()
         user_db_id = user_result['id'] if user_result else None
         
-        # Get user's own scores
+        # Get one page of the user's own scores
         if user_db_id:
-            cursor.execute("""
-                SELECT l.score, g.name as game_name, u.username, l.created_at as date_played
-                FROM scores_tb l
-                JOIN games_tb g ON l.game_id = g.id
-                JOIN user_tb u ON l.user_id = u.id
-                WHERE l.user_id = %s
-                ORDER BY l.score DESC
-            """, (user_db_id,))
-            user_scores = cursor.fetchall()
+            user_scores, user_has_more = _numbered(get_user_scores_page(
+                user_db_id, after if view_type == 'personal' else None, limit),
+                rank if view_type == 'personal' else 0)
         
         # Get global scores (all users)
         cursor.execute("""
@@ -101,7 +213,6 @@ def leaderboard_api():
             LIMIT 50
         """)
         global_scores = cursor.fetchall()
-        conn.close()
     
     # Convert datetime objects to strings for JSON serialization
     for score in user_scores:
@@ -112,21 +223,27 @@ def leaderboard_api():
         if score.get('date_played'):
             score['date_played'] = score['date_played'].strftime('%Y-%m-%d %H:%M:%S')
     
-    return jsonify({
+    return _conditional(jsonify({
         'user_scores': user_scores,
         'global_scores': global_scores,
+        'user_next_cursor': _next_cursor(user_scores, user_has_more),
         'view_type': view_type
-    })
+    }), etag, modified)
 
 @leaderboard_bp.route('/game/<int:game_id>')
 @login_required
 def game_leaderboard(game_id):
     """Display leaderboard for a specific game"""
     view_type = request.args.get('view', 'personal')  # 'personal' or 'global'
-    conn = get_db_connection()
+    mode = 'best' if request.args.get('mode') == 'best' else 'all'  # every score or best per player
+    period, start = _period_args()
+    after, rank, limit = _page_args()
+    conn = get_db()
     game = None
     user_scores = []
+    user_has_more = False
     global_scores = []
+    global_has_more = False
     
     if conn:
         cursor = conn.cursor(dictionary=True)
@@ -140,28 +257,26 @@ def game_leaderboard(game_id):
             user_result = cursor.fetchone()
             user_db_id = user_result['id'] if user_result else None
             
-            # Get user's scores for this game
-            if user_db_id:
-                cursor.execute("""
-                    SELECT l.leaderboard_id, l.score, u.username, l.created_at as date_played
-                    FROM scores_tb l
-                    JOIN user_tb u ON l.user_id = u.id
-                    WHERE l.game_id = %s AND l.user_id = %s
-                    ORDER BY l.score DESC
-                """, (game_id, user_db_id))
-                user_scores = cursor.fetchall()
+            # One page of each list from the ranked score index; the cursor
+            # applies to the list being viewed
+            if user_db_id and not period:
+                user_scores, user_has_more = get_scores_page_for_game(
+                    game_id, after if view_type == 'personal' else None, limit, user_db_id)
             
-            # Get global scores for this game
-            cursor.execute("""
-                SELECT l.leaderboard_id, l.score, u.username, l.created_at as date_played
-                FROM scores_tb l
-                JOIN user_tb u ON l.user_id = u.id
-                WHERE l.game_id = %s
-                ORDER BY l.score DESC
-            """, (game_id,))
-            global_scores = cursor.fetchall()
-        
-        conn.close()
+            # Get global scores for this game: every score, each player's best,
+            # or each player's best within one day/week/month
+            global_after = after if view_type == 'global' else None
+            if period:
+                global_scores, global_has_more = _numbered(
+                    get_period_scores_page(game_id, period, start, global_after, limit), rank if global_after else 0)
+                # The player's own standing in the period replaces their score history
+                period_best = get_period_player_best(game_id, period, start, user_db_id) if user_db_id else None
+                user_scores, user_has_more = ([period_best] if period_best else []), False
+            elif mode == 'best':
+                global_scores, global_has_more = _numbered(
+                    get_best_scores_page(game_id, global_after, limit), rank if global_after else 0)
+            else:
+                global_scores, global_has_more = get_scores_page_for_game(game_id, global_after, limit)
     
     if not game:
         return redirect(url_for('leaderboard.leaderboard'))
@@ -170,17 +285,38 @@ def game_leaderboard(game_id):
                          game=game, 
                          user_scores=user_scores,
                          global_scores=global_scores,
-                         view_type=view_type)
+                         view_type=view_type,
+                         mode=mode,
+                         period=period,
+                         start=start.isoformat() if start else None,
+                         previous_start=(start - timedelta(days=1)).isoformat() if start else None,
+                         next_start=next_period_start(period, start).isoformat() if period else None,
+                         closed=_is_closed(period, start),
+                         after=request.args.get('after') if after else None,
+                         page_size=limit,
+                         user_next_cursor=_next_cursor(user_scores, user_has_more),
+                         global_next_cursor=_next_cursor(global_scores, global_has_more))
 
 @leaderboard_bp.route('/game/<int:game_id>/api/data')
 @login_required
+@api_rate_limit()
 def game_leaderboard_api(game_id):
     """API endpoint for real-time game-specific leaderboard data"""
     view_type = request.args.get('view', 'personal')  # 'personal' or 'global'
-    conn = get_db_connection()
+    mode = 'best' if request.args.get('mode') == 'best' else 'all'  # every score or best per player
+    period, start = _period_args()
+    closed = _is_closed(period, start)
+    etag, modified = _leaderboard_version(game_id, (period, start) if closed else None)
+    not_modified = _not_modified(etag, modified, closed)
+    if not_modified:
+        return not_modified
+    after, rank, limit = _page_args()
+    conn = get_db()
     game = None
     user_scores = []
+    user_has_more = False
     global_scores = []
+    global_has_more = False
     
     if conn:
         cursor = conn.cursor(dictionary=True)
@@ -194,28 +330,26 @@ def game_leaderboard_api(game_id):
             user_result = cursor.fetchone()
             user_db_id = user_result['id'] if user_result else None
             
-            # Get user's scores for this game
-            if user_db_id:
-                cursor.execute("""
-                    SELECT l.leaderboard_id, l.score, u.username, l.created_at as date_played
-                    FROM scores_tb l
-                    JOIN user_tb u ON l.user_id = u.id
-                    WHERE l.game_id = %s AND l.user_id = %s
-                    ORDER BY l.score DESC
-                """, (game_id, user_db_id))
-                user_scores = cursor.fetchall()
+            # One page of each list from the ranked score index; the cursor
+            # applies to the list being viewed
+            if user_db_id and not period:
+                user_scores, user_has_more = get_scores_page_for_game(
+                    game_id, after if view_type == 'personal' else None, limit, user_db_id)
             
-            # Get global scores for this game
-            cursor.execute("""
-                SELECT l.leaderboard_id, l.score, u.username, l.created_at as date_played
-                FROM scores_tb l
-                JOIN user_tb u ON l.user_id = u.id
-                WHERE l.game_id = %s
-                ORDER BY l.score DESC
-            """, (game_id,))
-            global_scores = cursor.fetchall()
-        
-        conn.close()
+            # Get global scores for this game: every score, each player's best,
+            # or each player's best within one day/week/month
+            global_after = after if view_type == 'global' else None
+            if period:
+                global_scores, global_has_more = _numbered(
+                    get_period_scores_page(game_id, period, start, global_after, limit), rank if global_after else 0)
+                # The player's own standing in the period replaces their score history
+                period_best = get_period_player_best(game_id, period, start, user_db_id) if user_db_id else None
+                user_scores, user_has_more = ([period_best] if period_best else []), False
+            elif mode == 'best':
+                global_scores, global_has_more = _numbered(
+                    get_best_scores_page(game_id, global_after, limit), rank if global_after else 0)
+            else:
+                global_scores, global_has_more = get_scores_page_for_game(game_id, global_after, limit)
     
     if not game:
         return jsonify({'error': 'Game not found'}), 404
@@ -229,8 +363,117 @@ def game_leaderboard_api(game_id):
         if score.get('date_played'):
             score['date_played'] = score['date_played'].strftime('%Y-%m-%d %H:%M:%S')
     
-    return jsonify({
+    return _conditional(jsonify({
         'user_scores': user_scores,
         'global_scores': global_scores,
-        'view_type': view_type
-    })
\ No newline at end of file
+        'user_next_cursor': _next_cursor(user_scores, user_has_more),
+        'global_next_cursor': _next_cursor(global_scores, global_has_more),
+        'view_type': view_type,
+        'mode': mode,
+        'period': period,
+        'period_start': start.isoformat() if start else None
+    }), etag, modified, closed)
+
+@leaderboard_bp.route('/game/<int:game_id>/rank')
+@login_required
+def game_rank_api(game_id):
+    """API endpoint for the current user's rank on a game"""
+    conn = get_db()
+    if not conn:
+        return jsonify({'error': 'Database unavailable'}), 503
+    
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT name FROM games_tb WHERE id = %s", (game_id,))
+    game = cursor.fetchone()
+    if not game:
+        return jsonify({'error': 'Game not found'}), 404
+    
+    user_id = session.get('user_id')
+    cursor.execute("SELECT id FROM user_tb WHERE user_id = %s", (user_id,))
+    user_result = cursor.fetchone()
+    standing = get_player_rank(game_id, user_result['id']) if user_result else None
+    
+    if standing is None:
+        return jsonify({'game_id': game_id, 'game_name': game['name'], 'ranked': False})
+    
+    if standing.get('date_played'):
+        standing['date_played'] = standing['date_played'].strftime('%Y-%m-%d %H:%M:%S')
+    
+    return jsonify(dict(standing, game_id=game_id, game_name=game['name'], ranked=True))
+
+def _format_event(event, user_db_id):
+    """Serialise a hub event as a Server-Sent Events message for one viewer."""
+    event_id, kind, game_id, data = event
+    data = dict(data, game_id=game_id)
+    if kind == SCORE:
+        data['mine'] = data.pop('user_id', None) == user_db_id
+        if isinstance(data.get('date_played'), datetime):
+            data['date_played'] = data['date_played'].strftime('%Y-%m-%d %H:%M:%S')
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+
+def _can_hold_stream(hub):
+    """
+    Whether this worker can give a viewer a long-lived stream. Each open stream
+    holds a worker thread, so streams need a threaded server (wsgi.multithread,
+    e.g. gunicorn --worker-class gthread) or, with LEADERBOARD_STREAM_ASYNC_WORKERS,
+    a gevent/eventlet worker, and at most LEADERBOARD_STREAM_MAX_CLIENTS are held
+    per process. Refused viewers fall back to polling.
+    """
+    if not (request.environ.get('wsgi.multithread')
+            or current_app.config.get('LEADERBOARD_STREAM_ASYNC_WORKERS', False)):
+        return False
+    return hub.listeners < current_app.config.get('LEADERBOARD_STREAM_MAX_CLIENTS', 32)
+
+@leaderboard_bp.route('/stream')
+@login_required
+def leaderboard_stream():
+    """
+    Server-Sent Events stream of leaderboard changes (optionally for one game).
+    
+    Viewers receive a 'score' event for every new score, submitted on any
+    worker, and a 'reset' event when they must refetch. The stream closes after
+    LEADERBOARD_STREAM_MAX_SECONDS and the browser reconnects, resuming from
+    Last-Event-ID. When this worker cannot hold another stream it answers
+    204 No Content, which tells the browser to stop reconnecting and poll instead.
+    """
+    game_id = request.args.get('game_id', type=int)
+    hub = get_score_events()
+    if not _can_hold_stream(hub):
+        return Response(status=204)
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    keepalive = current_app.config.get('LEADERBOARD_STREAM_KEEPALIVE_SECONDS', 15)
+    max_seconds = current_app.config.get('LEADERBOARD_STREAM_MAX_SECONDS', 60)
+    
+    user_db_id = None
+    conn = get_db()
+    if conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id FROM user_tb WHERE user_id = %s", (session.get('user_id'),))
+        user_result = cursor.fetchone()
+        user_db_id = user_result['id'] if user_result else None
+    
+    def generate(last_id):
+        # Runs after the request context is gone, so no database connection is held
+        hub.subscribe()
+        try:
+            if last_id is None:
+                last_id = hub.last_id
+            deadline = time.monotonic() + max_seconds
+            yield 'retry: 3000\n\n'
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                events = hub.wait(last_id, min(keepalive, remaining))
+                if not events:
+                    yield ': keepalive\n\n'
+                    continue
+                for event in events:
+                    last_id = event[0]
+                    if game_id is None or event[2] in (game_id, None):
+                        yield _format_event(event, user_db_id)
+        finally:
+            hub.unsubscribe()
+    
+    return Response(generate(last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
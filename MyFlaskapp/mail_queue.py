@@ -0,0 +1,190 @@
+"""
+Mail Queue - delivers outbound email on background worker threads.
+
+Routes queue a message and return straight away instead of blocking the
+request on the SMTP handshake. Each worker keeps its SMTP connection open
+while messages keep arriving and closes it after idle_seconds without
+mail. Failed deliveries are retried with exponential backoff on a fresh
+connection.
+
+With sink_dir set, messages are written there as .eml files instead of
+being sent, for local testing without an SMTP server.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+
+from flask import current_app
+
+_STOP = object()
+
+
+class MailJob:
+    def __init__(self, message):
+        self.message = message
+        self.attempts = 0
+
+
+class MailQueue:
+    """
+    Bounded queue of outbound messages and the worker threads sending them.
+
+    Args:
+        app: Flask app the workers push an app context for (Flask-Mail needs one)
+        mail: The app's Flask-Mail instance
+        workers: Number of sending threads (0 sends synchronously in send())
+        max_queued: Messages that may wait before send() refuses more
+        max_retries: Delivery attempts after the first before a message is dropped
+        retry_backoff: Seconds before the first retry, doubled for each further one
+        idle_seconds: Seconds a worker keeps its SMTP connection open without mail
+        sink_dir: Directory to write messages to instead of sending them
+    """
+
+    def __init__(self, app, mail, workers=2, max_queued=1000, max_retries=3,
+                 retry_backoff=2, idle_seconds=30, sink_dir=None):
+        self.app = app
+        self.mail = mail
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_seconds = idle_seconds
+        self.sink_dir = sink_dir
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._threads = []
+        self._stats = {'sent': 0, 'retried': 0, 'failed': 0, 'connections': 0}
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        """Queue a Flask-Mail Message for delivery. Returns False if the queue is full."""
+        job = MailJob(message)
+        if not self.workers:
+            return self._deliver_now(job)
+        self._start()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            print(f"Error: Mail queue full, dropping message to {', '.join(message.recipients)}")
+            return False
+        return True
+
+    def _deliver_now(self, job):
+        try:
+            with self._connect() as connection:
+                self._send(connection, job)
+            return True
+        except Exception as e:
+            self._count('failed')
+            print(f"Error sending email: {e}")
+            return False
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f'mail-send-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _connect(self):
+        if self.sink_dir:
+            return nullcontext()
+        self._count('connections')
+        return self.mail.connect()
+
+    def _send(self, connection, job):
+        job.attempts += 1
+        if self.sink_dir:
+            os.makedirs(self.sink_dir, exist_ok=True)
+            path = os.path.join(self.sink_dir, f"{time.time():.6f}-{uuid.uuid4().hex[:8]}.eml")
+            with open(path, 'wb') as f:
+                f.write(job.message.as_bytes())
+        else:
+            connection.send(job.message)
+        self._count('sent')
+
+    def _work(self):
+        with self.app.app_context():
+            job = self._queue.get()
+            while job is not _STOP:
+                try:
+                    # One connection for this message and every one that follows without a long pause
+                    with self._connect() as connection:
+                        while job is not _STOP:
+                            self._send(connection, job)
+                            try:
+                                job = self._queue.get(timeout=self.idle_seconds)
+                            except queue.Empty:
+                                job = None
+                                break
+                except Exception as e:
+                    if job is not None and job is not _STOP:
+                        self._retry(job, e)
+                        job = None
+                if job is None:
+                    job = self._queue.get()
+
+    def _retry(self, job, error):
+        if job.attempts > self.max_retries:
+            self._count('failed')
+            print(f"Error sending email to {', '.join(job.message.recipients)} after {job.attempts} attempts: {error}")
+            return
+        self._count('retried')
+        delay = self.retry_backoff * 2 ** (job.attempts - 1)
+        print(f"Error sending email ({error}); retrying in {delay}s")
+        timer = threading.Timer(delay, self._requeue, (job,))
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, job):
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count('failed')
+            print(f"Error: Mail queue full, dropping retry to {', '.join(job.message.recipients)}")
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self):
+        """Queue depth and delivery counters for monitoring."""
+        with self._lock:
+            return dict(self._stats, queued=self._queue.qsize(), workers=len(self._threads))
+
+    def shutdown(self, wait=True):
+        """Stop the workers once the messages already queued have been sent."""
+        with self._lock:
+            threads = list(self._threads)
+            self._threads = []
+        for _ in threads:
+            self._queue.put(_STOP)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_mail_queue():
+    """Return the app's mail queue, creating it from config on first use."""
+    mail_queue = current_app.extensions.get('mail_queue')
+    if mail_queue is None:
+        with _QUEUE_LOCK:
+            mail_queue = current_app.extensions.get('mail_queue')
+            if mail_queue is None:
+                mail_queue = MailQueue(
+                    current_app._get_current_object(),
+                    current_app.extensions['mail'],
+                    workers=current_app.config.get('MAIL_QUEUE_WORKERS', 2),
+                    max_queued=current_app.config.get('MAIL_QUEUE_MAX_QUEUED', 1000),
+                    max_retries=current_app.config.get('MAIL_QUEUE_MAX_RETRIES', 3),
+                    retry_backoff=current_app.config.get('MAIL_QUEUE_RETRY_BACKOFF_SECONDS', 2),
+                    idle_seconds=current_app.config.get('MAIL_QUEUE_IDLE_SECONDS', 30),
+                    sink_dir=current_app.config.get('MAIL_QUEUE_SINK_DIR')
+                )
+                current_app.extensions['mail_queue'] = mail_queue
+    return mail_queue
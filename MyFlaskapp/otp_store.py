@@ -0,0 +1,198 @@
+"""
+OTP Store - one-time passwords keyed by email, with expiry.
+
+Two stores share one interface (store, verify, can_resend, purge),
+selected by OTP_STORE_BACKEND:
+    table   the otp_verification table (the default; works across workers).
+            It holds at most one row per email - store() upserts - and
+            purge() deletes expired and verified rows, both on its own
+            every purge_interval seconds and from scripts/purge_otps.py.
+    memory  a per-process TTL map, for single-process deployments and
+            development without MySQL.
+Lookups go through the email key in both and codes are compared with
+hmac.compare_digest, so a check costs the same however many codes have
+been issued and whichever digits are wrong.
+"""
+
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+
+from MyFlaskapp.db import get_db_connection
+
+_STORE_LOCK = threading.Lock()
+
+
+class TableOTPStore:
+    def __init__(self, ttl_seconds=600, resend_cooldown=60, purge_interval=3600):
+        """
+        Args:
+            ttl_seconds: Seconds a code stays valid
+            resend_cooldown: Seconds before another code may be sent to the same email
+            purge_interval: Seconds between purges triggered by store()
+        """
+        self.ttl_seconds = ttl_seconds
+        self.resend_cooldown = resend_cooldown
+        self.purge_interval = purge_interval
+        self._last_purge = time.time()
+
+    def store(self, email, otp):
+        """Issue otp for email, replacing any earlier code."""
+        conn = get_db_connection()
+        if conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO otp_verification (email, otp, created_at, expires_at, verified)
+                VALUES (%s, %s, NOW(), DATE_ADD(NOW(), INTERVAL %s SECOND), FALSE)
+                ON DUPLICATE KEY UPDATE
+                    otp = VALUES(otp),
+                    created_at = VALUES(created_at),
+                    expires_at = VALUES(expires_at),
+                    verified = FALSE
+            """, (email, otp, self.ttl_seconds))
+            conn.commit()
+            conn.close()
+            if time.time() - self._last_purge >= self.purge_interval:
+                self.purge()
+            return True
+        return False
+
+    def verify(self, email, otp):
+        """Check otp against the email's current code and use it up."""
+        conn = get_db_connection()
+        if conn:
+            cursor = conn.cursor(dictionary=True)
+            # Fetch by the unique email key and compare in Python, so the
+            # check takes the same time whichever digits are wrong
+            cursor.execute("""
+                SELECT id, otp
+                FROM otp_verification
+                WHERE email = %s AND expires_at > NOW() AND verified = FALSE
+            """, (email,))
+            record = cursor.fetchone()
+            used = False
+            if record and hmac.compare_digest(str(record['otp']).encode(), str(otp).encode()):
+                # Use the code up only if it is still the same unused, unexpired
+                # code: of two concurrent verifications (or one racing a resend)
+                # exactly one updates the row
+                cursor.execute("""
+                    UPDATE otp_verification SET verified = TRUE
+                    WHERE id = %s AND otp = %s AND expires_at > NOW() AND verified = FALSE
+                """, (record['id'], record['otp']))
+                used = cursor.rowcount == 1
+                conn.commit()
+            conn.close()
+            return used
+        return False
+
+    def can_resend(self, email):
+        """True once the cooldown since the email's last code has passed."""
+        conn = get_db_connection()
+        if conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SELECT created_at FROM otp_verification WHERE email = %s", (email,))
+            record = cursor.fetchone()
+            conn.close()
+            if record:
+                last_sent = record['created_at']
+                if isinstance(last_sent, str):
+                    last_sent = datetime.fromisoformat(last_sent.replace('Z', '+00:00'))
+                return (datetime.now() - last_sent).total_seconds() > self.resend_cooldown
+            return True
+        return False
+
+    def purge(self):
+        """Delete expired and verified codes. Returns the number of rows removed."""
+        self._last_purge = time.time()
+        conn = get_db_connection()
+        if not conn:
+            return 0
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM otp_verification WHERE expires_at <= NOW() OR verified = TRUE")
+        conn.commit()
+        deleted = cursor.rowcount
+        conn.close()
+        return deleted
+
+
+class MemoryOTPStore:
+    def __init__(self, ttl_seconds=600, resend_cooldown=60, max_entries=10000):
+        """
+        Args:
+            ttl_seconds: Seconds a code stays valid
+            resend_cooldown: Seconds before another code may be sent to the same email
+            max_entries: Codes kept before the oldest is dropped
+        """
+        self.ttl_seconds = ttl_seconds
+        self.resend_cooldown = resend_cooldown
+        self.max_entries = max_entries
+        # email -> (otp, created_at), oldest first; every code has the same TTL,
+        # so expired codes are always at the front
+        self._codes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        removed = 0
+        while self._codes:
+            created_at = next(iter(self._codes.values()))[1]
+            if now - created_at < self.ttl_seconds and len(self._codes) <= self.max_entries:
+                break
+            self._codes.popitem(last=False)
+            removed += 1
+        return removed
+
+    def store(self, email, otp):
+        """Issue otp for email, replacing any earlier code."""
+        now = time.time()
+        with self._lock:
+            self._codes.pop(email, None)
+            self._codes[email] = (otp, now)
+            self._purge(now)
+        return True
+
+    def verify(self, email, otp):
+        """Check otp against the email's current code and use it up."""
+        now = time.time()
+        with self._lock:
+            entry = self._codes.get(email)
+            if entry is None or now - entry[1] >= self.ttl_seconds:
+                return False
+            if not hmac.compare_digest(entry[0].encode(), str(otp).encode()):
+                return False
+            del self._codes[email]
+            return True
+
+    def can_resend(self, email):
+        """True once the cooldown since the email's last code has passed."""
+        with self._lock:
+            entry = self._codes.get(email)
+        return entry is None or time.time() - entry[1] > self.resend_cooldown
+
+    def purge(self):
+        """Drop expired codes. Returns the number removed."""
+        with self._lock:
+            return self._purge(time.time())
+
+
+def get_otp_store():
+    """Return the app's OTP store, creating it from config on first use."""
+    store = current_app.extensions.get('otp_store')
+    if store is None:
+        with _STORE_LOCK:
+            store = current_app.extensions.get('otp_store')
+            if store is None:
+                ttl_seconds = current_app.config.get('OTP_EXPIRY_MINUTES', 10) * 60
+                resend_cooldown = current_app.config.get('OTP_RESEND_COOLDOWN_SECONDS', 60)
+                if current_app.config.get('OTP_STORE_BACKEND', 'table') == 'memory':
+                    store = MemoryOTPStore(ttl_seconds, resend_cooldown)
+                else:
+                    store = TableOTPStore(
+                        ttl_seconds, resend_cooldown,
+                        purge_interval=current_app.config.get('OTP_PURGE_INTERVAL_SECONDS', 3600)
+                    )
+                current_app.extensions['otp_store'] = store
+    return store
@@ -4,46 +4,290 @@ Rate limiting utilities for authentication endpoints
 from datetime import datetime, timedelta
 from flask import session, current_app, redirect, url_for
 from functools import wraps
+from collections import OrderedDict, deque
+from MyFlaskapp.cache import connect_sqlite
+import math
+import os
+import threading
 import time
 
+class _Attempts(deque):
+    """Timestamps of a key's recent allowed attempts, oldest first."""
+
+    def __init__(self, max_attempts, window_seconds):
+        super().__init__(maxlen=max_attempts)
+        self.window_seconds = window_seconds
+
 class RateLimiter:
-    def __init__(self):
-        self.attempts = {}  # In-memory storage for attempts
+    def __init__(self, max_keys=10000, sweep_every=1000):
+        """
+        Sliding-window log holding at most max_attempts timestamps per key,
+        plus token buckets for API endpoints.
+
+        Args:
+            max_keys: Keys tracked before the least recently seen is forgotten
+            sweep_every: Checks between sweeps of idle keys
+        """
+        self.attempts = OrderedDict()  # key -> _Attempts, least recently seen first
+        self.buckets = OrderedDict()  # key -> (tokens, updated_at), least recently seen first
+        self.max_keys = max_keys
+        self.sweep_every = sweep_every
+        self._checks = 0
+        self._lock = threading.Lock()
     
     def is_rate_limited(self, key, max_attempts, window_seconds):
         """Check if the key has exceeded rate limit"""
         now = time.time()
         
-        if key not in self.attempts:
-            self.attempts[key] = []
-        
-        # Remove old attempts outside the window
-        self.attempts[key] = [
-            attempt_time for attempt_time in self.attempts[key]
-            if now - attempt_time < window_seconds
-        ]
-        
-        # Check if under limit
-        if len(self.attempts[key]) < max_attempts:
-            self.attempts[key].append(now)
-            return False
-        
-        return True
+        with self._lock:
+            attempts = self.attempts.get(key)
+            if attempts is None:
+                attempts = self.attempts[key] = _Attempts(max_attempts, window_seconds)
+            elif attempts.maxlen != max_attempts:
+                attempts = self.attempts[key] = self._resized(attempts, max_attempts)
+            attempts.window_seconds = window_seconds
+            self.attempts.move_to_end(key)
+            
+            # Remove old attempts outside the window (each timestamp is dropped once)
+            while attempts and now - attempts[0] >= window_seconds:
+                attempts.popleft()
+            
+            limited = len(attempts) >= max_attempts
+            if not limited:
+                attempts.append(now)
+            
+            self._checks += 1
+            if self._checks % self.sweep_every == 0:
+                self._sweep(now)
+            while len(self.attempts) > self.max_keys:
+                self.attempts.popitem(last=False)
+            
+            return limited
+
+    @staticmethod
+    def _resized(attempts, max_attempts):
+        # The same key checked with a different limit keeps its newest attempts
+        resized = _Attempts(max_attempts, attempts.window_seconds)
+        resized.extend(attempts)
+        return resized
+
+    def _sweep(self, now):
+        # Forget idle keys, starting from the least recently seen
+        while self.attempts:
+            key, attempts = next(iter(self.attempts.items()))
+            if attempts and now - attempts[-1] < attempts.window_seconds:
+                break
+            del self.attempts[key]
+    
+    def take_token(self, key, rate, burst):
+        """
+        Take a token from key's bucket, which holds up to burst tokens and
+        refills at rate tokens per second. Returns (allowed, tokens left).
+        """
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self.buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            return allowed, tokens
+
+    def refund_token(self, key, rate, burst):
+        """Give back a token taken from key's bucket. Returns tokens left."""
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self.buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate + 1)
+            self.buckets[key] = (tokens, now)
+            return tokens
     
     def get_remaining_time(self, key, window_seconds):
         """Get remaining time until rate limit resets"""
-        if key not in self.attempts or not self.attempts[key]:
+        attempts = self.attempts.get(key)
+        if not attempts:
             return 0
         
-        oldest_attempt = min(self.attempts[key])
-        reset_time = oldest_attempt + window_seconds
+        reset_time = attempts[0] + window_seconds
         remaining = max(0, reset_time - time.time())
         return int(remaining)
 
+class SQLiteRateLimiter:
+    def __init__(self, path, prune_every=1000):
+        """
+        Rate limiter shared by every worker on the host through a SQLite file.
+
+        Uses a sliding-window counter: attempts are counted per fixed window
+        and the previous window's count is weighted by how much of it still
+        overlaps the sliding window. Each check reads and increments the
+        counts in one write transaction, so concurrent workers cannot both
+        take the last attempt.
+
+        Args:
+            path: SQLite database file (created if missing)
+            prune_every: Checks between deletions of expired counters
+        """
+        self.path = path
+        self.prune_every = prune_every
+        self._checks = 0
+        self._local = threading.local()
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT,
+                window_start INTEGER,
+                count INTEGER,
+                expires_at REAL,
+                PRIMARY KEY (key, window_start)
+            ) WITHOUT ROWID
+        """)
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS token_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL,
+                updated_at REAL,
+                full_at REAL
+            ) WITHOUT ROWID
+        """)
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def is_rate_limited(self, key, max_attempts, window_seconds):
+        """Check if the key has exceeded rate limit"""
+        if window_seconds <= 0:
+            return False
+        now = time.time()
+        current = int(now // window_seconds)
+        conn = self._connection()
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            counts = dict(conn.execute(
+                "SELECT window_start, count FROM rate_limits WHERE key = ? AND window_start IN (?, ?)",
+                (key, current - 1, current)
+            ).fetchall())
+            overlap = 1 - (now / window_seconds - current)
+            estimate = counts.get(current - 1, 0) * overlap + counts.get(current, 0)
+            limited = estimate >= max_attempts
+            if not limited:
+                conn.execute("""
+                    INSERT INTO rate_limits (key, window_start, count, expires_at) VALUES (?, ?, 1, ?)
+                    ON CONFLICT (key, window_start) DO UPDATE SET count = count + 1
+                """, (key, current, (current + 2) * window_seconds))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        self._checked(now)
+        return limited
+
+    def _checked(self, now):
+        self._checks += 1
+        if self._checks % self.prune_every == 0:
+            conn = self._connection()
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+            # A bucket that has refilled is the same as no bucket
+            conn.execute("DELETE FROM token_buckets WHERE full_at <= ?", (now,))
+
+    def take_token(self, key, rate, burst):
+        """
+        Take a token from key's bucket, which holds up to burst tokens and
+        refills at rate tokens per second. Returns (allowed, tokens left).
+        """
+        now = time.time()
+        conn = self._connection()
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM token_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (burst, now)
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO token_buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (burst - tokens) / rate)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        self._checked(now)
+        return allowed, tokens
+
+    def refund_token(self, key, rate, burst):
+        """Give back a token taken from key's bucket. Returns tokens left."""
+        now = time.time()
+        conn = self._connection()
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM token_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (burst, now)
+            tokens = min(burst, tokens + (now - updated_at) * rate + 1)
+            conn.execute(
+                "INSERT OR REPLACE INTO token_buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (burst - tokens) / rate)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return tokens
+    
+    def get_remaining_time(self, key, window_seconds):
+        """Get remaining time until rate limit resets (at most the rest of the current window)"""
+        if window_seconds <= 0:
+            return 0
+        now = time.time()
+        current = int(now // window_seconds)
+        row = self._connection().execute(
+            "SELECT 1 FROM rate_limits WHERE key = ? AND window_start IN (?, ?)",
+            (key, current - 1, current)
+        ).fetchone()
+        if row is None:
+            return 0
+        return int((current + 1) * window_seconds - now)
+
 # Global rate limiter instance
 rate_limiter = RateLimiter()
+_LIMITER_LOCK = threading.Lock()
+
+def get_rate_limiter():
+    """
+    Return the rate limiter selected by RATE_LIMIT_BACKEND: the per-process
+    `rate_limiter` ('memory') or a SQLite store shared by all workers ('sqlite').
+    """
+    if current_app.config.get('RATE_LIMIT_BACKEND', 'memory') != 'sqlite':
+        return rate_limiter
+    limiter = current_app.extensions.get('rate_limiter')
+    if limiter is None:
+        with _LIMITER_LOCK:
+            limiter = current_app.extensions.get('rate_limiter')
+            if limiter is None:
+                path = current_app.config.get('RATE_LIMIT_SQLITE_PATH')
+                if not path:
+                    os.makedirs(current_app.instance_path, exist_ok=True)
+                    path = os.path.join(current_app.instance_path, 'rate_limits.sqlite3')
+                limiter = SQLiteRateLimiter(path)
+                current_app.extensions['rate_limiter'] = limiter
+    return limiter
 
-def rate_limit(max_attempts=None, window_seconds=None, key_func=None):
+def rate_limit(max_attempts=None, window_seconds=None, key_func=None, methods=None):
     """
     Rate limiting decorator
     
@@ -51,10 +295,15 @@ def rate_limit(max_attempts=None, window_seconds=None, key_func=None):
         max_attempts: Maximum number of attempts (from config if None)
         window_seconds: Time window in seconds (from config if None)
         key_func: Function to generate rate limit key (IP-based if None)
+        methods: HTTP methods that count as attempts (all if None)
     """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
+            from flask import request
+            if methods is not None and request.method not in methods:
+                return f(*args, **kwargs)
+            
             # Use config values if not specified
             if max_attempts is None:
                 max_attempts_config = current_app.config.get('MAX_LOGIN_ATTEMPTS', 5)
@@ -68,18 +317,19 @@ def rate_limit(max_attempts=None, window_seconds=None, key_func=None):
             
             # Generate rate limit key
             if key_func is None:
-                # Use IP address as key
+                # Use IP address as key, separately for each endpoint
                 from flask import request
-                key = request.remote_addr
+                key = f"{f.__name__}_{request.remote_addr}"
             else:
                 key = key_func()
             
-            print(f"DEBUG: Rate limit check - Key: {key}, Attempts: {len(rate_limiter.attempts.get(key, []))}, Max: {max_attempts_config}")
+            print(f"DEBUG: Rate limit check - Key: {key}, Max: {max_attempts_config}")
             
             # Check rate limit
-            if rate_limiter.is_rate_limited(key, max_attempts_config, window_seconds_config):
+            limiter = get_rate_limiter()
+            if limiter.is_rate_limited(key, max_attempts_config, window_seconds_config):
                 print(f"DEBUG: Rate limit exceeded for key: {key}")
-                remaining_time = rate_limiter.get_remaining_time(key, window_seconds_config)
+                remaining_time = limiter.get_remaining_time(key, window_seconds_config)
                 
                 # Check if this is an AJAX request
                 from flask import request
@@ -127,8 +377,9 @@ def otp_rate_limit(max_attempts=None, window_seconds=None):
                 from flask import request
                 key = f"otp_{request.remote_addr}"
             
-            if rate_limiter.is_rate_limited(key, max_attempts_config, window_seconds_config):
-                remaining_time = rate_limiter.get_remaining_time(key, window_seconds_config)
+            limiter = get_rate_limiter()
+            if limiter.is_rate_limited(key, max_attempts_config, window_seconds_config):
+                remaining_time = limiter.get_remaining_time(key, window_seconds_config)
                 # from flask import flash
                 # flash(f'Too many OTP attempts. Please wait {remaining_time} seconds.', 'danger')
                 return redirect(url_for('auth.register'))
@@ -136,3 +387,80 @@ def otp_rate_limit(max_attempts=None, window_seconds=None):
             return f(*args, **kwargs)
         return decorated_function
     return decorator
+
+def _api_policy(name, scope):
+    # (requests per minute, burst) for one of a route's buckets, or None for no limit
+    policy = current_app.config.get('API_RATE_LIMITS', {}).get(name, {})
+    if scope in policy:
+        return policy[scope]
+    if scope == 'user':
+        return (current_app.config.get('API_RATE_LIMIT_PER_MINUTE', 60),
+                current_app.config.get('API_RATE_LIMIT_BURST', 20))
+    return None
+
+def api_rate_limit(policy=None):
+    """
+    Token-bucket rate limiter for JSON API endpoints
+    
+    Every caller gets a bucket per route (keyed by session user, or IP when
+    logged out), and a route can also have one bucket shared by all callers
+    so heavy polling is shed before it reaches the database. Policies come
+    from API_RATE_LIMITS, falling back to API_RATE_LIMIT_PER_MINUTE/BURST
+    for the per-user bucket. A request the route bucket rejects keeps the
+    caller's token, and a 304 Not Modified refunds the tokens it took.
+    Responses carry RateLimit-* headers for the per-user bucket (or the
+    route bucket when it rejected) and Retry-After when rejected.
+    
+    Args:
+        policy: Name of the API_RATE_LIMITS entry (the endpoint name if None)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            from flask import request, jsonify, make_response
+            name = policy or request.endpoint
+            limiter = get_rate_limiter()
+            caller = session.get('user_id') or request.remote_addr
+            
+            per_minute, burst = _api_policy(name, 'user')
+            user_bucket = (f"api_{name}_{caller}", per_minute / 60, burst)
+            allowed, tokens = limiter.take_token(*user_bucket)
+            taken = [user_bucket] if allowed else []
+            # The bucket the RateLimit-* headers describe: (key, rate, burst), tokens left
+            reported, reported_tokens = user_bucket, tokens
+            
+            route_policy = _api_policy(name, 'route')
+            if allowed and route_policy:
+                route_bucket = (f"api_{name}", route_policy[0] / 60, route_policy[1])
+                allowed, route_tokens = limiter.take_token(*route_bucket)
+                if allowed:
+                    taken.append(route_bucket)
+                else:
+                    # The request never ran, so the caller keeps their token
+                    limiter.refund_token(*user_bucket)
+                    reported, reported_tokens = route_bucket, route_tokens
+            
+            if allowed:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 304:
+                    # Revalidating an unchanged leaderboard costs nothing
+                    for bucket in taken:
+                        refunded = limiter.refund_token(*bucket)
+                        if bucket is reported:
+                            reported_tokens = refunded
+            
+            _, rate, limit = reported
+            if not allowed:
+                retry_after = math.ceil((1 - reported_tokens) / rate)
+                response = jsonify({
+                    'success': False,
+                    'message': f'Too many requests. Try again in {retry_after} seconds.'
+                })
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+            response.headers['RateLimit-Limit'] = str(limit)
+            response.headers['RateLimit-Remaining'] = str(int(reported_tokens))
+            response.headers['RateLimit-Reset'] = str(math.ceil((limit - reported_tokens) / rate))
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,141 @@
+"""
+Score Events - fan-out of leaderboard changes to live viewers.
+
+submit_score() and leaderboard resets append one row each to the
+score_events table, which every worker shares. While any stream is open
+in a process, one background thread tails that table (once a second by
+default) and publishes the new rows to the process's hub; every open
+leaderboard stream (see /leaderboard/stream) waits on the hub's condition
+and is woken by that single notification. Database work therefore scales
+with workers and score submissions rather than with the number of viewers,
+and viewers see scores submitted on any worker.
+
+Events carry the table's ids, so a reconnecting client can resume from its
+Last-Event-ID on whichever worker it reaches. A bounded history serves
+those resumes; a client that fell further behind than the history gets a
+'reset' event telling it to refetch.
+"""
+
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+SCORE = 'score'
+RESET = 'reset'
+
+
+class ScoreEventHub:
+    def __init__(self, history=256, source=None, poll_seconds=1):
+        """
+        Args:
+            history: Number of recent events kept for clients resuming a stream
+            source: Shared event log to tail, with latest_id() and
+                events_after(event_id, limit) (None: events only come from publish())
+            poll_seconds: Seconds between reads of the source while streams are open
+        """
+        self.source = source
+        self.poll_seconds = poll_seconds
+        self._history = history
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=history)  # (event_id, kind, game_id, data)
+        self._last_id = 0
+        self._complete_after = 0  # the history holds every event newer than this id
+        self._listeners = 0
+        self._poller = None
+
+    @property
+    def last_id(self):
+        with self._cond:
+            return self._last_id
+
+    @property
+    def listeners(self):
+        with self._cond:
+            return self._listeners
+
+    def publish(self, kind, game_id, data=None, event_id=None):
+        """Record an event and wake every waiting stream. Returns the event id."""
+        with self._cond:
+            self._last_id = event_id if event_id is not None else self._last_id + 1
+            if len(self._events) == self._events.maxlen:
+                self._complete_after = self._events[0][0]
+            self._events.append((self._last_id, kind, game_id, dict(data or {})))
+            self._cond.notify_all()
+            return self._last_id
+
+    def wait(self, after, timeout):
+        """
+        Block until there are events newer than `after` (or timeout) and return
+        them as (event_id, kind, game_id, data) tuples, oldest first.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._last_id > after, timeout)
+            if self._last_id <= after:
+                return []
+            if after < self._complete_after:
+                # Some events were dropped from (or predate) the history; the client must refetch
+                return [(self._last_id, RESET, None, {})]
+            return [event for event in self._events if event[0] > after]
+
+    def subscribe(self):
+        """Register an open stream, starting the source poller if it is not running."""
+        with self._cond:
+            self._listeners += 1
+            if self.source is None or self._poller is not None:
+                return
+            self._poller = threading.Thread(target=self._poll, name='score-events', daemon=True)
+        try:
+            latest = self.source.latest_id()
+        except Exception as e:
+            print(f"Error reading score events: {e}")
+            latest = None
+        with self._cond:
+            if latest is not None and latest > self._last_id:
+                # Events between the last poll and now were never seen here
+                self._last_id = self._complete_after = latest
+                self._events.clear()
+            self._poller.start()
+
+    def unsubscribe(self):
+        """Unregister a stream; the poller stops once none are left."""
+        with self._cond:
+            self._listeners -= 1
+
+    def _poll(self):
+        while True:
+            with self._cond:
+                if not self._listeners:
+                    self._poller = None
+                    return
+                after = self._last_id
+            try:
+                events = self.source.events_after(after, self._history)
+            except Exception as e:
+                print(f"Error reading score events: {e}")
+                events = []
+            for event_id, kind, game_id, data in events:
+                self.publish(kind, game_id, data, event_id)
+            if len(events) < self._history:
+                time.sleep(self.poll_seconds)
+
+
+_HUB_LOCK = threading.Lock()
+
+
+def get_score_events():
+    """Return the app's score event hub, tailing the shared score_events table."""
+    hub = current_app.extensions.get('score_events')
+    if hub is None:
+        with _HUB_LOCK:
+            hub = current_app.extensions.get('score_events')
+            if hub is None:
+                from MyFlaskapp.db import ScoreEventLog
+                hub = ScoreEventHub(
+                    history=current_app.config.get('LEADERBOARD_STREAM_HISTORY', 256),
+                    source=ScoreEventLog(current_app._get_current_object()),
+                    poll_seconds=current_app.config.get('LEADERBOARD_EVENTS_POLL_SECONDS', 1)
+                )
+                current_app.extensions['score_events'] = hub
+    return hub
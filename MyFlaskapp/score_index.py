@@ -0,0 +1,273 @@
+"""
+Score Index - in-process ranked leaderboards, one per game.
+
+Each game's scores are loaded from MySQL once and kept in sorted key lists,
+so top-K, rank-of-player and score-range lookups are binary searches
+instead of an ORDER BY over scores_tb. submit_score() feeds new rows in
+incrementally; MySQL stays the source of truth.
+
+Scores and resets made by other workers reach the index through the shared
+score_events log: at most every sync_seconds a lookup reads the game's
+events newer than the last one the index is known to include, adds the
+scores and drops the game on a reset (the next lookup reloads it). A game
+is also reloaded after max_age seconds, as a backstop.
+
+Loads are single-flight: one thread loads a game while the others wait for
+it (cold game) or keep reading the previous index (stale game).
+
+Inserting a score is a binary search plus a list insert, which shifts the
+keys after it: O(log n) comparisons but O(n) memory moves. For the
+thousands of scores a game holds that move is a fast memmove; lookups stay
+O(log n).
+
+Rows are ordered by score (highest first), ties going to the earlier
+leaderboard_id.
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from MyFlaskapp.score_events import SCORE, RESET
+
+
+def _key(row):
+    return (-row['score'], row['leaderboard_id'])
+
+
+class GameScores:
+    """Sorted scores for a single game."""
+
+    def __init__(self, loaded_at, version=None):
+        self.loaded_at = loaded_at
+        self.version = version  # id of the newest score event certainly included (None: unknown)
+        self.synced_at = loaded_at
+        self.rows = {}  # leaderboard_id -> (user_id, row)
+        self.keys = []  # every score, best first
+        self.user_keys = {}  # user_id -> that player's score keys, best first
+        self.best_keys = []  # each player's best score, best first
+
+    def add(self, user_id, row):
+        if row['leaderboard_id'] in self.rows:
+            return
+        key = _key(row)
+        self.rows[row['leaderboard_id']] = (user_id, row)
+        insort(self.keys, key)
+
+        user_keys = self.user_keys.setdefault(user_id, [])
+        previous_best = user_keys[0] if user_keys else None
+        insort(user_keys, key)
+        if previous_best is None:
+            insort(self.best_keys, key)
+        elif key < previous_best:
+            del self.best_keys[bisect_left(self.best_keys, previous_best)]
+            insort(self.best_keys, key)
+
+    def row(self, key):
+        return dict(self.rows[key[1]][1])
+
+
+class ScoreIndex:
+    def __init__(self, loader, max_age=300, log=None, sync_seconds=1, sync_limit=500):
+        """
+        Args:
+            loader: Callable taking a game_id and returning its score rows from the
+                database, each with leaderboard_id, user_id, username, score and date_played
+            max_age: Seconds before a game's index is rebuilt from the database (None: never)
+            log: Shared score event log with latest_id(game_id) and
+                game_events_after(game_id, event_id, limit) (None: only max_age reloads)
+            sync_seconds: Seconds between reads of the log for one game
+            sync_limit: Events read per sync; a game further behind is reloaded instead
+        """
+        self.loader = loader
+        self.max_age = max_age
+        self.log = log
+        self.sync_seconds = sync_seconds
+        self.sync_limit = sync_limit
+
+        self._games = {}  # game_id -> GameScores
+        self._loading = {}  # game_id -> rows added while that game was being loaded
+        self._syncing = set()  # game_ids whose log is being read
+        self._lock = threading.Lock()
+        self._loaded = threading.Condition(self._lock)  # notified when a load finishes
+
+    def _is_fresh(self, game):
+        return self.max_age is None or time.time() - game.loaded_at < self.max_age
+
+    def _sync_due(self, game_id, game):
+        return (self.log is not None and game.version is not None and game_id not in self._syncing
+                and time.time() - game.synced_at >= self.sync_seconds)
+
+    def _game(self, game_id):
+        # Return the game's index, (re)loading it from the database when missing, stale
+        # or reset, and catching it up with the shared event log every sync_seconds
+        with self._lock:
+            while True:
+                game = self._games.get(game_id)
+                if game is not None and self._is_fresh(game):
+                    if not self._sync_due(game_id, game):
+                        return game
+                    self._syncing.add(game_id)
+                    game.synced_at = time.time()
+                    break
+                if game_id not in self._loading:
+                    self._loading[game_id] = []
+                    game = None
+                    break
+                if game is not None:
+                    return game  # Another thread is refreshing it; serve the old index meanwhile
+                self._loaded.wait()
+
+        if game is None:
+            return self._load(game_id)
+        if self._catch_up(game_id, game):
+            return game
+        return self._game(game_id)
+
+    def _catch_up(self, game_id, game):
+        # Apply the game's events newer than game.version. Returns False if the game was dropped
+        try:
+            events = self.log.game_events_after(game_id, game.version, self.sync_limit)
+        except Exception as e:
+            print(f"Error reading score events: {e}")
+            events = []
+        with self._lock:
+            self._syncing.discard(game_id)
+            if self._games.get(game_id) is not game:
+                return True  # Reloaded meanwhile
+            if len(events) >= self.sync_limit:
+                del self._games[game_id]  # Too far behind to catch up event by event
+                return False
+            settled = True
+            for event_id, kind, data, event_settled in events:
+                if kind == RESET:
+                    del self._games[game_id]
+                    return False
+                if kind == SCORE and data:
+                    row = {key: data.get(key) for key in ('leaderboard_id', 'username', 'score', 'date_played')}
+                    game.add(data['user_id'], row)
+                # Only advance past events that can no longer be overtaken by an
+                # earlier id committing late; the rest are re-read (and re-added
+                # harmlessly) on the next sync
+                settled = settled and event_settled
+                if settled:
+                    game.version = event_id
+            return True
+
+    def _load(self, game_id):
+        loaded_at = time.time()
+        version = None
+        if self.log is not None:
+            try:
+                # Read before the rows, so every event up to it is in them
+                version = self.log.latest_id(game_id)
+            except Exception as e:
+                print(f"Error reading score events: {e}")
+        try:
+            rows = self.loader(game_id)
+        except Exception:
+            with self._lock:
+                # Waiters wake up and one of them retries the load
+                self._loading.pop(game_id, None)
+                self._loaded.notify_all()
+            raise
+
+        game = GameScores(loaded_at, version)
+        for row in rows:
+            row = dict(row)
+            game.add(row.pop('user_id'), row)
+        with self._lock:
+            # Scores submitted while the query ran may be missing from its result
+            for user_id, row in self._loading.pop(game_id, []):
+                game.add(user_id, row)
+            current = self._games.get(game_id)
+            if current is None or current.loaded_at < loaded_at:
+                self._games[game_id] = game
+            self._loaded.notify_all()
+            return self._games[game_id]
+
+    def loaded_at(self, game_id):
+        """
+        When the game's index was loaded, or None if it is not loaded or due for a
+        reload (the next lookup loads it). Changes whenever the index is rebuilt.
+        """
+        with self._lock:
+            game = self._games.get(game_id)
+            return game.loaded_at if game is not None and self._is_fresh(game) else None
+
+    def add_score(self, game_id, row):
+        """Insert a newly stored score row (including user_id) into the game's index."""
+        row = dict(row)
+        user_id = row.pop('user_id')
+        with self._lock:
+            if game_id in self._loading:
+                self._loading[game_id].append((user_id, row))
+            game = self._games.get(game_id)
+            if game is not None:
+                game.add(user_id, row)
+
+    def invalidate(self, game_id=None):
+        """Drop one game's index (or every game's) so it is reloaded on next use."""
+        with self._lock:
+            if game_id is None:
+                self._games.clear()
+            else:
+                self._games.pop(game_id, None)
+
+    def top(self, game_id, limit=None):
+        """Return copies of the game's best score rows, highest first."""
+        game = self._game(game_id)
+        with self._lock:
+            keys = game.keys if limit is None else game.keys[:limit]
+            return [game.row(key) for key in keys]
+
+    def page(self, game_id, after=None, limit=50, user_id=None):
+        """
+        Keyset-paginated scores for the game (or one player's scores on it).
+
+        after is the (score, leaderboard_id) of the last row already shown.
+        Returns (rows, has_more); each row is a copy carrying its 1-based 'rank'.
+        """
+        game = self._game(game_id)
+        with self._lock:
+            keys = game.keys if user_id is None else game.user_keys.get(user_id, [])
+            start = 0 if after is None else bisect_right(keys, (-after[0], after[1]))
+            rows = []
+            for rank, key in enumerate(keys[start:start + limit], start + 1):
+                row = game.row(key)
+                row['rank'] = rank
+                rows.append(row)
+            return rows, start + limit < len(keys)
+
+    def user_scores(self, game_id, user_id):
+        """Return copies of one player's score rows for the game, highest first."""
+        game = self._game(game_id)
+        with self._lock:
+            return [game.row(key) for key in game.user_keys.get(user_id, [])]
+
+    def score_range(self, game_id, min_score=None, max_score=None):
+        """Return copies of the rows with min_score <= score <= max_score, highest first."""
+        game = self._game(game_id)
+        with self._lock:
+            start = 0 if max_score is None else bisect_left(game.keys, (-max_score,))
+            end = len(game.keys) if min_score is None else bisect_right(game.keys, (-min_score, float('inf')))
+            return [game.row(key) for key in game.keys[start:end]]
+
+    def player_rank(self, game_id, user_id):
+        """
+        Return (rank, best score row, total players) for a player on the game, ranking
+        every player by their best score, or None if the player has no score.
+        """
+        game = self._game(game_id)
+        with self._lock:
+            user_keys = game.user_keys.get(user_id)
+            if not user_keys:
+                return None
+            best = user_keys[0]
+            return bisect_left(game.best_keys, best) + 1, game.row(best), len(game.best_keys)
+
+    def score_count(self, game_id):
+        """Total number of scores stored for the game."""
+        game = self._game(game_id)
+        with self._lock:
+            return len(game.keys)
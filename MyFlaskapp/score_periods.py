@@ -0,0 +1,61 @@
+"""
+Score Periods - calendar windows for time-windowed leaderboards.
+
+Scores are rolled up per day, week (starting Monday) and month in the
+score_rollups table, keyed by the first day of the period. A period is
+closed once its last day has passed; closed periods never change.
+
+Periods follow MySQL's clock: scores are bucketed by their created_at with
+period_start_sql(), and "today" for is_closed() should come from the
+database too (see db.get_database_today), so the app server's timezone
+cannot move a score into a period that has already closed.
+"""
+
+from datetime import date, timedelta
+
+DAILY = 'daily'
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+
+PERIODS = (DAILY, WEEKLY, MONTHLY)
+
+# MySQL for the first day of the period containing a DATE/DATETIME ({0}); % doubled for the driver
+_PERIOD_START_SQL = {
+    DAILY: "DATE({0})",
+    WEEKLY: "DATE_SUB(DATE({0}), INTERVAL WEEKDAY({0}) DAY)",
+    MONTHLY: "DATE_FORMAT({0}, '%%Y-%%m-01')",
+}
+
+
+def period_start(period, day):
+    """First day of the period containing day."""
+    if period == DAILY:
+        return day
+    if period == WEEKLY:
+        return day - timedelta(days=day.weekday())
+    if period == MONTHLY:
+        return day.replace(day=1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def period_start_sql(period, column):
+    """SQL expression for the first day of the period containing column (MySQL's equivalent of period_start)."""
+    if period not in _PERIOD_START_SQL:
+        raise ValueError(f"Unknown period: {period}")
+    return _PERIOD_START_SQL[period].format(column)
+
+
+def next_period_start(period, start):
+    """First day of the period following the one starting on start."""
+    if period == DAILY:
+        return start + timedelta(days=1)
+    if period == WEEKLY:
+        return start + timedelta(days=7)
+    if period == MONTHLY:
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def is_closed(period, start, today=None):
+    """True once every day of the period is in the past."""
+    return next_period_start(period, start) <= (today or date.today())
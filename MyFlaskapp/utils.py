@@ -1,10 +1,12 @@
-from flask import flash
+from flask import flash, current_app
 import re
 import random
 import string
 from datetime import datetime, timedelta
 from flask_mail import Message
 from MyFlaskapp.db import get_db_connection
+from MyFlaskapp.mail_queue import get_mail_queue
+from MyFlaskapp.otp_store import get_otp_store
 
 def Alert_Success(message):
     flash(message, 'success')
@@ -42,48 +44,20 @@ def send_otp_email(email, otp, mail):
         return False
     
     msg = Message('Your OTP Verification Code', recipients=[email])
-    msg.body = f'Your OTP code is: {otp}. It expires in 10 minutes.'
-    try:
-        mail.send(msg)
-        print(f"OTP email sent successfully to {email}")
+    # The same setting the OTP store expires codes by
+    expiry_minutes = current_app.config.get('OTP_EXPIRY_MINUTES', 10)
+    msg.body = f'Your OTP code is: {otp}. It expires in {expiry_minutes} minutes.'
+    # Delivered by the mail queue's workers so the request does not wait on SMTP
+    if get_mail_queue().send(msg):
+        print(f"OTP email queued for {email}")
         return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+    return False
 
 def store_otp(email, otp):
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO otp_verification (email, otp, created_at, expires_at, verified) "
-            "VALUES (%s, %s, NOW(), DATE_ADD(NOW(), INTERVAL 10 MINUTE), FALSE)",
-            (email, otp)
-        )
-        conn.commit()
-        conn.close()
-        return True
-    return False
+    return get_otp_store().store(email, otp)
 
 def verify_otp(email, otp):
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id
-            FROM otp_verification 
-            WHERE email = %s AND otp = %s AND expires_at > NOW() AND verified = FALSE
-        """, (email, otp))
-        record = cursor.fetchone()
-        if record:
-            record_id = record.get('id') if isinstance(record, dict) else None
-            if record_id is not None:
-                cursor.execute("UPDATE otp_verification SET verified = TRUE WHERE id = %s", (record_id,))
-                conn.commit()
-            conn.close()
-            return True
-        conn.close()
-    return False
+    return get_otp_store().verify(email, otp)
 
 def check_duplicate_user(email, username):
     conn = get_db_connection()
@@ -96,17 +70,4 @@ def check_duplicate_user(email, username):
     return False
 
 def can_resend_otp(email):
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT created_at FROM otp_verification WHERE email = %s ORDER BY created_at DESC LIMIT 1", (email,))
-        record = cursor.fetchone()
-        conn.close()
-        if record:
-            last_sent = record['created_at']
-            if isinstance(last_sent, str):
-                last_sent = datetime.fromisoformat(last_sent.replace('Z', '+00:00'))
-            time_diff = datetime.now() - last_sent
-            return time_diff.total_seconds() > 60
-        return True
-    return False
+    return get_otp_store().can_resend(email)
@@ -1,5 +1,7 @@
 -- NinjaVerse Database Schema
 -- Run this in phpMyAdmin or MySQL command line
+-- Existing databases: run scripts/migrate_leaderboard_schema.py instead, which
+-- adds the leaderboard tables and indexes below and backfills them
 
 CREATE DATABASE IF NOT EXISTS gemao_db;
 USE gemao_db;
@@ -34,12 +36,68 @@ CREATE TABLE IF NOT EXISTS games_tb (
 
 -- Scores table
 CREATE TABLE IF NOT EXISTS scores_tb (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    user_id VARCHAR(50),
+    leaderboard_id INT AUTO_INCREMENT PRIMARY KEY,
     game_id INT,
+    user_id INT,
     score INT,
-    date_played DATETIME DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (game_id) REFERENCES games_tb(id)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES user_tb(id),
+    FOREIGN KEY (game_id) REFERENCES games_tb(id),
+    INDEX idx_game_score (game_id, score),
+    INDEX idx_user_score (user_id, score, leaderboard_id),
+    INDEX idx_created_at (created_at)
+);
+
+-- Best score per player per game, maintained by submit_score
+CREATE TABLE IF NOT EXISTS user_best_scores (
+    user_id INT,
+    game_id INT,
+    best_score INT,
+    leaderboard_id INT,
+    achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    play_count INT DEFAULT 0,
+    PRIMARY KEY (user_id, game_id),
+    FOREIGN KEY (user_id) REFERENCES user_tb(id),
+    FOREIGN KEY (game_id) REFERENCES games_tb(id),
+    INDEX idx_game_best (game_id, best_score, leaderboard_id)
+);
+
+-- Best score per player per game for each day, week and month
+CREATE TABLE IF NOT EXISTS score_rollups (
+    period_type VARCHAR(10),
+    period_start DATE,
+    game_id INT,
+    user_id INT,
+    best_score INT,
+    leaderboard_id INT,
+    achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    play_count INT DEFAULT 0,
+    PRIMARY KEY (period_type, period_start, game_id, user_id),
+    FOREIGN KEY (user_id) REFERENCES user_tb(id),
+    FOREIGN KEY (game_id) REFERENCES games_tb(id),
+    INDEX idx_period_best (period_type, period_start, game_id, best_score, leaderboard_id)
+);
+
+-- Append-only log of leaderboard changes, shared by every worker
+CREATE TABLE IF NOT EXISTS score_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(10),
+    game_id INT,
+    data TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_game_event (game_id, id),
+    INDEX idx_event_created (created_at)
+);
+
+-- OTP Verification table
+CREATE TABLE IF NOT EXISTS otp_verification (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    email VARCHAR(100) UNIQUE,
+    otp VARCHAR(6),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NULL DEFAULT NULL,
+    verified BOOLEAN DEFAULT FALSE,
+    INDEX idx_otp_expires (expires_at)
 );
 
 -- User Game Access table
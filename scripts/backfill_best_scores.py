@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Backfill Best Scores Script
+Rebuilds user_best_scores (one row per player per game) from scores_tb.
+
+submit_score keeps the table up to date for new scores; run this once after
+deploying it, or with --game-id to repair a single game.
+"""
+
+import argparse
+import os
+import mysql.connector
+from mysql.connector import Error
+
+
+def get_database_connection():
+    """Get database connection."""
+    try:
+        connection = mysql.connector.connect(
+            host=os.environ.get('DB_HOST', 'localhost'),
+            database=os.environ.get('DB_NAME', 'gemao_db'),
+            user=os.environ.get('DB_USER', 'root'),
+            password=os.environ.get('DB_PASSWORD', '')
+        )
+        return connection
+    except Error as e:
+        print(f"Error connecting to database: {e}")
+        return None
+
+def backfill_best_scores(game_id=None):
+    """Recompute each player's best score, its row and play count from scores_tb."""
+    conn = get_database_connection()
+    if not conn:
+        print("Failed to connect to database")
+        return
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_best_scores (
+                user_id INT,
+                game_id INT,
+                best_score INT,
+                leaderboard_id INT,
+                achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                play_count INT DEFAULT 0,
+                PRIMARY KEY (user_id, game_id),
+                FOREIGN KEY (user_id) REFERENCES user_tb(id),
+                FOREIGN KEY (game_id) REFERENCES games_tb(id),
+                INDEX idx_game_best (game_id, best_score, leaderboard_id)
+            )
+        """)
+
+        game_filter = "WHERE game_id = %s" if game_id is not None else ""
+        params = (game_id,) if game_id is not None else ()
+        if game_id is not None:
+            cursor.execute("DELETE FROM user_best_scores WHERE game_id = %s", params)
+        else:
+            cursor.execute("DELETE FROM user_best_scores")
+
+        # Ties keep the earliest row, matching the leaderboard ordering
+        cursor.execute(f"""
+            INSERT INTO user_best_scores (user_id, game_id, best_score, leaderboard_id, achieved_at, play_count)
+            SELECT user_id, game_id, score, leaderboard_id, created_at, play_count
+            FROM (
+                SELECT user_id, game_id, score, leaderboard_id, created_at,
+                       ROW_NUMBER() OVER (PARTITION BY user_id, game_id
+                                          ORDER BY score DESC, leaderboard_id ASC) AS player_rank,
+                       COUNT(*) OVER (PARTITION BY user_id, game_id) AS play_count
+                FROM scores_tb
+                {game_filter}
+            ) ranked
+            WHERE player_rank = 1
+        """, params)
+
+        conn.commit()
+        print(f"Backfilled best scores for {cursor.rowcount} player/game pairs.")
+
+    except Error as e:
+        print(f"Error backfilling best scores: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--game-id', type=int, help='Only rebuild this game')
+    args = parser.parse_args()
+    backfill_best_scores(args.game_id)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Launch Latency Benchmark
+Compares how long it takes before a game's own code starts running when it is
+launched through game_launcher.py (two cold interpreters), as a plain
+subprocess (one cold interpreter), and on a warm interpreter pool worker.
+
+The benchmark game imports tkinter, pygame and game_base like a real game,
+then reports how many milliseconds passed since the launch was requested and
+exits without opening a window, so it runs headless.
+
+Usage: python scripts/benchmark_launch.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the repository root to the path so the MyFlaskapp package is importable
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from MyFlaskapp.games.warm_pool import WarmInterpreterPool
+
+GAMES_DIR = os.path.join(ROOT, 'MyFlaskapp', 'games')
+LAUNCHER = os.path.join(GAMES_DIR, 'game_launcher.py')
+
+# Reports ms between the launch request (written to started_at next to it) and its first line of game code
+BENCHMARK_GAME = '''
+import os
+import time
+import tkinter
+import pygame
+import game_base
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'started_at')) as f:
+    started_at = float(f.read())
+print(f"FINAL_SCORE:{int((time.time() - started_at) * 1000)}")
+'''
+
+
+def mark_start(game_path):
+    with open(os.path.join(os.path.dirname(game_path), 'started_at'), 'w') as f:
+        f.write(repr(time.time()))
+
+
+def run_cold(command_prefix, game_path):
+    env = dict(os.environ, PYTHONPATH=GAMES_DIR, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    mark_start(game_path)
+    result = subprocess.run(command_prefix + [game_path], capture_output=True, text=True,
+                            cwd=GAMES_DIR, env=env, timeout=60)
+    # game_launcher.py prints just the score; a plain run prints FINAL_SCORE:<n>
+    return int(result.stdout.strip().split(':')[-1])
+
+
+def run_warm(pool, game_path):
+    mark_start(game_path)
+    return pool.run_game(game_path, timeout=60)['score']
+
+
+def summarise(label, samples):
+    print(f"{label:<28} median {statistics.median(samples):7.1f} ms   "
+          f"min {min(samples):7.1f} ms   max {max(samples):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=10, help='launches per strategy')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        game_path = os.path.join(tmp, 'benchmark_game.py')
+        with open(game_path, 'w') as f:
+            f.write(BENCHMARK_GAME)
+
+        launcher = [run_cold([sys.executable, LAUNCHER], game_path) for _ in range(args.runs)]
+        plain = [run_cold([sys.executable], game_path) for _ in range(args.runs)]
+
+        pool = WarmInterpreterPool(GAMES_DIR, size=1, max_runs=args.runs + 1)
+        pool.start()
+        pool.wait_ready()
+        try:
+            warm = [run_warm(pool, game_path) for _ in range(args.runs)]
+        finally:
+            pool.shutdown()
+
+    print(f"Launch-to-game-code latency over {args.runs} runs:")
+    summarise('game_launcher.py (2 hops)', launcher)
+    summarise('plain subprocess (1 hop)', plain)
+    summarise('warm pool worker', warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Compact Score Rollups Script
+Rebuilds the open daily/weekly/monthly leaderboard rollups from scores_tb and
+prunes old daily rollups.
+
+submit_score keeps score_rollups up to date as scores arrive, bucketing each
+score by its created_at on MySQL's clock; run this nightly to reconcile the
+periods still in progress with scores_tb. Periods are taken from the same
+clock here, and closed periods are left alone: they have been served with
+Cache-Control: immutable, so rebuilding one could not reach browsers that
+already hold it. --backfill-since rebuilds closed periods too, for the first
+deploy before the period boards are served. Weekly and monthly rollups are
+kept forever.
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+import mysql.connector
+from mysql.connector import Error
+
+# Add the repository root to the path so the MyFlaskapp package is importable
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from MyFlaskapp.score_periods import DAILY, PERIODS, period_start, period_start_sql
+
+
+def get_database_connection():
+    """Get database connection."""
+    try:
+        connection = mysql.connector.connect(
+            host=os.environ.get('DB_HOST', 'localhost'),
+            database=os.environ.get('DB_NAME', 'gemao_db'),
+            user=os.environ.get('DB_USER', 'root'),
+            password=os.environ.get('DB_PASSWORD', '')
+        )
+        return connection
+    except Error as e:
+        print(f"Error connecting to database: {e}")
+        return None
+
+def compact_score_rollups(keep_daily_days, backfill_since=None):
+    """
+    Rebuild every open period (and, with backfill_since, every closed period
+    starting on or after it) and drop old daily rollups.
+    """
+    conn = get_database_connection()
+    if not conn:
+        print("Failed to connect to database")
+        return
+
+    try:
+        cursor = conn.cursor()
+        # Scores are bucketed on MySQL's clock, so "today" comes from it too
+        cursor.execute("SELECT CURDATE()")
+        today = cursor.fetchone()[0]
+        for period in PERIODS:
+            # Only whole periods are rebuilt, starting from the open one
+            first = period_start(period, today)
+            if backfill_since is not None:
+                first = min(first, period_start(period, backfill_since))
+            start_sql = period_start_sql(period, 'created_at')
+            cursor.execute(
+                "DELETE FROM score_rollups WHERE period_type = %s AND period_start >= %s",
+                (period, first)
+            )
+            # Ties keep the earliest row, matching the leaderboard ordering
+            cursor.execute(f"""
+                INSERT INTO score_rollups (period_type, period_start, game_id, user_id, best_score, leaderboard_id, achieved_at, play_count)
+                SELECT %s, bucket, game_id, user_id, score, leaderboard_id, created_at, play_count
+                FROM (
+                    SELECT {start_sql} AS bucket, game_id, user_id, score, leaderboard_id, created_at,
+                           ROW_NUMBER() OVER (PARTITION BY {start_sql}, game_id, user_id
+                                              ORDER BY score DESC, leaderboard_id ASC) AS player_rank,
+                           COUNT(*) OVER (PARTITION BY {start_sql}, game_id, user_id) AS play_count
+                    FROM scores_tb
+                    WHERE created_at >= %s
+                ) ranked
+                WHERE player_rank = 1
+            """, (period, first))
+            print(f"Rebuilt {cursor.rowcount} {period} rollups since {first}.")
+
+        cutoff = today - timedelta(days=keep_daily_days)
+        cursor.execute(
+            "DELETE FROM score_rollups WHERE period_type = %s AND period_start < %s",
+            (DAILY, cutoff)
+        )
+        print(f"Pruned {cursor.rowcount} daily rollups before {cutoff}.")
+
+        conn.commit()
+
+    except Error as e:
+        print(f"Error compacting score rollups: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--backfill-since', type=date.fromisoformat, default=None,
+                        help='Also rebuild closed periods from this date (first deploy only: '
+                             'closed periods are cached by browsers as immutable)')
+    parser.add_argument('--keep-daily-days', type=int, default=90,
+                        help='Days of daily rollups to keep (default: 90)')
+    args = parser.parse_args()
+    compact_score_rollups(args.keep_daily_days, args.backfill_since)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Migrate Leaderboard Schema Script
+Brings an existing database up to the schema the leaderboards use and backfills it.
+
+db.create_tables() only creates missing tables (and reseeds the default
+data), so a database created before these changes never gets the tables
+submit_score now writes to, or the new indexes on existing tables. This
+script creates the tables, adds any missing indexes, and then fills
+user_best_scores and score_rollups from scores_tb. It is safe to run
+again: existing tables and indexes are left as they are. Run it before
+deploying the new code, while the period leaderboards are not yet served.
+"""
+
+import argparse
+import os
+import sys
+import mysql.connector
+from mysql.connector import Error
+
+# The backfill scripts live next to this one
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backfill_best_scores import backfill_best_scores
+from compact_score_rollups import compact_score_rollups
+
+TABLES = {
+    # Best score per player per game, maintained by submit_score
+    'user_best_scores': """
+        CREATE TABLE IF NOT EXISTS user_best_scores (
+            user_id INT,
+            game_id INT,
+            best_score INT,
+            leaderboard_id INT,
+            achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            play_count INT DEFAULT 0,
+            PRIMARY KEY (user_id, game_id),
+            FOREIGN KEY (user_id) REFERENCES user_tb(id),
+            FOREIGN KEY (game_id) REFERENCES games_tb(id),
+            INDEX idx_game_best (game_id, best_score, leaderboard_id)
+        )
+    """,
+    # Best score per player per game for each day, week and month
+    'score_rollups': """
+        CREATE TABLE IF NOT EXISTS score_rollups (
+            period_type VARCHAR(10),
+            period_start DATE,
+            game_id INT,
+            user_id INT,
+            best_score INT,
+            leaderboard_id INT,
+            achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            play_count INT DEFAULT 0,
+            PRIMARY KEY (period_type, period_start, game_id, user_id),
+            FOREIGN KEY (user_id) REFERENCES user_tb(id),
+            FOREIGN KEY (game_id) REFERENCES games_tb(id),
+            INDEX idx_period_best (period_type, period_start, game_id, best_score, leaderboard_id)
+        )
+    """,
+    # Append-only log of leaderboard changes, shared by every worker
+    'score_events': """
+        CREATE TABLE IF NOT EXISTS score_events (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            kind VARCHAR(10),
+            game_id INT,
+            data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_game_event (game_id, id),
+            INDEX idx_event_created (created_at)
+        )
+    """,
+}
+
+# (table, index, columns) added to tables that already exist
+INDEXES = [
+    ('scores_tb', 'idx_user_score', '(user_id, score, leaderboard_id)'),
+    ('scores_tb', 'idx_created_at', '(created_at)'),
+    ('otp_verification', 'idx_otp_expires', '(expires_at)'),
+]
+
+
+def get_database_connection():
+    """Get database connection."""
+    try:
+        connection = mysql.connector.connect(
+            host=os.environ.get('DB_HOST', 'localhost'),
+            database=os.environ.get('DB_NAME', 'gemao_db'),
+            user=os.environ.get('DB_USER', 'root'),
+            password=os.environ.get('DB_PASSWORD', '')
+        )
+        return connection
+    except Error as e:
+        print(f"Error connecting to database: {e}")
+        return None
+
+def index_exists(cursor, table, index):
+    """True if the current database's table already has the named index."""
+    cursor.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (table, index))
+    return cursor.fetchone() is not None
+
+def migrate_schema():
+    """
+    Create the leaderboard tables and add missing indexes.
+
+    Returns (ok, first_score): whether the migration succeeded, and the
+    date of the earliest score (None if scores_tb is empty).
+    """
+    conn = get_database_connection()
+    if not conn:
+        print("Failed to connect to database")
+        return False, None
+
+    try:
+        cursor = conn.cursor()
+        for name, ddl in TABLES.items():
+            cursor.execute(ddl)
+            print(f"Table {name} is present.")
+
+        for table, index, columns in INDEXES:
+            if index_exists(cursor, table, index):
+                print(f"Index {table}.{index} already exists.")
+                continue
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} {columns}")
+            print(f"Added index {table}.{index}.")
+
+        cursor.execute("SELECT MIN(DATE(created_at)) FROM scores_tb")
+        first_score = cursor.fetchone()[0]
+        conn.commit()
+        return True, first_score
+
+    except Error as e:
+        print(f"Error migrating schema: {e}")
+        conn.rollback()
+        return False, None
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--skip-backfill', action='store_true',
+                        help='Only create tables and indexes')
+    parser.add_argument('--keep-daily-days', type=int, default=90,
+                        help='Days of daily rollups to keep (default: 90)')
+    args = parser.parse_args()
+
+    ok, first_score = migrate_schema()
+    if not ok:
+        sys.exit(1)
+    if not args.skip_backfill:
+        backfill_best_scores()
+        if first_score is not None:
+            compact_score_rollups(args.keep_daily_days, backfill_since=first_score)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Purge OTPs Script
+Deletes expired and already-used codes from otp_verification.
+
+The app also purges on its own every OTP_PURGE_INTERVAL_SECONDS while
+codes are being issued; run this from cron to keep the table small on
+quiet sites too.
+"""
+
+import argparse
+import os
+import mysql.connector
+from mysql.connector import Error
+
+
+def get_database_connection():
+    """Get database connection."""
+    try:
+        connection = mysql.connector.connect(
+            host=os.environ.get('DB_HOST', 'localhost'),
+            database=os.environ.get('DB_NAME', 'gemao_db'),
+            user=os.environ.get('DB_USER', 'root'),
+            password=os.environ.get('DB_PASSWORD', '')
+        )
+        return connection
+    except Error as e:
+        print(f"Error connecting to database: {e}")
+        return None
+
+def purge_otps(dry_run=False):
+    """Delete every OTP that has expired or been verified."""
+    conn = get_database_connection()
+    if not conn:
+        print("Failed to connect to database")
+        return
+
+    try:
+        cursor = conn.cursor()
+        where = "expires_at <= NOW() OR verified = TRUE"
+        if dry_run:
+            cursor.execute(f"SELECT COUNT(*) FROM otp_verification WHERE {where}")
+            print(f"Would delete {cursor.fetchone()[0]} OTP rows.")
+            return
+        cursor.execute(f"DELETE FROM otp_verification WHERE {where}")
+        conn.commit()
+        print(f"Deleted {cursor.rowcount} expired or verified OTP rows.")
+
+    except Error as e:
+        print(f"Error purging OTPs: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Count the rows that would be deleted without deleting them')
+    args = parser.parse_args()
+    purge_otps(args.dry_run)
@@ -55,7 +55,8 @@ def setup_database():
                 expires_at DATETIME,
                 verified BOOLEAN DEFAULT FALSE,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE KEY unique_email_otp (email)
+                UNIQUE KEY unique_email_otp (email),
+                INDEX idx_otp_expires (expires_at)
             )
             """
             cursor.execute(create_otp_table)
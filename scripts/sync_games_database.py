@@ -6,51 +6,16 @@ Updates the database with actual game files from the games directory.
 
 import os
 import sys
-import re
 import mysql.connector
 from mysql.connector import Error
 
-# Add the MyFlaskapp directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'MyFlaskapp'))
+# Add the repository root to the path so the MyFlaskapp package is importable
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-def extract_game_metadata(filepath):
-    """Extract metadata from a game file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        filename = os.path.basename(filepath)
-        
-        # Extract game title from various patterns
-        title_patterns = [
-            r'root\.title\(["\']([^"\']+)["\']\)',
-            r'super\(\).__init__\([^)]*title=["\']([^"\']+)["\']',
-            r'title=["\']([^"\']+)["\']',
-        ]
-        
-        title = None
-        for pattern in title_patterns:
-            match = re.search(pattern, content)
-            if match:
-                title = match.group(1).strip()
-                break
-        
-        # If no title found, use filename
-        if not title:
-            title = filename.replace('.py', '').replace('_', ' ').title()
-        
-        # Set default description
-        description = f'Experience the ninja world in {title}.'
-        
-        return {
-            'name': title,
-            'description': description,
-            'file_path': f'games/{filename}',  # Relative path for launcher
-        }
-        
-    except Exception as e:
-        print(f"Error extracting metadata from {filepath}: {e}")
-        return None
+from MyFlaskapp.games.metadata import extract_game_metadata
+from MyFlaskapp.games.registry import NON_GAME_FILES
 
 
 def get_database_connection():
@@ -70,15 +35,12 @@ def get_database_connection():
 
 def sync_games_database():
     """Sync the games database with the games directory."""
-    games_dir = os.path.join(os.path.dirname(__file__), 'MyFlaskapp', 'games')
-    
-    # List of game files to exclude (utility files, etc.)
-    exclude_files = {'__init__.py', 'game_launcher.py', 'game_base.py', 'routes.py'}
+    games_dir = os.path.join(ROOT, 'MyFlaskapp', 'games')
     
     # Get all game files from directory
     game_files = []
     for filename in os.listdir(games_dir):
-        if filename.endswith('.py') and filename not in exclude_files:
+        if filename.endswith('.py') and filename not in NON_GAME_FILES:
             filepath = os.path.join(games_dir, filename)
             game_info = extract_game_metadata(filepath)
             if game_info:
@@ -6,8 +6,16 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+import importlib
 import pytest
-from MyFlaskapp import create_app
+from MyFlaskapp import config, create_app
+from MyFlaskapp.rate_limiter import rate_limiter
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    """Start each test with no recorded rate-limit attempts."""
+    rate_limiter.attempts.clear()
+    rate_limiter.buckets.clear()
 
 @pytest.fixture
 def app():
@@ -24,6 +32,20 @@ def app():
     with app.app_context():
         yield app
 
+@pytest.fixture
+def app_from_env(monkeypatch):
+    """Build apps with create_app() after setting environment variables, as a deployment would."""
+    def build(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        # Config reads the environment when config.py is imported
+        importlib.reload(config)
+        return create_app()
+    
+    yield build
+    monkeypatch.undo()
+    importlib.reload(config)
+
 @pytest.fixture
 def client(app):
     """A test client for the app."""
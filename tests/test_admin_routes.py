@@ -48,7 +48,7 @@ class TestAdminRoutes:
         response = user_client.get('/admin/dashboard')
         assert response.status_code == 302
 
-    @patch('MyFlaskapp.admin.routes.get_db_connection')
+    @patch('MyFlaskapp.admin.routes.get_db')
     @patch('MyFlaskapp.admin.routes.scan_games_directory')
     def test_admin_dashboard_admin(self, mock_scan, mock_db, admin_client):
         """Test admin dashboard access by admin."""
@@ -382,6 +382,41 @@ class TestAdminRoutes:
         response = admin_client.post('/admin/reset_leaderboard/1')
         assert response.status_code == 302
 
+    @patch('MyFlaskapp.games.launch_jobs.get_launch_queue')
+    def test_launch_queue_stats(self, mock_queue, admin_client):
+        """Test admins can read launch queue depth and active counts."""
+        mock_queue.return_value.stats.return_value = {'active': 2, 'queued': 3}
+        response = admin_client.get('/admin/launch_queue')
+        assert response.status_code == 200
+        assert response.get_json() == {'active': 2, 'queued': 3}
+
+    def test_launch_queue_stats_regular_user(self, user_client):
+        """Test regular users cannot read launch queue stats."""
+        response = user_client.get('/admin/launch_queue')
+        assert response.status_code == 302
+
+    @patch('MyFlaskapp.db.get_top_scores_cache_stats')
+    def test_cache_stats(self, mock_stats, admin_client):
+        """Test admins can read leaderboard cache counters."""
+        mock_stats.return_value = {'hits': 4, 'misses': 1}
+        response = admin_client.get('/admin/cache_stats')
+        assert response.status_code == 200
+        assert response.get_json() == {'top_scores': {'hits': 4, 'misses': 1}}
+
+    @patch('MyFlaskapp.mail_queue.get_mail_queue')
+    def test_mail_queue_stats(self, mock_queue, admin_client):
+        """Test admins can read mail queue depth and delivery counters."""
+        mock_queue.return_value.stats.return_value = {'queued': 1, 'sent': 5}
+        response = admin_client.get('/admin/mail_queue')
+        assert response.status_code == 200
+        assert response.get_json() == {'queued': 1, 'sent': 5}
+
+    def test_cache_stats_regular_user(self, user_client):
+        """Test regular users cannot read cache stats."""
+        response = user_client.get('/admin/cache_stats')
+        assert response.status_code == 302
+
+
 class TestAdminDecorators:
     def test_login_required_decorator(self):
         """Test login_required decorator."""
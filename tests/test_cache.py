@@ -0,0 +1,242 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import json
+import threading
+import time
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from MyFlaskapp.cache import MemoryBackend, RedisBackend, SQLiteBackend, TTLCache, create_backend
+
+
+class TestTTLCache:
+    def test_get_or_load_caches_value(self):
+        """Test a loaded value is served from the cache until it expires."""
+        cache = TTLCache(ttl=60)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return 'value'
+
+        assert cache.get_or_load('k', loader) == 'value'
+        assert cache.get_or_load('k', loader) == 'value'
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+
+    def test_expired_value_is_served_stale_then_dropped(self):
+        """Test values past their TTL are stale until the stale window ends too."""
+        cache = TTLCache(ttl=10, stale_ttl=20)
+        now = time.time()
+        with patch('MyFlaskapp.cache.time.time', return_value=now - 15):
+            cache.set('k', 'old')
+        assert cache.lookup('k') == ('old', False)
+        with patch('MyFlaskapp.cache.time.time', return_value=now + 16):
+            assert cache.lookup('k') == (None, False)
+
+    def test_stale_value_served_while_refreshing(self):
+        """Test only one caller refreshes a stale key; others get the stale value."""
+        cache = TTLCache(ttl=10, stale_ttl=20)
+        with patch('MyFlaskapp.cache.time.time', return_value=time.time() - 15):
+            cache.set('k', 'old')
+        assert cache.claim('k') is True
+
+        assert cache.get_or_load('k', lambda: 'unexpected') == 'old'
+        cache.set('k', 'new')
+        assert cache.lookup('k') == ('new', True)
+
+    def test_single_flight_load(self):
+        """Test concurrent misses on one key run the loader once."""
+        cache = TTLCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(1)
+            return 'value'
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(cache.get_or_load('k', loader)))
+        first.start()
+        started.wait(1)
+        second = threading.Thread(target=lambda: results.append(cache.get_or_load('k', loader)))
+        second.start()
+        release.set()
+        first.join(1)
+        second.join(1)
+
+        assert results == ['value', 'value']
+        assert len(calls) == 1
+
+    def test_failed_load_releases_claim(self):
+        """Test a loader error lets the next caller load the key."""
+        cache = TTLCache()
+
+        def broken():
+            raise RuntimeError('down')
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_load('k', broken)
+        assert cache.get_or_load('k', lambda: 'value') == 'value'
+
+    def test_update_writes_through(self):
+        """Test update rewrites cached values whose keys share the prefix."""
+        cache = TTLCache()
+        cache.set('1:3', [5])
+        cache.set('2:3', [7])
+
+        cache.update('1:', lambda key, value: value + [key])
+
+        assert cache.lookup('1:3') == ([5, '1:3'], True)
+        assert cache.lookup('2:3') == ([7], True)
+
+    def test_invalidate_matching_keys(self):
+        """Test invalidate drops only the keys with the prefix."""
+        cache = TTLCache()
+        cache.set('1:3', 'a')
+        cache.set('11:3', 'b')
+
+        cache.invalidate('1:')
+
+        assert cache.lookup('1:3') == (None, False)
+        assert cache.lookup('11:3') == ('b', True)
+        assert cache.stats()['invalidations'] == 1
+
+    def test_load_racing_invalidation_is_stored_stale(self):
+        """Test a value loaded before an invalidation is refreshed on next use."""
+        cache = TTLCache()
+        assert cache.claim('k') is True
+        cache.invalidate()
+        cache.set('k', 'maybe outdated')
+
+        assert cache.lookup('k') == ('maybe outdated', False)
+
+    def test_namespaces_share_a_backend(self):
+        """Test caches on one backend do not see or clear each other's keys."""
+        backend = MemoryBackend()
+        scores = TTLCache(backend, namespace='scores')
+        other = TTLCache(backend, namespace='other')
+        scores.set('k', 1)
+        other.set('k', 2)
+
+        other.clear()
+
+        assert scores.lookup('k') == (1, True)
+        assert other.lookup('k') == (None, False)
+
+
+class TestMemoryBackend:
+    def test_evicts_least_recently_used(self):
+        """Test the backend never grows past max_entries."""
+        backend = MemoryBackend(max_entries=2)
+        backend.set('a', 1, 60)
+        backend.set('b', 2, 60)
+        backend.get('a')
+        backend.set('c', 3, 60)
+
+        assert backend.get('b') is None
+        assert backend.get('a') == 1
+        assert backend.evictions == 1
+
+    def test_add_only_when_absent(self):
+        """Test add refuses to overwrite a live key but replaces an expired one."""
+        backend = MemoryBackend()
+        assert backend.add('k', 1, 60) is True
+        assert backend.add('k', 2, 60) is False
+        backend.set('old', 1, -1)
+        assert backend.add('old', 2, 60) is True
+        assert backend.get('old') == 2
+
+
+class TestSQLiteBackend:
+    def test_workers_share_entries(self, tmp_path):
+        """Test two backends on one file (as two workers would) see the same cache."""
+        path = str(tmp_path / 'cache.sqlite3')
+        first = TTLCache(SQLiteBackend(path), namespace='scores')
+        second = TTLCache(SQLiteBackend(path), namespace='scores')
+
+        first.set('1:3', [{'score': 10}])
+
+        assert second.lookup('1:3') == ([{'score': 10}], True)
+        second.invalidate('1:')
+        assert first.lookup('1:3') == (None, False)
+
+    def test_claims_are_exclusive_across_workers(self, tmp_path):
+        """Test only one worker at a time may claim the refresh of a key."""
+        path = str(tmp_path / 'cache.sqlite3')
+        first = TTLCache(SQLiteBackend(path))
+        second = TTLCache(SQLiteBackend(path))
+
+        assert first.claim('k') is True
+        assert second.claim('k') is False
+        first.set('k', 'loaded')
+        assert second.wait('k', timeout=1) == 'loaded'
+        assert second.claim('k') is True
+
+    def test_expired_rows_are_ignored_and_pruned(self, tmp_path):
+        """Test expired rows are invisible and removed by prune."""
+        backend = SQLiteBackend(str(tmp_path / 'cache.sqlite3'), max_entries=1)
+        backend.set('gone', 1, -1)
+        backend.set('a', 1, 60)
+        backend.set('b', 2, 120)
+
+        assert backend.get('gone') is None
+        backend.prune()
+        assert backend.keys('') == ['b']
+        assert backend.evictions == 1
+
+    def test_values_are_stored_as_json(self, tmp_path):
+        """Test top-score rows round-trip through JSON, with datetimes as ISO strings."""
+        backend = SQLiteBackend(str(tmp_path / 'cache.sqlite3'))
+        played = datetime(2024, 1, 2, 3, 4, 5)
+        backend.set('k', [{'score': 10, 'username': 'ana', 'date_played': played}], 60)
+
+        raw = backend._execute("SELECT value FROM cache_entries WHERE key = 'k'").fetchone()[0]
+        assert json.loads(raw)[0]['date_played'] == {'__datetime__': '2024-01-02T03:04:05'}
+        assert backend.get('k') == [{'score': 10, 'username': 'ana', 'date_played': played}]
+        with pytest.raises(TypeError):
+            backend.set('k', object(), 60)
+
+
+class TestCreateBackend:
+    def test_selects_backend_from_config(self, tmp_path):
+        """Test CACHE_BACKEND picks the storage, defaulting to per-process memory."""
+        assert isinstance(create_backend({}, str(tmp_path)), MemoryBackend)
+        backend = create_backend({'CACHE_BACKEND': 'sqlite'}, str(tmp_path / 'instance'))
+        assert isinstance(backend, SQLiteBackend)
+        assert backend.path == str(tmp_path / 'instance' / 'cache.sqlite3')
+
+    def test_selected_from_environment(self, app_from_env, tmp_path):
+        """Test CACHE_BACKEND in the environment reaches the top-scores cache through create_app()."""
+        from MyFlaskapp.db import get_top_scores_cache
+        app = app_from_env(CACHE_BACKEND='sqlite', CACHE_SQLITE_PATH=str(tmp_path / 'cache.sqlite3'))
+
+        with app.app_context():
+            assert isinstance(get_top_scores_cache().backend, SQLiteBackend)
+
+    def test_redis_stores_json(self):
+        """Test the redis backend writes JSON rather than pickles."""
+        with patch('MyFlaskapp.cache.redis') as mock_redis:
+            backend = RedisBackend('redis://localhost:6379/0')
+        client = mock_redis.Redis.from_url.return_value
+        client.get.return_value = b'[1700000000.0,{"score":5}]'
+
+        backend.set('k', [1700000000.0, {'score': 5}], 60)
+        assert client.set.call_args[0] == ('k', '[1700000000.0,{"score":5}]')
+        assert backend.get('k') == [1700000000.0, {'score': 5}]
+
+    def test_redis_requires_package(self):
+        """Test the redis backend reports a missing redis package clearly."""
+        with patch('MyFlaskapp.cache.redis', None):
+            with pytest.raises(RuntimeError, match='redis package'):
+                RedisBackend('redis://localhost:6379/0')
@@ -0,0 +1,547 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from mysql.connector.errors import PoolError
+from MyFlaskapp.db_pool import ConnectionPool, get_pool, dispose_pools
+
+
+def make_raw_connection():
+    conn = MagicMock()
+    conn.is_connected.return_value = True
+    conn.in_transaction = False
+    return conn
+
+
+class TestConnectionPool:
+    def setup_method(self):
+        dispose_pools()
+
+    def teardown_method(self):
+        dispose_pools()
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_close_returns_connection_to_pool(self, mock_connect):
+        """Test closing a pooled connection makes it reusable."""
+        raw = make_raw_connection()
+        mock_connect.return_value = raw
+        pool = ConnectionPool({'host': 'localhost'}, pool_size=2)
+
+        conn = pool.acquire()
+        conn.close()
+        again = pool.acquire()
+
+        assert mock_connect.call_count == 1
+        assert again._conn is raw
+        raw.close.assert_not_called()
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_proxy_forwards_attributes(self, mock_connect):
+        """Test the pooled wrapper behaves like the raw connection."""
+        raw = make_raw_connection()
+        mock_connect.return_value = raw
+        pool = ConnectionPool({'host': 'localhost'})
+
+        conn = pool.acquire()
+        conn.cursor(dictionary=True)
+        raw.cursor.assert_called_once_with(dictionary=True)
+
+        conn.close()
+        with pytest.raises(PoolError):
+            conn.cursor()
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_overflow_connections_are_closed(self, mock_connect):
+        """Test connections beyond pool_size are torn down on release."""
+        mock_connect.side_effect = lambda **kw: make_raw_connection()
+        pool = ConnectionPool({'host': 'localhost'}, pool_size=1, max_overflow=1)
+
+        first = pool.acquire()
+        second = pool.acquire()
+        overflow_raw = second._conn
+        first.close()
+        second.close()
+
+        overflow_raw.close.assert_called_once()
+        assert pool.status()['idle'] == 1
+        assert pool.status()['checked_out'] == 0
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_exhausted_pool_times_out(self, mock_connect):
+        """Test acquiring beyond pool_size + max_overflow raises PoolError."""
+        mock_connect.side_effect = lambda **kw: make_raw_connection()
+        pool = ConnectionPool({'host': 'localhost'}, pool_size=1, max_overflow=0, timeout=0.01)
+
+        pool.acquire()
+        with pytest.raises(PoolError):
+            pool.acquire()
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_pre_ping_discards_dead_connection(self, mock_connect):
+        """Test a dead idle connection is replaced rather than handed out."""
+        dead = make_raw_connection()
+        fresh = make_raw_connection()
+        mock_connect.side_effect = [dead, fresh]
+        pool = ConnectionPool({'host': 'localhost'})
+
+        pool.acquire().close()
+        dead.is_connected.return_value = False
+
+        conn = pool.acquire()
+        assert conn._conn is fresh
+        dead.close.assert_called()
+
+    @patch('MyFlaskapp.db_pool.time.time')
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_idle_connection_recycled(self, mock_connect, mock_time):
+        """Test connections idle longer than recycle_seconds are reopened."""
+        mock_connect.side_effect = lambda **kw: make_raw_connection()
+        mock_time.return_value = 1000
+        pool = ConnectionPool({'host': 'localhost'}, recycle_seconds=60)
+
+        conn = pool.acquire()
+        stale_raw = conn._conn
+        conn.close()
+
+        mock_time.return_value = 1100
+        conn = pool.acquire()
+        assert conn._conn is not stale_raw
+        stale_raw.close.assert_called()
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_release_rolls_back_open_transaction(self, mock_connect):
+        """Test a connection is rolled back before going back to the pool."""
+        raw = make_raw_connection()
+        raw.in_transaction = True
+        mock_connect.return_value = raw
+        pool = ConnectionPool({'host': 'localhost'})
+
+        pool.acquire().close()
+        raw.rollback.assert_called_once()
+
+    def test_get_pool_is_shared_per_connect_args(self):
+        """Test the same connection arguments share one pool."""
+        a = get_pool({'host': 'localhost', 'user': 'root'})
+        b = get_pool({'user': 'root', 'host': 'localhost'})
+        c = get_pool({'host': 'otherhost', 'user': 'root'})
+        assert a is b
+        assert a is not c
+
+
+class TestGetDbConnection:
+    def setup_method(self):
+        dispose_pools()
+
+    def teardown_method(self):
+        dispose_pools()
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_get_db_connection_reuses_pooled_connection(self, mock_connect, app):
+        """Test get_db_connection hands back the same physical connection after close."""
+        from MyFlaskapp.db import get_db_connection
+        raw = make_raw_connection()
+        mock_connect.return_value = raw
+
+        get_db_connection().close()
+        get_db_connection().close()
+
+        assert mock_connect.call_count == 1
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_get_db_connection_error_returns_none(self, mock_connect, app):
+        """Test connection errors still surface as None to callers."""
+        from mysql.connector import Error
+        from MyFlaskapp.db import get_db_connection
+        mock_connect.side_effect = Error("boom")
+
+        assert get_db_connection() is None
+
+
+class TestRequestScopedConnection:
+    def setup_method(self):
+        dispose_pools()
+
+    def teardown_method(self):
+        dispose_pools()
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_get_db_shared_within_request(self, mock_connect, app):
+        """Test helpers share one connection per request and teardown releases it."""
+        from MyFlaskapp.db import get_db, get_request_connection_count
+        raw = make_raw_connection()
+        mock_connect.return_value = raw
+
+        with app.app_context(), app.test_request_context('/'):
+            first = get_db()
+            first.close()  # no-op for request-scoped connections
+            second = get_db()
+            assert first is second
+            assert get_request_connection_count() == 1
+            first.cursor(dictionary=True)
+            raw.cursor.assert_called_once_with(dictionary=True, buffered=True)
+
+        # A fresh request reuses the pooled connection released at teardown
+        with app.app_context():
+            get_db()
+            assert get_request_connection_count() == 1
+        assert mock_connect.call_count == 1
+
+    @patch('MyFlaskapp.db_pool.mysql.connector.connect')
+    def test_db_helpers_use_request_connection(self, mock_connect, app):
+        """Test db.py helpers reuse the request connection instead of opening their own."""
+        from MyFlaskapp.db import get_all_scores_for_game, submit_score, get_request_connection_count
+        raw = make_raw_connection()
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [{'id': 7, 'username': 'user'}, {'name': 'Naruto Run', 'max_score': None}]
+        cursor.fetchall.return_value = []
+        raw.cursor.return_value = cursor
+        mock_connect.return_value = raw
+
+        with app.app_context():
+            assert submit_score('221', 1, 50) is True
+            get_all_scores_for_game(1)
+            assert get_request_connection_count() == 1
+
+        assert mock_connect.call_count == 1
+
+
+class TestTopScores:
+    @patch('MyFlaskapp.db.get_db')
+    def test_get_top_scores_for_games_single_query(self, mock_db, app):
+        """Test top scores for several games are fetched with one windowed query."""
+        from MyFlaskapp.db import get_top_scores_for_games
+        mock_cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [
+            {'game_id': 1, 'score': 90, 'username': 'a', 'date_played': None},
+            {'game_id': 1, 'score': 80, 'username': 'b', 'date_played': None},
+            {'game_id': 2, 'score': 70, 'username': 'c', 'date_played': None},
+        ]
+
+        result = get_top_scores_for_games([1, 2, 3], 3)
+
+        mock_cursor.execute.assert_called_once()
+        sql, params = mock_cursor.execute.call_args[0]
+        assert 'ROW_NUMBER() OVER (PARTITION BY l.game_id ORDER BY l.score DESC, l.leaderboard_id)' in sql
+        assert params == (1, 2, 3, 3)
+        assert [s['username'] for s in result[1]] == ['a', 'b']
+        assert result[2] == [{'score': 70, 'username': 'c', 'date_played': None}]
+        assert result[3] == []
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_get_top_scores_for_games_uses_cache(self, mock_db, app):
+        """Test cached games are not queried again."""
+        from MyFlaskapp.db import get_top_scores_for_games
+        mock_cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = []
+
+        get_top_scores_for_games([1, 2], 3)
+        get_top_scores_for_games([1, 2], 3)
+        get_top_scores_for_games([2, 4], 3)
+
+        assert mock_cursor.execute.call_count == 2
+        assert mock_cursor.execute.call_args[0][1] == (4, 3)
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_submit_score_writes_through(self, mock_db, app):
+        """Test a submitted score is folded into cached top lists without a query."""
+        from MyFlaskapp.db import get_top_scores_for_games, submit_score
+        mock_cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [
+            {'game_id': 1, 'score': 90, 'username': 'a', 'date_played': None},
+            {'game_id': 1, 'score': 50, 'username': 'b', 'date_played': None},
+        ]
+        get_top_scores_for_games([1], 2)
+
+        mock_cursor.fetchone.side_effect = [{'id': 7, 'username': 'user'}, {'name': 'Naruto Run', 'max_score': None}]
+        mock_cursor.lastrowid = 3
+        with patch('MyFlaskapp.db.get_score_index'):
+            assert submit_score('221', 1, 60) is True
+        mock_cursor.execute.reset_mock()
+
+        result = get_top_scores_for_games([1], 2)
+
+        mock_cursor.execute.assert_not_called()
+        assert [s['username'] for s in result[1]] == ['a', 'user']
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_delete_scores_invalidates(self, mock_db, app):
+        """Test resetting a game's leaderboard drops its cached top lists."""
+        from MyFlaskapp.db import delete_scores_for_game, get_top_scores_for_games
+        mock_cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = []
+        get_top_scores_for_games([1, 2], 3)
+
+        with patch('MyFlaskapp.db.get_score_index'):
+            assert delete_scores_for_game(1) is True
+        mock_cursor.execute.reset_mock()
+        get_top_scores_for_games([1, 2], 3)
+
+        assert mock_cursor.execute.call_args[0][1] == (1, 3)
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_failed_query_releases_claims(self, mock_db, app):
+        """Test a failed load lets the next request query the game again."""
+        from MyFlaskapp.db import get_top_scores_for_games
+        from mysql.connector import Error
+        mock_cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = mock_cursor
+        mock_cursor.execute.side_effect = [Error('gone'), None]
+        mock_cursor.fetchall.return_value = []
+
+        with pytest.raises(Error):
+            get_top_scores_for_games([1], 3)
+        assert get_top_scores_for_games([1], 3) == {1: []}
+
+
+class TestScoreIndexHelpers:
+    @patch('MyFlaskapp.db.ScoreEventLog')
+    @patch('MyFlaskapp.db.get_db')
+    def test_submit_score_updates_index(self, mock_db, mock_log, app):
+        """Test a submitted score shows up without re-querying the game's scores."""
+        from MyFlaskapp.db import get_all_scores_for_game, submit_score
+        mock_log.return_value.latest_id.return_value = None
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchall.return_value = [
+            {'leaderboard_id': 1, 'user_id': 3, 'score': 40, 'username': 'b', 'date_played': None}
+        ]
+        cursor.fetchone.side_effect = [{'id': 7, 'username': 'user'}, {'name': 'Naruto Run', 'max_score': None}]
+        cursor.lastrowid = 2
+
+        assert [s['score'] for s in get_all_scores_for_game(1)] == [40]
+        assert submit_score('221', 1, 50) is True
+        scores = get_all_scores_for_game(1)
+
+        assert [(s['username'], s['score']) for s in scores] == [('user', 50), ('b', 40)]
+        assert cursor.fetchall.call_count == 1
+
+    @patch('MyFlaskapp.db.ScoreEventLog')
+    @patch('MyFlaskapp.db.get_db')
+    def test_delete_scores_invalidates_index(self, mock_db, mock_log, app):
+        """Test resetting a game's leaderboard drops its cached index."""
+        from MyFlaskapp.db import delete_scores_for_game, get_all_scores_for_game
+        mock_log.return_value.latest_id.return_value = None
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchall.side_effect = [
+            [{'leaderboard_id': 1, 'user_id': 3, 'score': 40, 'username': 'b', 'date_played': None}],
+            []
+        ]
+
+        assert len(get_all_scores_for_game(1)) == 1
+        assert delete_scores_for_game(1) is True
+        assert get_all_scores_for_game(1) == []
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_user_scores_page_uses_keyset(self, mock_db, app):
+        """Test cross-game personal pages seek past the cursor and fetch one extra row."""
+        from MyFlaskapp.db import get_user_scores_page
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchall.return_value = [{'leaderboard_id': n, 'score': 10 - n} for n in range(3)]
+
+        rows, has_more = get_user_scores_page(7, after=(12, 4), limit=2)
+
+        sql, params = cursor.execute.call_args[0]
+        assert 'l.score < %s OR (l.score = %s AND l.leaderboard_id > %s)' in sql
+        assert 'ORDER BY l.score DESC, l.leaderboard_id ASC' in sql
+        assert params == (7, 12, 12, 4, 3)
+        assert len(rows) == 2
+        assert has_more is True
+
+
+class TestBestScores:
+    @patch('MyFlaskapp.db.get_db')
+    def test_submit_score_upserts_best_score_in_same_transaction(self, mock_db, app):
+        """Test the per-player best score is upserted before the score insert is committed."""
+        from MyFlaskapp.db import submit_score
+        conn = mock_db.return_value
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchone.side_effect = [{'id': 7, 'username': 'user'}, {'name': 'Naruto Run', 'max_score': None}]
+        cursor.lastrowid = 11
+        calls = []
+        cursor.execute.side_effect = lambda sql, params=None: calls.append((sql, params))
+        conn.commit.side_effect = lambda: calls.append(('COMMIT', None))
+
+        assert submit_score('221', 1, 50) is True
+
+        statements = [sql.strip().split('\n')[0] for sql, _ in calls]
+        assert statements[-5].startswith('INSERT INTO scores_tb')
+        assert statements[-4].startswith('INSERT INTO user_best_scores')
+        assert statements[-3].startswith('INSERT INTO score_rollups')
+        assert statements[-2].startswith('INSERT INTO score_events')
+        assert statements[-1] == 'COMMIT'
+        upsert, params = calls[-4]
+        assert 'ON DUPLICATE KEY UPDATE' in upsert
+        assert upsert.rstrip().endswith('best_score = GREATEST(best_score, VALUES(best_score))')
+        assert params == (7, 1, 50, 11)
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_delete_scores_clears_best_scores(self, mock_db, app):
+        """Test a leaderboard reset also clears the game's best scores."""
+        from MyFlaskapp.db import delete_scores_for_game
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+
+        assert delete_scores_for_game(3) is True
+        executed = [call[0][0] for call in cursor.execute.call_args_list]
+        assert "DELETE FROM user_best_scores WHERE game_id = %s" in executed
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_delete_scores_records_reset_event(self, mock_db, app):
+        """Test a leaderboard reset bumps the game's shared version in its transaction."""
+        from MyFlaskapp.db import delete_scores_for_game
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+
+        assert delete_scores_for_game(3) is True
+        sql, params = cursor.execute.call_args_list[-1][0]
+        assert sql.startswith('INSERT INTO score_events')
+        assert params == ('reset', 3, '{}')
+
+    @patch('MyFlaskapp.db.get_db_connection')
+    def test_score_event_log_reads_settled_rows(self, mock_conn, app):
+        """Test the shared log is read past an id, oldest first, skipping rows that may not have settled."""
+        from MyFlaskapp.db import ScoreEventLog
+        cursor = mock_conn.return_value.cursor.return_value
+        cursor.fetchall.return_value = [{'id': 8, 'kind': 'score', 'game_id': 1, 'data': '{"score": 5}'}]
+
+        events = []
+        # The hub's poller reads the log from its own thread, outside any app context
+        poller = threading.Thread(target=lambda: events.extend(ScoreEventLog(app, settle_seconds=2).events_after(7, 100)))
+        poller.start()
+        poller.join()
+
+        assert events == [(8, 'score', 1, {'score': 5})]
+        sql, params = cursor.execute.call_args[0]
+        assert 'created_at <= NOW() - INTERVAL %s SECOND' in sql
+        assert params == (7, 2, 100)
+        mock_conn.return_value.close.assert_called_once()
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_game_events_for_index(self, mock_db, app):
+        """Test an index catching up reads one game's events, settled or not, on the request connection."""
+        from datetime import datetime
+        from MyFlaskapp.db import ScoreEventLog
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchall.return_value = [
+            {'id': 8, 'kind': 'score', 'settled': 1,
+             'data': '{"leaderboard_id": 3, "user_id": 7, "score": 5, "date_played": "2024-05-16 10:00:00"}'},
+            {'id': 9, 'kind': 'reset', 'settled': 0, 'data': None}
+        ]
+
+        events = ScoreEventLog(app, settle_seconds=2).game_events_after(1, 7, 500)
+
+        assert events[0] == (8, 'score', {'leaderboard_id': 3, 'user_id': 7, 'score': 5,
+                                          'date_played': datetime(2024, 5, 16, 10)}, True)
+        assert events[1] == (9, 'reset', {}, False)
+        sql, params = cursor.execute.call_args[0]
+        assert 'WHERE game_id = %s AND id > %s' in sql
+        assert params == (2, 1, 7, 500)
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_score_version_reads_latest_event(self, mock_db, app):
+        """Test a game's version is the id of its latest event in the shared log."""
+        from MyFlaskapp.db import get_score_version
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchone.return_value = {'id': 42, 'modified': 1700000000}
+
+        assert get_score_version(3) == (42, 1700000000)
+        sql, params = cursor.execute.call_args[0]
+        assert 'WHERE game_id = %s ORDER BY id DESC LIMIT 1' in sql
+        assert params == (3,)
+
+        cursor.fetchone.return_value = None
+        assert get_score_version(3) == (0, None)
+        mock_db.return_value = None
+        assert get_score_version(3) == (None, None)
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_best_scores_page(self, mock_db, app):
+        """Test the best-per-player board is read from user_best_scores with a keyset."""
+        from MyFlaskapp.db import get_best_scores_page
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchall.return_value = [{'leaderboard_id': 4, 'score': 30}]
+
+        rows, has_more = get_best_scores_page(2, after=(40, 9), limit=5)
+
+        sql, params = cursor.execute.call_args[0]
+        assert 'FROM user_best_scores b' in sql
+        assert 'ORDER BY b.best_score DESC, b.leaderboard_id ASC' in sql
+        assert params == (2, 40, 40, 9, 6)
+        assert has_more is False
+
+
+class TestScoreRollups:
+    @patch('MyFlaskapp.db.get_db')
+    def test_submit_score_rolls_up_each_period(self, mock_db, app):
+        """Test a score is upserted into its day's, week's and month's boards, bucketed by its created_at."""
+        from MyFlaskapp.db import submit_score
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchone.side_effect = [{'id': 7, 'username': 'user'}, {'name': 'Naruto Run', 'max_score': None}]
+        cursor.lastrowid = 11
+
+        assert submit_score('221', 1, 50) is True
+
+        sql, params = next(c[0] for c in cursor.execute.call_args_list
+                           if c[0][0].strip().startswith('INSERT INTO score_rollups'))
+        assert 'ON DUPLICATE KEY UPDATE' in sql
+        assert 'DATE(created_at) AS rollup_start' in sql
+        assert 'INTERVAL WEEKDAY(created_at) DAY' in sql
+        assert sql.count('FROM scores_tb WHERE leaderboard_id = %s') == 3
+        assert params == (11, 'daily', 11, 'weekly', 11, 'monthly', 11)
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_database_today_follows_mysql_clock(self, mock_db, app):
+        """Test "today" for periods comes from MySQL's clock, not the app server's."""
+        from datetime import date, datetime, timedelta
+        from MyFlaskapp import db
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchone.return_value = (datetime.now() + timedelta(days=1),)
+        try:
+            assert db.get_database_today() == date.today() + timedelta(days=1)
+            assert db.get_database_today(lag_seconds=86400) == date.today()
+            db.get_database_today()
+            assert cursor.execute.call_count == 1  # the offset is cached
+        finally:
+            db._DATABASE_CLOCK.update(offset=None, checked=0)
+
+    @patch('MyFlaskapp.db.get_db', return_value=None)
+    def test_database_today_without_database(self, mock_db, app):
+        """Test the server's date is used while the database is unavailable."""
+        from datetime import date
+        from MyFlaskapp.db import get_database_today
+        assert get_database_today() == date.today()
+
+    @patch('MyFlaskapp.db.get_db')
+    def test_period_player_best_rank(self, mock_db, app):
+        """Test a player's period rank counts the players ahead of them with an indexed COUNT."""
+        from datetime import date
+        from MyFlaskapp.db import get_period_player_best
+        cursor = MagicMock()
+        mock_db.return_value.cursor.return_value = cursor
+        cursor.fetchone.side_effect = [{'leaderboard_id': 11, 'score': 50}, {'better': 3}]
+
+        row = get_period_player_best(1, 'weekly', date(2024, 5, 13), 7)
+
+        assert row['rank'] == 4
+        sql, params = cursor.execute.call_args[0]
+        assert 'COUNT(*)' in sql
+        assert params == ('weekly', date(2024, 5, 13), 1, 50, 50, 11)
@@ -0,0 +1,110 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import time
+import pytest
+from MyFlaskapp.games.game_launcher import GameLauncher, OutputTail
+from MyFlaskapp.games.warm_pool import WarmInterpreterPool
+
+GAMES_DIR = os.path.join(ROOT, 'MyFlaskapp', 'games')
+
+# Prints a lot more than the output cap, with the score marker early on
+CHATTY_GAME = '''
+import sys
+print("FINAL_SCORE:64")
+for i in range(200000):
+    print(f"frame {i} " + "x" * 40)
+    print("warning", i, file=sys.stderr)
+'''
+
+
+def write_game(tmp_path, body, name='game.py'):
+    game_file = tmp_path / name
+    game_file.write_text(body)
+    return str(game_file)
+
+
+class TestOutputTail:
+    def test_keeps_last_characters(self):
+        """Test only the most recent output is kept once the cap is exceeded."""
+        tail = OutputTail(10)
+        tail.append('hello ')
+        tail.append('world ')
+        tail.append('again')
+        assert tail.text() == 'orld again'
+        assert tail.truncated is True
+
+    def test_under_cap_untouched(self):
+        """Test short output is kept verbatim."""
+        tail = OutputTail(100)
+        tail.append('FINAL_SCORE:5\n')
+        assert tail.text() == 'FINAL_SCORE:5\n'
+        assert tail.truncated is False
+
+
+class TestStreamingLaunch:
+    def test_output_bounded(self, tmp_path):
+        """Test a chatty game's output is capped while its early score is still captured."""
+        launcher = GameLauncher(write_game(tmp_path, CHATTY_GAME), timeout=60, max_output_chars=4096)
+        result = launcher.launch_game()
+
+        assert result['score'] == 64
+        assert len(result['stdout']) <= 4096
+        assert len(result['stderr']) <= 4096
+        assert result['output_truncated'] is True
+        assert result['stdout'].rstrip().endswith('x' * 40)
+
+    def test_fallback_to_last_number(self, tmp_path):
+        """Test games without a marker still report the last number printed."""
+        result = GameLauncher(write_game(tmp_path, 'print("Score")\nprint(17)\n'), timeout=30).launch_game()
+        assert result['score'] == 17
+        assert result['output_truncated'] is False
+
+    def test_stop_on_score_terminates_early(self, tmp_path):
+        """Test a game that lingers after printing its score is stopped when asked."""
+        game = write_game(tmp_path, 'import time\nprint("FINAL_SCORE:8", flush=True)\ntime.sleep(30)\n')
+        started = time.monotonic()
+        result = GameLauncher(game, timeout=60, stop_on_score=True).launch_game()
+
+        assert result['score'] == 8
+        assert time.monotonic() - started < 10
+
+    def test_timeout(self, tmp_path):
+        """Test overrunning games are killed and reported as timed out."""
+        game = write_game(tmp_path, 'import time\ntime.sleep(30)\n')
+        result = GameLauncher(game, timeout=0.5).launch_game()
+        assert result['success'] is False
+        assert result['timed_out'] is True
+
+    def test_warm_pool_output_bounded(self, tmp_path):
+        """Test warm pool replies carry only the tail of a chatty game's output."""
+        pool = WarmInterpreterPool(GAMES_DIR, size=1, max_output_chars=4096)
+        pool.start()
+        try:
+            result = pool.run_game(write_game(tmp_path, CHATTY_GAME), timeout=60)
+        finally:
+            pool.shutdown()
+
+        assert result['score'] == 64
+        assert len(result['stdout']) <= 4096
+        assert result['output_truncated'] is True
+
+    def test_warm_pool_stop_on_score(self, tmp_path):
+        """Test a warm worker stops a lingering game at its score and is replaced."""
+        game = write_game(tmp_path, 'import time\nprint("FINAL_SCORE:8", flush=True)\ntime.sleep(30)\n')
+        pool = WarmInterpreterPool(GAMES_DIR, size=1)
+        pool.start()
+        try:
+            started = time.monotonic()
+            result = pool.run_game(game, timeout=60, stop_on_score=True)
+            assert time.monotonic() - started < 10
+            assert result['score'] == 8
+            assert result['stopped_on_score'] is True
+            assert pool.run_game(write_game(tmp_path, 'print("FINAL_SCORE:3")\n', 'next.py'), timeout=30)['score'] == 3
+        finally:
+            pool.shutdown()
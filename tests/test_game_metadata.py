@@ -0,0 +1,149 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import json
+import pytest
+from unittest.mock import patch
+from MyFlaskapp.games.metadata import parse_game_source, extract_game_metadata, MetadataCache
+
+
+class TestParseGameSource:
+    def test_root_title(self):
+        """Test root.title("...") is used as the game title."""
+        source = '''
+import tkinter as tk
+class ShurikenGame:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Naruto: Shuriken Target Practice")
+'''
+        parsed = parse_game_source(source)
+        assert parsed == {'title': 'Naruto: Shuriken Target Practice', 'class_name': 'ShurikenGame'}
+
+    def test_super_init_title_keyword(self):
+        """Test title= passed to super().__init__ is picked up."""
+        source = '''
+class RoofRunGame(GameBase):
+    def __init__(self):
+        super().__init__(screen_width=800, title="Naruto: Infinite Roof Run")
+'''
+        assert parse_game_source(source)['title'] == 'Naruto: Infinite Roof Run'
+
+    def test_non_literal_title_ignored(self):
+        """Test root.title(variable) does not shadow a literal title elsewhere."""
+        source = '''
+class GameBase:
+    def __init__(self, title):
+        self.root.title(title)
+
+class NinjaCatGame(GameBase):
+    def __init__(self):
+        super().__init__(title="Catch the Ninja Cats")
+'''
+        parsed = parse_game_source(source)
+        assert parsed['title'] == 'Catch the Ninja Cats'
+        assert parsed['class_name'] == 'NinjaCatGame'
+
+    def test_pygame_caption(self):
+        """Test pygame window captions are recognised."""
+        source = '''
+import pygame
+class NarutoRun:
+    def __init__(self):
+        pygame.display.set_caption('Naruto Run')
+'''
+        assert parse_game_source(source)['title'] == 'Naruto Run'
+
+    def test_main_guard_class_preferred(self):
+        """Test the class started under __main__ is chosen as the game class."""
+        source = '''
+class Helper:
+    pass
+
+class ClashGameEnhanced:
+    pass
+
+if __name__ == "__main__":
+    ClashGameEnhanced().run()
+'''
+        assert parse_game_source(source)['class_name'] == 'ClashGameEnhanced'
+
+    def test_strings_in_comments_ignored(self):
+        """Test titles inside comments or docstrings are not mistaken for real ones."""
+        source = '''
+"""Usage: root.title("Not A Title")"""
+# title="Also Not"
+class Quiet:
+    pass
+'''
+        assert parse_game_source(source) == {'title': None, 'class_name': 'Quiet'}
+
+
+class TestExtractGameMetadata:
+    def test_extract_metadata_shape(self, tmp_path):
+        """Test extracted metadata has the fields the routes expect."""
+        game_file = tmp_path / 'shuriken_game.py'
+        game_file.write_text('class ShurikenGame:\n    title = None\n    def __init__(self):\n        self.root.title("Shuriken")\n')
+        cache = MetadataCache(str(tmp_path / 'cache.json'))
+
+        metadata = extract_game_metadata(str(game_file), cache=cache)
+
+        assert metadata == {
+            'id': 'shuriken_game.py',
+            'name': 'Shuriken',
+            'description': 'Practice your aim with shuriken target practice.',
+            'file_path': 'games/shuriken_game.py',
+            'filename': 'shuriken_game.py',
+            'class_name': 'ShurikenGame'
+        }
+
+    def test_unparseable_file_falls_back_to_filename(self, tmp_path):
+        """Test a file with a syntax error still gets a filename-based title."""
+        game_file = tmp_path / 'broken_game.py'
+        game_file.write_text('class Broken(:\n')
+        cache = MetadataCache(str(tmp_path / 'cache.json'))
+
+        metadata = extract_game_metadata(str(game_file), cache=cache)
+        assert metadata['name'] == 'Broken Game'
+        assert metadata['class_name'] == 'UnknownGame'
+
+    def test_cache_persists_across_instances(self, tmp_path):
+        """Test a new process reuses parsed metadata for unchanged files."""
+        game_file = tmp_path / 'tree_game.py'
+        game_file.write_text('class TreeGame:\n    def __init__(self):\n        self.root.title("Tree")\n')
+        cache_path = str(tmp_path / 'cache.json')
+
+        extract_game_metadata(str(game_file), cache=MetadataCache(cache_path))
+        with open(cache_path) as f:
+            assert len(json.load(f)) == 1
+
+        with patch('MyFlaskapp.games.metadata.parse_game_source') as mock_parse:
+            metadata = extract_game_metadata(str(game_file), cache=MetadataCache(cache_path))
+            mock_parse.assert_not_called()
+        assert metadata['name'] == 'Tree'
+
+    def test_changed_source_reparsed(self, tmp_path):
+        """Test editing a game invalidates its cached metadata."""
+        game_file = tmp_path / 'tree_game.py'
+        cache = MetadataCache(str(tmp_path / 'cache.json'))
+
+        game_file.write_text('class TreeGame:\n    def __init__(self):\n        self.root.title("Old")\n')
+        extract_game_metadata(str(game_file), cache=cache)
+        game_file.write_text('class TreeGame:\n    def __init__(self):\n        self.root.title("New")\n')
+
+        assert extract_game_metadata(str(game_file), cache=cache)['name'] == 'New'
+
+    def test_corrupt_cache_ignored(self, tmp_path):
+        """Test an unreadable cache file is treated as empty."""
+        cache_path = tmp_path / 'cache.json'
+        cache_path.write_text('{not json')
+        game_file = tmp_path / 'tree_game.py'
+        game_file.write_text('class TreeGame:\n    pass\n')
+
+        metadata = extract_game_metadata(str(game_file), cache=MetadataCache(str(cache_path)))
+        assert metadata['class_name'] == 'TreeGame'
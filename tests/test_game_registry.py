@@ -0,0 +1,96 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+from unittest.mock import MagicMock
+from MyFlaskapp.games.registry import GameRegistry
+
+
+@pytest.fixture
+def games_dir(tmp_path):
+    (tmp_path / 'alpha_game.py').write_text('class AlphaGame: pass\n')
+    (tmp_path / 'beta_game.py').write_text('class BetaGame: pass\n')
+    (tmp_path / 'routes.py').write_text('# not a game\n')
+    (tmp_path / 'notes.txt').write_text('ignored\n')
+    return tmp_path
+
+
+def make_loader():
+    return MagicMock(side_effect=lambda path: {
+        'filename': os.path.basename(path),
+        'name': os.path.basename(path)[:-3],
+    })
+
+
+class TestGameRegistry:
+    def test_list_games_skips_non_game_files(self, games_dir):
+        """Test only game modules are registered, ordered by filename."""
+        registry = GameRegistry(str(games_dir), make_loader())
+        names = [game['filename'] for game in registry.list_games()]
+        assert names == ['alpha_game.py', 'beta_game.py']
+
+    def test_files_parsed_once(self, games_dir):
+        """Test unchanged files are not re-parsed on later lookups."""
+        loader = make_loader()
+        registry = GameRegistry(str(games_dir), loader, check_interval=0)
+
+        registry.list_games()
+        registry.list_games()
+        registry.get('alpha_game.py')
+
+        assert loader.call_count == 2
+
+    def test_changed_file_reparsed(self, games_dir):
+        """Test a file whose size changes is re-parsed."""
+        loader = make_loader()
+        registry = GameRegistry(str(games_dir), loader, check_interval=0)
+        registry.list_games()
+
+        (games_dir / 'alpha_game.py').write_text('class AlphaGame:\n    title = "changed"\n')
+        registry.list_games()
+
+        assert loader.call_count == 3
+        assert loader.call_args[0][0].endswith('alpha_game.py')
+
+    def test_added_and_removed_files(self, games_dir):
+        """Test new files appear and deleted files disappear after revalidation."""
+        registry = GameRegistry(str(games_dir), make_loader(), check_interval=0)
+        registry.list_games()
+
+        (games_dir / 'gamma_game.py').write_text('class GammaGame: pass\n')
+        (games_dir / 'beta_game.py').unlink()
+
+        names = [game['filename'] for game in registry.list_games()]
+        assert names == ['alpha_game.py', 'gamma_game.py']
+
+    def test_check_interval_throttles_revalidation(self, games_dir):
+        """Test the directory is not re-checked within check_interval."""
+        registry = GameRegistry(str(games_dir), make_loader(), check_interval=3600)
+        registry.list_games()
+
+        (games_dir / 'gamma_game.py').write_text('class GammaGame: pass\n')
+        assert registry.get('gamma_game.py') is None
+
+        registry.refresh(force=True)
+        assert registry.get('gamma_game.py') is not None
+
+    def test_get_returns_copy(self, games_dir):
+        """Test callers can annotate returned metadata without polluting the cache."""
+        registry = GameRegistry(str(games_dir), make_loader())
+        game = registry.get('alpha_game.py')
+        game['top_scores'] = [1, 2, 3]
+
+        assert 'top_scores' not in registry.get('alpha_game.py')
+        assert registry.get('missing.py') is None
+
+    def test_failed_parse_is_not_listed(self, games_dir):
+        """Test files the loader cannot parse are skipped."""
+        loader = MagicMock(return_value=None)
+        registry = GameRegistry(str(games_dir), loader)
+        assert registry.list_games() == []
+        assert registry.get('alpha_game.py') is None
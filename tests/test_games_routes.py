@@ -77,7 +77,7 @@ class TestGamesRoutes:
         assert response.status_code == 302  # Redirect to admin dashboard
 
     @patch('MyFlaskapp.games.routes.scan_games_directory')
-    @patch('MyFlaskapp.games.routes.get_db_connection')
+    @patch('MyFlaskapp.games.routes.get_db')
     def test_games_list_authenticated(self, mock_db, mock_scan, authenticated_client):
         """Test games list access with authentication."""
         mock_scan.return_value = [
@@ -100,14 +100,15 @@ class TestGamesRoutes:
         
         with patch('MyFlaskapp.games.routes.get_or_create_game_in_db') as mock_create:
             mock_create.return_value = 1
-            with patch('MyFlaskapp.db.get_top_scores_for_game') as mock_scores:
-                mock_scores.return_value = []
+            with patch('MyFlaskapp.db.get_top_scores_for_games') as mock_scores:
+                mock_scores.return_value = {}
                 
                 response = authenticated_client.get('/games/')
                 assert response.status_code == 200
+                mock_scores.assert_called_once_with([1], 3)
 
     @patch('MyFlaskapp.games.routes.scan_games_directory')
-    @patch('MyFlaskapp.games.routes.get_db_connection')
+    @patch('MyFlaskapp.games.routes.get_db')
     def test_games_list_with_db_scores(self, mock_db, mock_scan, authenticated_client):
         """Test games list with database scores."""
         mock_scan.return_value = [
@@ -129,28 +130,29 @@ class TestGamesRoutes:
             {'id': 1, 'file_path': 'games/test_game.py', 'name': 'Test Game'}
         ]
         
-        with patch('MyFlaskapp.db.get_top_scores_for_game') as mock_scores:
-            mock_scores.return_value = [
+        with patch('MyFlaskapp.db.get_top_scores_for_games') as mock_scores:
+            mock_scores.return_value = {1: [
                 {'username': 'user1', 'score': 100},
                 {'username': 'user2', 'score': 80}
-            ]
+            ]}
             
             response = authenticated_client.get('/games/')
             assert response.status_code == 200
+            assert b'user1' in response.data
+            mock_scores.assert_called_once_with([1], 3)
 
-    @patch('MyFlaskapp.games.routes.scan_games_directory')
-    def test_play_game_by_filename_unauthenticated(self, mock_scan, client):
+    @patch('MyFlaskapp.games.routes.get_game_by_filename')
+    def test_play_game_by_filename_unauthenticated(self, mock_get_game, client):
         """Test game play without authentication."""
-        mock_scan.return_value = []
+        mock_get_game.return_value = None
         response = client.get('/games/play/test_game.py')
         assert response.status_code == 302
 
-    @patch('MyFlaskapp.games.routes.scan_games_directory')
+    @patch('MyFlaskapp.games.routes.get_game_by_filename')
     @patch('MyFlaskapp.games.routes.check_game_access')
-    def test_play_game_by_filename_access_denied(self, mock_access, mock_scan, authenticated_client):
+    def test_play_game_by_filename_access_denied(self, mock_access, mock_get_game, authenticated_client):
         """Test game play with access denied."""
-        mock_scan.return_value = [
-            {
+        mock_get_game.return_value = {
                 'id': 'test_game.py',
                 'name': 'Test Game',
                 'description': 'A test game',
@@ -158,18 +160,16 @@ class TestGamesRoutes:
                 'filename': 'test_game.py',
                 'class_name': 'TestGame'
             }
-        ]
         mock_access.return_value = False
         
         response = authenticated_client.get('/games/play/test_game.py')
         assert response.status_code == 302  # Redirect to games list
 
-    @patch('MyFlaskapp.games.routes.scan_games_directory')
+    @patch('MyFlaskapp.games.routes.get_game_by_filename')
     @patch('MyFlaskapp.games.routes.check_game_access')
-    def test_play_game_by_filename_success(self, mock_access, mock_scan, authenticated_client):
+    def test_play_game_by_filename_success(self, mock_access, mock_get_game, authenticated_client):
         """Test successful game play by filename."""
-        mock_scan.return_value = [
-            {
+        mock_get_game.return_value = {
                 'id': 'test_game.py',
                 'name': 'Test Game',
                 'description': 'A test game',
@@ -177,17 +177,16 @@ class TestGamesRoutes:
                 'filename': 'test_game.py',
                 'class_name': 'TestGame'
             }
-        ]
         mock_access.return_value = True
         
         response = authenticated_client.get('/games/play/test_game.py')
         assert response.status_code == 200
 
-    @patch('MyFlaskapp.games.routes.scan_games_directory')
+    @patch('MyFlaskapp.games.routes.get_game_by_filename')
     @patch('MyFlaskapp.games.routes.check_game_access')
-    def test_play_game_by_filename_not_found(self, mock_access, mock_scan, authenticated_client):
+    def test_play_game_by_filename_not_found(self, mock_access, mock_get_game, authenticated_client):
         """Test game play with non-existent game."""
-        mock_scan.return_value = []  # No games found
+        mock_get_game.return_value = None  # No game found
         mock_access.return_value = True
         
         response = authenticated_client.get('/games/play/nonexistent.py')
@@ -407,7 +406,7 @@ class TestGameUtilities:
         result = check_game_access('user123', 'test_game.py')
         assert result is True
 
-    @patch('MyFlaskapp.games.routes.get_db_connection')
+    @patch('MyFlaskapp.games.routes.get_db')
     def test_get_or_create_game_in_db_existing(self, mock_db):
         """Test getting existing game from database."""
         from MyFlaskapp.games.routes import get_or_create_game_in_db
@@ -422,7 +421,7 @@ class TestGameUtilities:
         result = get_or_create_game_in_db(game)
         assert result == 1
 
-    @patch('MyFlaskapp.games.routes.get_db_connection')
+    @patch('MyFlaskapp.games.routes.get_db')
     def test_get_or_create_game_in_db_new(self, mock_db):
         """Test creating new game in database."""
         from MyFlaskapp.games.routes import get_or_create_game_in_db
@@ -438,7 +437,7 @@ class TestGameUtilities:
         result = get_or_create_game_in_db(game)
         assert result == 5
 
-    @patch('MyFlaskapp.games.routes.get_db_connection')
+    @patch('MyFlaskapp.games.routes.get_db')
     def test_get_or_create_game_in_db_error(self, mock_db):
         """Test game database operation with error."""
         from MyFlaskapp.games.routes import get_or_create_game_in_db
@@ -454,20 +453,26 @@ class TestGameScanning:
         """Test scanning games directory."""
         from MyFlaskapp.games.routes import scan_games_directory
         
-        # This test would need to mock os.listdir and other file operations
-        with patch('os.listdir') as mock_listdir:
-            mock_listdir.return_value = ['test_game.py', 'another_game.py', '__init__.py']
+        with patch('MyFlaskapp.games.routes.game_registry') as mock_registry:
+            mock_registry.list_games.return_value = [
+                {'name': 'Test Game', 'description': 'A test game', 'file_path': 'games/test_game.py'},
+                {'name': 'Another Game', 'description': 'Another test game', 'file_path': 'games/another_game.py'}
+            ]
             
-            with patch('MyFlaskapp.games.routes.extract_game_metadata') as mock_extract:
-                mock_extract.side_effect = [
-                    {'name': 'Test Game', 'description': 'A test game', 'file_path': 'games/test_game.py'},
-                    {'name': 'Another Game', 'description': 'Another test game', 'file_path': 'games/another_game.py'}
-                ]
-                
-                games = scan_games_directory()
-                assert len(games) == 2
-                assert games[0]['name'] == 'Test Game'
-                assert games[1]['name'] == 'Another Game'
+            games = scan_games_directory()
+            assert len(games) == 2
+            assert games[0]['name'] == 'Test Game'
+            assert games[1]['name'] == 'Another Game'
+
+    def test_scan_games_directory_real_games(self):
+        """Test the registry finds the bundled games and skips utility modules."""
+        from MyFlaskapp.games.routes import scan_games_directory, get_game_by_filename
+        
+        filenames = {game['filename'] for game in scan_games_directory()}
+        assert 'naruto_run.py' in filenames
+        assert not filenames & {'__init__.py', 'game_launcher.py', 'game_base.py', 'routes.py', 'registry.py'}
+        assert get_game_by_filename('naruto_run.py')['file_path'] == 'games/naruto_run.py'
+        assert get_game_by_filename('routes.py') is None
 
     def test_extract_game_metadata(self):
         """Test extracting metadata from game file."""
@@ -497,7 +502,7 @@ class NarutoGame:
 
     def test_generate_description_from_title(self):
         """Test generating description from title."""
-        from MyFlaskapp.games.routes import generate_description_from_title
+        from MyFlaskapp.games.metadata import generate_description_from_title
         
         # Test known keywords
         desc = generate_description_from_title('Naruto Typing Game', 'typing_game.py')
@@ -507,3 +512,160 @@ class NarutoGame:
         desc = generate_description_from_title('Unknown Game', 'unknown.py')
         assert 'ninja world' in desc.lower()
         assert 'Unknown Game' in desc
+
+class TestLaunchJobRoutes:
+    @patch('MyFlaskapp.games.routes.get_launch_queue')
+    @patch('MyFlaskapp.games.routes.get_game_by_filename')
+    @patch('MyFlaskapp.games.routes.check_game_access')
+    def test_launch_by_filename_enqueues_job(self, mock_access, mock_get_game, mock_queue, authenticated_client):
+        """Test launching returns a job id immediately instead of running the game inline."""
+        mock_access.return_value = True
+        mock_get_game.return_value = {'name': 'Naruto Run', 'filename': 'naruto_run.py', 'file_path': 'games/naruto_run.py'}
+        mock_job = MagicMock(id='abc123', status='queued')
+        mock_queue.return_value.submit.return_value = mock_job
+        mock_queue.return_value.position.return_value = 2
+        
+        response = authenticated_client.get('/games/launch_game/naruto_run.py',
+                                            headers={'X-Requested-With': 'XMLHttpRequest'})
+        
+        assert response.status_code == 202
+        assert response.get_json() == {
+            'job_id': 'abc123', 'status': 'queued', 'queue_position': 2, 'status_url': '/games/jobs/abc123'
+        }
+        user_id, game_name, run, on_finish = mock_queue.return_value.submit.call_args[0]
+        assert user_id == 'test123'
+        assert game_name == 'Naruto Run'
+
+    @patch('MyFlaskapp.games.routes.get_launch_queue')
+    @patch('MyFlaskapp.games.routes.get_game_by_filename')
+    @patch('MyFlaskapp.games.routes.check_game_access')
+    def test_launch_by_filename_redirects_with_job(self, mock_access, mock_get_game, mock_queue, authenticated_client):
+        """Test browser launches redirect to the play page tracking the job."""
+        mock_access.return_value = True
+        mock_get_game.return_value = {'name': 'Naruto Run', 'filename': 'naruto_run.py', 'file_path': 'games/naruto_run.py'}
+        mock_queue.return_value.submit.return_value = MagicMock(id='abc123', status='queued')
+        
+        response = authenticated_client.get('/games/launch_game/naruto_run.py')
+        
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/games/play/naruto_run.py?job=abc123')
+
+    @patch('MyFlaskapp.games.routes.get_launch_queue')
+    @patch('MyFlaskapp.games.routes.get_game_by_filename')
+    @patch('MyFlaskapp.games.routes.check_game_access')
+    def test_launch_rejected_when_queue_full(self, mock_access, mock_get_game, mock_queue, authenticated_client):
+        """Test a full launch queue answers AJAX launches with 429."""
+        from MyFlaskapp.games.launch_jobs import LaunchQueueFull
+        mock_access.return_value = True
+        mock_get_game.return_value = {'name': 'Naruto Run', 'filename': 'naruto_run.py', 'file_path': 'games/naruto_run.py'}
+        mock_queue.return_value.submit.side_effect = LaunchQueueFull('Too many games are waiting to launch.')
+        
+        response = authenticated_client.get('/games/launch_game/naruto_run.py',
+                                            headers={'X-Requested-With': 'XMLHttpRequest'})
+        
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '30'
+        assert response.get_json()['success'] is False
+
+    @patch('MyFlaskapp.games.routes.get_launch_queue')
+    @patch('MyFlaskapp.games.routes.get_game_by_filename')
+    @patch('MyFlaskapp.games.routes.check_game_access')
+    def test_launch_rejected_browser_redirect(self, mock_access, mock_get_game, mock_queue, authenticated_client):
+        """Test a full launch queue sends browsers back to the play page."""
+        from MyFlaskapp.games.launch_jobs import LaunchQueueFull
+        mock_access.return_value = True
+        mock_get_game.return_value = {'name': 'Naruto Run', 'filename': 'naruto_run.py', 'file_path': 'games/naruto_run.py'}
+        mock_queue.return_value.submit.side_effect = LaunchQueueFull('Too many games are waiting to launch.')
+        
+        response = authenticated_client.get('/games/launch_game/naruto_run.py')
+        
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/games/play/naruto_run.py')
+
+    @patch('MyFlaskapp.games.routes.get_warm_pool')
+    @patch('MyFlaskapp.games.routes.get_launch_queue')
+    def test_enqueued_job_saves_score(self, mock_queue, mock_pool, app):
+        """Test the queued run captures the score and saves it on completion."""
+        from MyFlaskapp.games.routes import enqueue_game_launch
+        from MyFlaskapp.games.launch_jobs import LaunchJob, COMPLETED
+        mock_pool.return_value.run_game.return_value = {'success': True, 'score': 120}
+        
+        with app.test_request_context('/games/launch_game/1'):
+            session['user_id'] = 'test123'
+            enqueue_game_launch('Test Game', '/tmp/game.py', lambda: 5, '/games/')
+        
+        _, _, run, on_finish = mock_queue.return_value.submit.call_args[0]
+        job = LaunchJob('test123', 'Test Game')
+        job.score = run()['score']
+        job.status = COMPLETED
+        mock_pool.return_value.run_game.assert_called_once_with('/tmp/game.py', 300, stop_on_score=False)
+        with patch('MyFlaskapp.db.submit_score') as mock_submit:
+            mock_submit.return_value = True
+            on_finish(job)
+            mock_submit.assert_called_once_with('test123', 5, 120)
+        assert job.score_saved is True
+        assert job.message == 'Game completed! Score: 120'
+
+    @patch('MyFlaskapp.games.game_launcher.subprocess.Popen')
+    def test_run_game_file_single_process(self, mock_popen):
+        """Test games without a warm pool run as one child process, not via game_launcher.py."""
+        import io
+        import sys
+        from MyFlaskapp.games.routes import run_game_file
+        mock_popen.return_value.stdout = io.StringIO('Loading...\nFINAL_SCORE:42\n')
+        mock_popen.return_value.stderr = io.StringIO('')
+        mock_popen.return_value.wait.return_value = 0
+        
+        assert run_game_file('/games/shuriken_game.py', 300)['score'] == 42
+        mock_popen.assert_called_once()
+        assert mock_popen.call_args[0][0] == [sys.executable, '/games/shuriken_game.py']
+        assert mock_popen.call_args[1]['cwd'] == '/games'
+
+    @patch('MyFlaskapp.games.game_launcher.subprocess.Popen')
+    def test_run_game_file_timeout(self, mock_popen):
+        """Test a timed-out game is killed and surfaces as TimeoutExpired for the launch queue."""
+        import io
+        import subprocess
+        from MyFlaskapp.games.routes import run_game_file
+        mock_popen.return_value.stdout = io.StringIO('')
+        mock_popen.return_value.stderr = io.StringIO('')
+        mock_popen.return_value.wait.side_effect = [subprocess.TimeoutExpired('python', 300), -9]
+        
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_game_file('/games/shuriken_game.py', 300)
+        mock_popen.return_value.kill.assert_called_once()
+
+    @patch('MyFlaskapp.games.game_launcher.subprocess.Popen')
+    def test_run_game_file_error(self, mock_popen):
+        """Test launcher errors are raised so the job is marked failed."""
+        from MyFlaskapp.games.routes import run_game_file
+        mock_popen.side_effect = OSError('no python')
+        
+        with pytest.raises(RuntimeError, match='no python'):
+            run_game_file('/games/shuriken_game.py', 300)
+
+    @patch('MyFlaskapp.games.routes.get_launch_queue')
+    def test_job_status(self, mock_queue, authenticated_client):
+        """Test the status endpoint reports the owner's job."""
+        mock_queue.return_value.status.return_value = {'job_id': 'abc123', 'status': 'running'}
+        
+        response = authenticated_client.get('/games/jobs/abc123')
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'running'
+        mock_queue.return_value.status.assert_called_once_with('abc123', 'test123')
+
+    @patch('MyFlaskapp.games.routes.get_launch_queue')
+    def test_job_status_other_user(self, mock_queue, authenticated_client):
+        """Test users cannot read someone else's launch job."""
+        mock_queue.return_value.status.return_value = None
+        
+        response = authenticated_client.get('/games/jobs/abc123')
+        assert response.status_code == 404
+
+    @patch('MyFlaskapp.games.routes.get_launch_queue')
+    def test_job_status_unknown(self, mock_queue, authenticated_client):
+        """Test unknown job ids return 404."""
+        mock_queue.return_value.status.return_value = None
+        
+        response = authenticated_client.get('/games/jobs/missing')
+        assert response.status_code == 404
@@ -216,16 +216,18 @@ class TestIntegration:
         
         # Step 1: View games list
         with patch('MyFlaskapp.games.routes.get_or_create_game_in_db') as mock_create:
-            with patch('MyFlaskapp.db.get_top_scores_for_game') as mock_scores:
+            with patch('MyFlaskapp.db.get_top_scores_for_games') as mock_scores:
                 mock_create.return_value = 1
-                mock_scores.return_value = []
+                mock_scores.return_value = {}
                 
                 response = client.get('/games/')
                 assert response.status_code == 200
         
         # Step 2: Play game
-        with patch('MyFlaskapp.games.routes.check_game_access') as mock_access:
+        with patch('MyFlaskapp.games.routes.check_game_access') as mock_access, \
+             patch('MyFlaskapp.games.routes.get_game_by_filename') as mock_get_game:
             mock_access.return_value = True
+            mock_get_game.return_value = mock_scan.return_value[0]
             
             response = client.get('/games/play/test_game.py')
             assert response.status_code == 200
@@ -505,16 +507,19 @@ class TestEndToEndScenarios:
                 
                 # View games
                 with patch('MyFlaskapp.games.routes.get_or_create_game_in_db') as mock_create:
-                    with patch('MyFlaskapp.db.get_top_scores_for_game') as mock_scores:
+                    with patch('MyFlaskapp.db.get_top_scores_for_games') as mock_scores:
                         mock_create.return_value = 1
-                        mock_scores.return_value = []
+                        mock_scores.return_value = {}
                         
                         response = client.get('/games/')
                         assert response.status_code == 200
                 
                 # Play game
-                response = client.get('/games/play/simple_game.py')
-                assert response.status_code == 200
+                with patch('MyFlaskapp.games.routes.get_game_by_filename') as mock_get_game:
+                    mock_get_game.return_value = mock_scan.return_value[0]
+                    
+                    response = client.get('/games/play/simple_game.py')
+                    assert response.status_code == 200
         
         # Step 6: Update profile
         # Reset fetchone to return None for duplicate check (no other users have same username/email)
@@ -0,0 +1,269 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import subprocess
+import threading
+import pytest
+from unittest.mock import MagicMock
+from MyFlaskapp.cache import SQLiteBackend
+from MyFlaskapp.games.launch_jobs import (
+    LaunchJobQueue, LaunchQueueFull, SQLiteLaunchSlots, get_launch_queue,
+    QUEUED, RUNNING, COMPLETED, FAILED, TIMED_OUT
+)
+
+
+def wait_for(job, timeout=5):
+    event = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if job.finished:
+            return job
+        event.wait(0.01)
+    raise AssertionError(f'job did not finish: {job.status}')
+
+
+class TestLaunchJobQueue:
+    def setup_method(self):
+        self.queue = LaunchJobQueue(max_workers=2, max_per_user=2)
+
+    def teardown_method(self):
+        self.queue.shutdown()
+
+    def test_submit_returns_immediately(self):
+        """Test submit hands back a queued job without waiting for the game."""
+        release = threading.Event()
+        job = self.queue.submit('user1', 'Test Game', lambda: release.wait(5) and 42)
+
+        assert job.status in (QUEUED, RUNNING)
+        assert self.queue.get(job.id) is job
+
+        release.set()
+        wait_for(job)
+        assert job.status == COMPLETED
+        assert job.score == 42
+
+    def test_on_finish_called_with_job(self):
+        """Test the completion callback runs after the game with the captured score."""
+        on_finish = MagicMock()
+        job = self.queue.submit('user1', 'Test Game', lambda: 100, on_finish)
+        wait_for(job)
+        self.queue.shutdown()
+        on_finish.assert_called_once_with(job)
+
+    def test_timeout_status(self):
+        """Test a timed-out launch is reported as timed out."""
+        def run():
+            raise subprocess.TimeoutExpired('python', 300)
+        job = wait_for(self.queue.submit('user1', 'Test Game', run))
+        assert job.status == TIMED_OUT
+        assert job.score is None
+
+    def test_failure_status(self):
+        """Test launcher errors are captured on the job."""
+        def run():
+            raise RuntimeError('boom')
+        job = wait_for(self.queue.submit('user1', 'Test Game', run))
+        assert job.status == FAILED
+        assert 'boom' in job.message
+
+    def test_worker_pool_is_bounded(self):
+        """Test no more than max_workers launches run at once."""
+        release = threading.Event()
+        jobs = [self.queue.submit('user1', 'Game', lambda: release.wait(5) and 1) for _ in range(3)]
+
+        for _ in range(100):
+            if sum(job.status == RUNNING for job in jobs) == 2:
+                break
+            threading.Event().wait(0.01)
+        assert sum(job.status == RUNNING for job in jobs) == 2
+        assert jobs[2].status == QUEUED
+
+        release.set()
+        for job in jobs:
+            wait_for(job)
+
+    def test_finished_jobs_pruned_after_retention(self):
+        """Test old finished jobs are forgotten when new jobs arrive."""
+        queue = LaunchJobQueue(max_workers=1, retention_seconds=0)
+        old = wait_for(queue.submit('user1', 'Game', lambda: 1))
+        old.created_at -= 10
+        queue.submit('user1', 'Game', lambda: 1)
+        assert queue.get(old.id) is None
+        queue.shutdown()
+
+    def test_launcher_result_telemetry(self):
+        """Test a launcher result dict fills in both the score and the session telemetry."""
+        telemetry = {'duration': 12.5, 'frames': 700, 'events': []}
+        job = wait_for(self.queue.submit('user1', 'Game', lambda: {'score': 30, 'telemetry': telemetry}))
+        assert job.score == 30
+        assert job.to_dict()['telemetry'] == telemetry
+
+    def test_to_dict(self):
+        """Test the status payload exposes progress and score."""
+        job = wait_for(self.queue.submit('user1', 'Test Game', lambda: 7))
+        data = job.to_dict()
+        assert data['job_id'] == job.id
+        assert data['status'] == COMPLETED
+        assert data['finished'] is True
+        assert data['score'] == 7
+        assert data['game'] == 'Test Game'
+
+
+class TestAdmissionControl:
+    def setup_method(self):
+        self.release = threading.Event()
+        self.queue = LaunchJobQueue(max_workers=2, max_per_user=1, max_queued=2)
+
+    def teardown_method(self):
+        self.release.set()
+        self.queue.shutdown()
+
+    def blocked(self):
+        return self.release.wait(5) and 1
+
+    def test_per_user_limit(self):
+        """Test a user's second launch waits while other users can still start."""
+        first = self.queue.submit('user1', 'Game', self.blocked)
+        second = self.queue.submit('user1', 'Game', self.blocked)
+        other = self.queue.submit('user2', 'Game', self.blocked)
+
+        assert first.status == RUNNING
+        assert second.status == QUEUED
+        assert other.status == RUNNING
+        assert self.queue.position(second) == 1
+
+        self.release.set()
+        for job in (first, second, other):
+            wait_for(job)
+        assert second.status == COMPLETED
+
+    def test_queue_positions_and_rejection(self):
+        """Test waiting launches report their position and overflow is rejected."""
+        self.queue.submit('user1', 'Game', self.blocked)
+        self.queue.submit('user2', 'Game', self.blocked)
+        waiting = [self.queue.submit(f'user{i}', 'Game', self.blocked) for i in (3, 4)]
+
+        assert [self.queue.position(job) for job in waiting] == [1, 2]
+        assert self.queue.job_status(waiting[1])['queue_position'] == 2
+        with pytest.raises(LaunchQueueFull):
+            self.queue.submit('user5', 'Game', self.blocked)
+
+    def test_stats(self):
+        """Test the monitoring counters reflect running and waiting launches."""
+        self.queue.submit('user1', 'Game', self.blocked)
+        self.queue.submit('user1', 'Game', self.blocked)
+
+        stats = self.queue.stats()
+        assert stats['active'] == 1
+        assert stats['queued'] == 1
+        assert stats['active_users'] == 1
+        assert stats['max_queued'] == 2
+
+
+class TestSharedAdmission:
+    def setup_method(self):
+        self.release = threading.Event()
+        self.queues = []
+
+    def teardown_method(self):
+        self.release.set()
+        for queue in self.queues:
+            queue.shutdown()
+
+    def worker(self, path, max_workers=2, max_per_user=1):
+        queue = LaunchJobQueue(
+            max_workers=max_workers, max_per_user=max_per_user,
+            slots=SQLiteLaunchSlots(path, max_workers, max_per_user), poll_seconds=0.05
+        )
+        self.queues.append(queue)
+        return queue
+
+    def blocked(self):
+        return self.release.wait(5) and 1
+
+    def test_limits_cover_every_worker(self, tmp_path):
+        """Test the global and per-user limits are counted across workers sharing the slots."""
+        path = str(tmp_path / 'slots.sqlite3')
+        first, second = self.worker(path), self.worker(path)
+
+        assert first.submit('user1', 'Game', self.blocked).status == RUNNING
+        assert second.submit('user1', 'Game', self.blocked).status == QUEUED
+        assert second.submit('user2', 'Game', self.blocked).status == RUNNING
+        assert first.submit('user3', 'Game', self.blocked).status == QUEUED
+        assert first.stats()['active'] == 2
+        assert first.stats()['local_active'] == 1
+
+    def test_waiting_job_starts_when_other_worker_frees_slot(self, tmp_path):
+        """Test a queued launch starts once a game on another worker finishes."""
+        path = str(tmp_path / 'slots.sqlite3')
+        first, second = self.worker(path, max_workers=1), self.worker(path, max_workers=1)
+        running = first.submit('user1', 'Game', self.blocked)
+        waiting = second.submit('user2', 'Game', lambda: 5)
+        assert waiting.status == QUEUED
+
+        self.release.set()
+        wait_for(running)
+        assert wait_for(waiting).score == 5
+
+    def test_abandoned_slots_expire(self, tmp_path):
+        """Test slots never released by a dead worker are reclaimed after their lease."""
+        slots = SQLiteLaunchSlots(str(tmp_path / 'slots.sqlite3'), 1, 1, lease_seconds=0.1)
+        assert slots.acquire('job1', 'user1') is True
+        assert slots.acquire('job2', 'user2') is False
+        threading.Event().wait(0.2)
+        assert slots.acquire('job2', 'user2') is True
+
+
+class TestSharedJobStatus:
+    def test_status_visible_from_other_workers(self, tmp_path):
+        """Test a job accepted by one worker can be polled through another."""
+        path = str(tmp_path / 'cache.sqlite3')
+        accepting = LaunchJobQueue(max_workers=1, store=SQLiteBackend(path))
+        other = LaunchJobQueue(max_workers=1, store=SQLiteBackend(path))
+        try:
+            release = threading.Event()
+            job = accepting.submit('user1', 'Game', lambda: release.wait(5) and 42)
+            assert other.status(job.id, 'user1')['status'] == RUNNING
+            assert other.status(job.id, 'user2') is None
+
+            release.set()
+            wait_for(job)
+            for _ in range(100):
+                if other.status(job.id, 'user1')['status'] == COMPLETED:
+                    break
+                threading.Event().wait(0.01)
+            status = other.status(job.id, 'user1')
+            assert status['status'] == COMPLETED
+            assert status['score'] == 42
+            assert status['game'] == 'Game'
+        finally:
+            accepting.shutdown()
+            other.shutdown()
+
+    def test_status_without_store(self):
+        """Test jobs unknown to a worker without a shared store are not found."""
+        queue = LaunchJobQueue(max_workers=1)
+        job = wait_for(queue.submit('user1', 'Game', lambda: 1))
+        assert queue.status(job.id, 'user1')['score'] == 1
+        assert queue.status(job.id, 'user2') is None
+        assert queue.status('missing', 'user1') is None
+        queue.shutdown()
+
+
+class TestGetLaunchQueue:
+    def test_queue_created_from_config(self, app, tmp_path):
+        """Test the app's queue is built from config and reused."""
+        app.extensions.pop('launch_queue', None)
+        app.config['LAUNCH_MAX_WORKERS'] = 3
+        app.config['LAUNCH_SLOTS_SQLITE_PATH'] = str(tmp_path / 'slots.sqlite3')
+        queue = get_launch_queue()
+        assert queue.max_workers == 3
+        assert isinstance(queue.slots, SQLiteLaunchSlots)
+        assert queue.slots.max_active == 3
+        assert get_launch_queue() is queue
+        queue.shutdown()
+        app.extensions.pop('launch_queue', None)
@@ -0,0 +1,368 @@
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch, MagicMock
+from MyFlaskapp import create_app
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+    return app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def authenticated_client(client):
+    """Create an authenticated client for testing."""
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'test123'
+        sess['user_name'] = 'Test User'
+        sess['user_role'] = 'user'
+    return client
+
+def score_row(leaderboard_id, user_id, score):
+    return {'leaderboard_id': leaderboard_id, 'user_id': user_id, 'score': score,
+            'username': f'user{user_id}', 'date_played': None}
+
+@pytest.fixture
+def mock_conn():
+    """Patch the database so routes and the score index share one mocked connection."""
+    conn = MagicMock()
+    cursor = MagicMock()
+    conn.cursor.return_value = cursor
+    cursor.fetchall.return_value = [
+        score_row(1, 7, 40), score_row(2, 8, 90), score_row(3, 7, 60), score_row(4, 9, 10)
+    ]
+    with patch('MyFlaskapp.leaderboard.routes.get_db', return_value=conn), \
+            patch('MyFlaskapp.db.get_db', return_value=conn), \
+            patch('MyFlaskapp.leaderboard.routes.get_score_version', return_value=(4, 1700000000)) as version, \
+            patch('MyFlaskapp.leaderboard.routes.get_database_today', return_value=date.today()) as today:
+        conn.score_version = version
+        conn.database_today = today
+        yield conn
+
+class TestGameRankApi:
+    def test_rank_unauthenticated(self, client):
+        """Test the rank endpoint requires login."""
+        response = client.get('/leaderboard/game/1/rank')
+        assert response.status_code == 302
+
+    def test_rank_for_player(self, mock_conn, authenticated_client):
+        """Test a player's best score, rank, player count and percentile are returned."""
+        mock_conn.cursor.return_value.fetchone.side_effect = [{'name': 'Test Game'}, {'id': 7}]
+        
+        response = authenticated_client.get('/leaderboard/game/1/rank')
+        data = response.get_json()
+        
+        assert response.status_code == 200
+        assert data['ranked'] is True
+        assert data['best_score'] == 60
+        assert data['rank'] == 2
+        assert data['total_players'] == 3
+        assert data['percentile'] == pytest.approx(66.7)
+
+    def test_rank_without_scores(self, mock_conn, authenticated_client):
+        """Test players with no score on the game are reported as unranked."""
+        mock_conn.cursor.return_value.fetchone.side_effect = [{'name': 'Test Game'}, {'id': 42}]
+        
+        response = authenticated_client.get('/leaderboard/game/1/rank')
+        assert response.status_code == 200
+        assert response.get_json()['ranked'] is False
+
+    def test_rank_game_not_found(self, mock_conn, authenticated_client):
+        """Test unknown games return 404."""
+        mock_conn.cursor.return_value.fetchone.side_effect = [None]
+        
+        response = authenticated_client.get('/leaderboard/game/999/rank')
+        assert response.status_code == 404
+
+class TestLeaderboardStream:
+    def test_stream_unauthenticated(self, client):
+        """Test the stream requires login."""
+        response = client.get('/leaderboard/stream')
+        assert response.status_code == 302
+
+    def test_stream_pushes_score_events(self, app, mock_conn, authenticated_client):
+        """Test new scores for the watched game are pushed, tagged for the viewer."""
+        from datetime import datetime
+        from MyFlaskapp.score_events import ScoreEventHub, SCORE, RESET
+        app.config['LEADERBOARD_STREAM_MAX_SECONDS'] = 0.2
+        app.config['LEADERBOARD_STREAM_KEEPALIVE_SECONDS'] = 0.05
+        mock_conn.cursor.return_value.fetchone.return_value = {'id': 7}
+        hub = app.extensions['score_events'] = ScoreEventHub()
+        hub.publish(SCORE, 1, {'leaderboard_id': 5, 'user_id': 7, 'username': 'user7', 'score': 80,
+                               'game_name': 'Test Game', 'date_played': datetime(2024, 1, 2, 3, 4, 5)})
+        hub.publish(SCORE, 2, {'leaderboard_id': 6, 'user_id': 8, 'username': 'user8', 'score': 10})
+        hub.publish(RESET, 1)
+        
+        response = authenticated_client.get('/leaderboard/stream?game_id=1', headers={'Last-Event-ID': '0'},
+                                            environ_overrides={'wsgi.multithread': True})
+        body = response.get_data(as_text=True)
+        
+        assert response.mimetype == 'text/event-stream'
+        assert 'id: 1\nevent: score\n' in body
+        assert '"mine": true' in body
+        assert '"date_played": "2024-01-02 03:04:05"' in body
+        assert '"user_id"' not in body
+        assert 'user8' not in body
+        assert 'id: 3\nevent: reset\n' in body
+        assert hub.listeners == 0
+
+    def test_stream_declined_without_threads(self, app, mock_conn, authenticated_client):
+        """Test a single-threaded worker answers 204 so the browser polls instead of holding it."""
+        from MyFlaskapp.score_events import ScoreEventHub
+        app.extensions['score_events'] = ScoreEventHub()
+        
+        response = authenticated_client.get('/leaderboard/stream', environ_overrides={'wsgi.multithread': False})
+        
+        assert response.status_code == 204
+
+    def test_stream_declined_past_client_limit(self, app, mock_conn, authenticated_client):
+        """Test a worker holding LEADERBOARD_STREAM_MAX_CLIENTS streams declines more."""
+        from MyFlaskapp.score_events import ScoreEventHub
+        app.config['LEADERBOARD_STREAM_MAX_CLIENTS'] = 1
+        hub = app.extensions['score_events'] = ScoreEventHub()
+        hub.subscribe()
+        
+        response = authenticated_client.get('/leaderboard/stream', environ_overrides={'wsgi.multithread': True})
+        
+        assert response.status_code == 204
+
+    @patch('MyFlaskapp.leaderboard.routes.get_user_scores_page')
+    def test_global_cursor_leaves_personal_ranks(self, mock_page, mock_conn, authenticated_client):
+        """Test paging the global list does not shift the ranks of the player's own list."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'id': 7}
+        mock_page.side_effect = lambda *args: ([{'leaderboard_id': 3, 'score': 60, 'date_played': None}], False)
+        
+        data = authenticated_client.get('/leaderboard/api/data?view=global&after=90:2:5').get_json()
+        assert data['user_scores'][0]['rank'] == 1
+        assert mock_page.call_args[0][1] is None
+        
+        data = authenticated_client.get('/leaderboard/api/data?view=personal&after=90:2:5').get_json()
+        assert data['user_scores'][0]['rank'] == 6
+        
+        response = authenticated_client.get('/leaderboard/?view=global&after=90:2:5')
+        assert response.status_code == 200
+
+class TestLeaderboardApiRateLimit:
+    def test_game_api_sheds_aggressive_polling(self, app, mock_conn, authenticated_client):
+        """Test a caller past its burst gets 429 without touching the database."""
+        app.config['API_RATE_LIMITS'] = {'leaderboard.game_leaderboard_api': {'user': (60, 1)}}
+        mock_conn.cursor.return_value.fetchone.side_effect = [{'name': 'Test Game'}, {'id': 7}]
+        
+        response = authenticated_client.get('/leaderboard/game/1/api/data')
+        assert response.status_code == 200
+        assert response.headers['RateLimit-Limit'] == '1'
+        assert response.headers['RateLimit-Remaining'] == '0'
+        mock_conn.cursor.reset_mock()
+        
+        response = authenticated_client.get('/leaderboard/game/1/api/data')
+        
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+        mock_conn.cursor.assert_not_called()
+
+    def test_configured_policy_applies(self, mock_conn, authenticated_client):
+        """Test create_app() loads the API_RATE_LIMITS policies from Config."""
+        from MyFlaskapp.rate_limiter import rate_limiter
+        mock_conn.cursor.return_value.fetchone.return_value = {'id': 7}
+        
+        response = authenticated_client.get('/leaderboard/api/data')
+        
+        assert response.status_code == 200
+        assert response.headers['RateLimit-Limit'] == '10'
+        assert 'api_leaderboard.leaderboard_api_test123' in rate_limiter.buckets
+        assert 'api_leaderboard.leaderboard_api' not in rate_limiter.buckets
+
+class TestConditionalLeaderboardApi:
+    def test_game_api_sets_etag(self, mock_conn, authenticated_client):
+        """Test leaderboard data is tagged for revalidation."""
+        mock_conn.cursor.return_value.fetchone.side_effect = [{'name': 'Test Game'}, {'id': 7}]
+        
+        response = authenticated_client.get('/leaderboard/game/1/api/data?view=global')
+        
+        assert response.status_code == 200
+        assert response.headers['ETag']
+        assert response.headers['Last-Modified']
+        assert 'no-cache' in response.headers['Cache-Control']
+
+    def test_game_api_not_modified_skips_database(self, mock_conn, authenticated_client):
+        """Test an unchanged leaderboard is answered with 304 without running its queries."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        authenticated_client.get('/leaderboard/game/1/api/data')  # loads the game's index
+        etag = authenticated_client.get('/leaderboard/game/1/api/data').headers['ETag']
+        mock_conn.cursor.reset_mock()
+        
+        response = authenticated_client.get('/leaderboard/game/1/api/data', headers={'If-None-Match': etag})
+        
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        mock_conn.cursor.assert_not_called()
+        mock_conn.score_version.assert_called_with(1)
+
+    def test_etag_changes_with_shared_version(self, mock_conn, authenticated_client):
+        """Test a new score event for the game, from any worker, invalidates its ETag."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        etag = authenticated_client.get('/leaderboard/game/1/api/data').headers['ETag']
+        
+        mock_conn.score_version.return_value = (5, 1700000001)
+        
+        assert authenticated_client.get('/leaderboard/game/1/api/data',
+                                        headers={'If-None-Match': etag}).status_code == 200
+
+    def test_etag_changes_when_index_reloads(self, app, mock_conn, authenticated_client):
+        """Test rebuilding the game's ranked index invalidates the ETag, even with no new events."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        authenticated_client.get('/leaderboard/game/1/api/data')
+        etag = authenticated_client.get('/leaderboard/game/1/api/data').headers['ETag']
+        
+        with app.app_context():
+            from MyFlaskapp.db import get_score_index
+            get_score_index().invalidate(1)
+        
+        assert authenticated_client.get('/leaderboard/game/1/api/data',
+                                        headers={'If-None-Match': etag}).status_code == 200
+
+    def test_no_etag_without_version(self, mock_conn, authenticated_client):
+        """Test responses are not tagged when the version cannot be read."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        mock_conn.score_version.return_value = (None, None)
+        
+        response = authenticated_client.get('/leaderboard/game/1/api/data')
+        
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
+
+    def test_etag_depends_on_view(self, mock_conn, authenticated_client):
+        """Test the personal and global views are cached separately."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        personal = authenticated_client.get('/leaderboard/api/data?view=personal').headers['ETag']
+        glob = authenticated_client.get('/leaderboard/api/data?view=global').headers['ETag']
+        assert personal != glob
+
+
+class TestLeaderboardPagination:
+    def test_game_api_pages_with_cursor(self, mock_conn, authenticated_client):
+        """Test the game API returns one page and a cursor that continues after it."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        
+        data = authenticated_client.get('/leaderboard/game/1/api/data?view=global&limit=2').get_json()
+        assert [s['score'] for s in data['global_scores']] == [90, 60]
+        assert [s['rank'] for s in data['global_scores']] == [1, 2]
+        assert data['global_next_cursor'] == '60:3:2'
+        
+        data = authenticated_client.get(
+            f"/leaderboard/game/1/api/data?view=global&limit=2&after={data['global_next_cursor']}").get_json()
+        assert [s['score'] for s in data['global_scores']] == [40, 10]
+        assert [s['rank'] for s in data['global_scores']] == [3, 4]
+        assert data['global_next_cursor'] is None
+
+    def test_page_size_is_capped(self, app, mock_conn, authenticated_client):
+        """Test clients cannot request pages larger than the configured maximum."""
+        app.config['LEADERBOARD_MAX_PAGE_SIZE'] = 1
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        
+        data = authenticated_client.get('/leaderboard/game/1/api/data?view=global&limit=1000').get_json()
+        assert len(data['global_scores']) == 1
+
+    def test_malformed_cursor_starts_at_first_page(self, mock_conn, authenticated_client):
+        """Test a bad cursor is treated as the first page."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        
+        data = authenticated_client.get('/leaderboard/game/1/api/data?view=global&after=oops').get_json()
+        assert data['global_scores'][0]['rank'] == 1
+
+    def test_game_page_links_next_page(self, mock_conn, authenticated_client):
+        """Test the game leaderboard page renders a link to the next page."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'id': 1, 'name': 'Test Game'}
+        
+        response = authenticated_client.get('/leaderboard/game/1?view=global&limit=2')
+        
+        assert response.status_code == 200
+        assert b'after=60:3:2' in response.data or b'after=60%3A3%3A2' in response.data
+
+    @patch('MyFlaskapp.leaderboard.routes.get_best_scores_page')
+    def test_game_api_best_per_player_mode(self, mock_best, mock_conn, authenticated_client):
+        """Test mode=best serves one row per player from the best-scores table."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        mock_best.return_value = ([{'leaderboard_id': 2, 'score': 90, 'username': 'user8',
+                                    'date_played': None, 'play_count': 1}], True)
+        
+        data = authenticated_client.get('/leaderboard/game/1/api/data?view=global&mode=best&limit=1').get_json()
+        
+        assert data['mode'] == 'best'
+        assert data['global_scores'][0]['rank'] == 1
+        assert data['global_next_cursor'] == '90:2:1'
+        mock_best.assert_called_once_with(1, None, 1)
+
+class TestPeriodLeaderboards:
+    @patch('MyFlaskapp.leaderboard.routes.get_period_player_best')
+    @patch('MyFlaskapp.leaderboard.routes.get_period_scores_page')
+    def test_game_api_period_board(self, mock_page, mock_best, mock_conn, authenticated_client):
+        """Test period=weekly serves the week's rollup normalised to its Monday."""
+        from datetime import date
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        mock_page.return_value = ([{'leaderboard_id': 2, 'score': 90, 'username': 'user8', 'date_played': None}], False)
+        mock_best.return_value = {'leaderboard_id': 3, 'score': 60, 'username': 'user7', 'date_played': None, 'rank': 2}
+        
+        data = authenticated_client.get('/leaderboard/game/1/api/data?view=global&period=weekly&start=2024-05-16').get_json()
+        
+        assert data['period'] == 'weekly'
+        assert data['period_start'] == '2024-05-13'
+        assert data['global_scores'][0]['rank'] == 1
+        assert data['user_scores'] == [mock_best.return_value]
+        assert mock_page.call_args[0][:3] == (1, 'weekly', date(2024, 5, 13))
+
+    @patch('MyFlaskapp.leaderboard.routes.get_period_player_best', return_value=None)
+    @patch('MyFlaskapp.leaderboard.routes.get_period_scores_page', return_value=([], False))
+    def test_closed_period_is_immutable(self, mock_page, mock_best, app, mock_conn, authenticated_client):
+        """Test finished periods are cacheable forever and survive new scores."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        url = '/leaderboard/game/1/api/data?view=global&period=daily&start=2020-01-01'
+        
+        response = authenticated_client.get(url)
+        assert 'immutable' in response.headers['Cache-Control']
+        etag = response.headers['ETag']
+        
+        mock_conn.score_version.return_value = (5, 1700000001)
+        mock_conn.cursor.reset_mock()
+        response = authenticated_client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        mock_conn.cursor.assert_not_called()
+
+    @patch('MyFlaskapp.leaderboard.routes.get_period_player_best', return_value=None)
+    @patch('MyFlaskapp.leaderboard.routes.get_period_scores_page', return_value=([], False))
+    def test_period_closes_after_grace(self, mock_page, mock_best, app, mock_conn, authenticated_client):
+        """Test a period is only served as immutable once the database clock is past its end plus the grace."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        database_now = datetime(2024, 5, 17, 0, 2)  # two minutes after 2024-05-16 ended
+        mock_conn.database_today.side_effect = lambda lag_seconds=0: (database_now - timedelta(seconds=lag_seconds)).date()
+        url = '/leaderboard/game/1/api/data?view=global&period=daily&start=2024-05-16'
+        
+        app.config['LEADERBOARD_PERIOD_CLOSE_GRACE_SECONDS'] = 300
+        assert 'no-cache' in authenticated_client.get(url).headers['Cache-Control']
+        app.config['LEADERBOARD_PERIOD_CLOSE_GRACE_SECONDS'] = 60
+        assert 'immutable' in authenticated_client.get(url).headers['Cache-Control']
+
+    @patch('MyFlaskapp.leaderboard.routes.get_period_player_best', return_value=None)
+    @patch('MyFlaskapp.leaderboard.routes.get_period_scores_page', return_value=([], False))
+    def test_current_period_revalidates(self, mock_page, mock_best, mock_conn, authenticated_client):
+        """Test the open period is not cached without revalidation."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'name': 'Test Game', 'id': 7}
+        
+        response = authenticated_client.get('/leaderboard/game/1/api/data?view=global&period=monthly')
+        assert 'no-cache' in response.headers['Cache-Control']
+
+    @patch('MyFlaskapp.leaderboard.routes.get_period_player_best', return_value=None)
+    @patch('MyFlaskapp.leaderboard.routes.get_period_scores_page', return_value=([], False))
+    def test_game_page_period_board(self, mock_page, mock_best, mock_conn, authenticated_client):
+        """Test the game page renders a period board with navigation."""
+        mock_conn.cursor.return_value.fetchone.return_value = {'id': 1, 'name': 'Test Game'}
+        
+        response = authenticated_client.get('/leaderboard/game/1?view=global&period=daily&start=2020-01-01')
+        assert response.status_code == 200
+        assert b'daily board starting 2020-01-01' in response.data
+        assert b'start=2020-01-02' in response.data
@@ -0,0 +1,117 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import smtplib
+import time
+import pytest
+from unittest.mock import patch
+from flask import Flask
+from flask_mail import Mail, Message
+from MyFlaskapp.mail_queue import MailQueue
+
+
+class FakeConnection:
+    def __init__(self, mail):
+        self.mail = mail
+
+    def __enter__(self):
+        self.mail.connections += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+    def send(self, message):
+        if self.mail.failures:
+            self.mail.failures -= 1
+            raise smtplib.SMTPServerDisconnected('connection lost')
+        self.mail.sent.append(message)
+
+
+class FakeMail:
+    """Stands in for Flask-Mail, counting SMTP connections."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.connections = 0
+        self.sent = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['MAIL_DEFAULT_SENDER'] = 'noreply@example.com'
+    Mail(app)
+    return app
+
+
+def message(to='player@example.com'):
+    return Message('Your OTP Verification Code', sender='noreply@example.com', recipients=[to], body='123456')
+
+
+class TestMailQueue:
+    def test_connection_reused_across_messages(self, app):
+        """Test a worker sends consecutive messages over one SMTP connection."""
+        mail = FakeMail()
+        mail_queue = MailQueue(app, mail, workers=1, idle_seconds=5)
+
+        for i in range(3):
+            assert mail_queue.send(message(f'p{i}@example.com')) is True
+        mail_queue.shutdown()
+
+        assert [m.recipients for m in mail.sent] == [['p0@example.com'], ['p1@example.com'], ['p2@example.com']]
+        assert mail.connections == 1
+        assert mail_queue.stats()['sent'] == 3
+
+    def test_failed_delivery_is_retried(self, app):
+        """Test a failed send is retried on a fresh connection after a backoff."""
+        mail = FakeMail(failures=1)
+        mail_queue = MailQueue(app, mail, workers=1, retry_backoff=0.01, idle_seconds=0.5)
+
+        mail_queue.send(message())
+        for _ in range(100):
+            if mail.sent:
+                break
+            time.sleep(0.02)
+        mail_queue.shutdown()
+
+        assert len(mail.sent) == 1
+        assert mail.connections == 2
+        assert mail_queue.stats()['retried'] == 1
+
+    def test_gives_up_after_max_retries(self, app):
+        """Test a message that keeps failing is dropped after max_retries retries."""
+        mail = FakeMail(failures=10)
+        mail_queue = MailQueue(app, mail, workers=0, max_retries=0)
+
+        assert mail_queue.send(message()) is False
+        assert mail_queue.stats()['failed'] == 1
+
+    def test_full_queue_refuses_messages(self, app):
+        """Test send reports failure instead of blocking when the queue is full."""
+        mail_queue = MailQueue(app, FakeMail(), workers=1, max_queued=1)
+
+        with patch.object(MailQueue, '_start'):
+            assert mail_queue.send(message()) is True
+            assert mail_queue.send(message()) is False
+
+    def test_sink_writes_eml_files(self, app, tmp_path):
+        """Test the file sink stores messages instead of sending them."""
+        mail = FakeMail()
+        mail_queue = MailQueue(app, mail, workers=1, sink_dir=str(tmp_path))
+
+        mail_queue.send(message())
+        mail_queue.shutdown()
+
+        files = os.listdir(tmp_path)
+        assert len(files) == 1 and files[0].endswith('.eml')
+        assert b'player@example.com' in (tmp_path / files[0]).read_bytes()
+        assert mail.connections == 0
@@ -0,0 +1,145 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+from MyFlaskapp.otp_store import MemoryOTPStore, TableOTPStore, get_otp_store
+
+
+class TestMemoryOTPStore:
+    def test_verify_uses_up_code(self):
+        """Test a correct code verifies once and is then gone."""
+        store = MemoryOTPStore()
+        store.store('a@example.com', '123456')
+
+        assert store.verify('a@example.com', '123456') is True
+        assert store.verify('a@example.com', '123456') is False
+
+    def test_wrong_code_is_kept(self):
+        """Test a wrong guess does not consume the issued code."""
+        store = MemoryOTPStore()
+        store.store('a@example.com', '123456')
+
+        assert store.verify('a@example.com', '654321') is False
+        assert store.verify('a@example.com', '123456') is True
+
+    def test_resend_replaces_code(self):
+        """Test storing a new code for an email replaces the old one."""
+        store = MemoryOTPStore()
+        store.store('a@example.com', '111111')
+        store.store('a@example.com', '222222')
+
+        assert store.verify('a@example.com', '111111') is False
+        assert store.verify('a@example.com', '222222') is True
+
+    def test_expired_code_is_rejected_and_purged(self):
+        """Test codes stop verifying after the TTL and purge drops them."""
+        store = MemoryOTPStore(ttl_seconds=600)
+        with patch('MyFlaskapp.otp_store.time.time', return_value=1000):
+            store.store('a@example.com', '123456')
+            store.store('b@example.com', '123456')
+        with patch('MyFlaskapp.otp_store.time.time', return_value=1600):
+            assert store.verify('a@example.com', '123456') is False
+            assert store.purge() == 2
+
+    def test_resend_cooldown(self):
+        """Test can_resend waits out the cooldown since the last code."""
+        store = MemoryOTPStore(resend_cooldown=60)
+        assert store.can_resend('a@example.com') is True
+        with patch('MyFlaskapp.otp_store.time.time', return_value=1000):
+            store.store('a@example.com', '123456')
+            assert store.can_resend('a@example.com') is False
+        with patch('MyFlaskapp.otp_store.time.time', return_value=1061):
+            assert store.can_resend('a@example.com') is True
+
+    def test_size_is_capped(self):
+        """Test the oldest codes are dropped beyond max_entries."""
+        store = MemoryOTPStore(max_entries=2)
+        for i in range(3):
+            store.store(f'p{i}@example.com', '123456')
+
+        assert store.verify('p0@example.com', '123456') is False
+        assert store.verify('p2@example.com', '123456') is True
+
+
+class TestTableOTPStore:
+    @patch('MyFlaskapp.otp_store.get_db_connection')
+    def test_store_upserts(self, mock_conn):
+        """Test store replaces the email's row instead of inserting a second one."""
+        mock_cursor = MagicMock()
+        mock_conn.return_value.cursor.return_value = mock_cursor
+
+        assert TableOTPStore(ttl_seconds=300).store('a@example.com', '123456') is True
+        sql, params = mock_cursor.execute.call_args[0]
+        assert 'ON DUPLICATE KEY UPDATE' in sql
+        assert params == ('a@example.com', '123456', 300)
+
+    @patch('MyFlaskapp.otp_store.get_db_connection')
+    def test_verify_wrong_code(self, mock_conn):
+        """Test a wrong code is rejected without marking the row verified."""
+        mock_cursor = MagicMock()
+        mock_conn.return_value.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = {'id': 1, 'otp': '123456'}
+
+        assert TableOTPStore().verify('a@example.com', '654321') is False
+        mock_cursor.execute.assert_called_once()
+        mock_conn.return_value.commit.assert_not_called()
+
+    @patch('MyFlaskapp.otp_store.get_db_connection')
+    def test_verify_uses_code_atomically(self, mock_conn):
+        """Test a code is accepted only if the conditional update claims the row."""
+        mock_cursor = MagicMock()
+        mock_conn.return_value.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = {'id': 1, 'otp': '123456'}
+
+        mock_cursor.rowcount = 1
+        assert TableOTPStore().verify('a@example.com', '123456') is True
+        sql, params = mock_cursor.execute.call_args[0]
+        assert 'verified = FALSE' in sql and 'expires_at > NOW()' in sql
+        assert params == (1, '123456')
+
+        # Another request used the code (or a resend replaced it) after the SELECT
+        mock_cursor.rowcount = 0
+        assert TableOTPStore().verify('a@example.com', '123456') is False
+
+    @patch('MyFlaskapp.otp_store.get_db_connection')
+    def test_can_resend_after_cooldown(self, mock_conn):
+        """Test can_resend compares the row's created_at with the cooldown."""
+        mock_cursor = MagicMock()
+        mock_conn.return_value.cursor.return_value = mock_cursor
+        store = TableOTPStore(resend_cooldown=60)
+
+        mock_cursor.fetchone.return_value = {'created_at': datetime.now() - timedelta(seconds=10)}
+        assert store.can_resend('a@example.com') is False
+        mock_cursor.fetchone.return_value = {'created_at': datetime.now() - timedelta(seconds=120)}
+        assert store.can_resend('a@example.com') is True
+
+    @patch('MyFlaskapp.otp_store.get_db_connection')
+    def test_store_purges_periodically(self, mock_conn):
+        """Test store deletes expired and verified rows once the purge interval has passed."""
+        mock_cursor = MagicMock()
+        mock_conn.return_value.cursor.return_value = mock_cursor
+        store = TableOTPStore(purge_interval=3600)
+
+        store.store('a@example.com', '123456')
+        assert mock_cursor.execute.call_count == 1
+
+        store._last_purge -= 3600
+        store.store('a@example.com', '123456')
+        assert 'DELETE FROM otp_verification' in mock_cursor.execute.call_args[0][0]
+
+
+def test_get_otp_store_backend(app):
+    """Test OTP_STORE_BACKEND selects the store and it is reused."""
+    assert isinstance(get_otp_store(), TableOTPStore)
+
+    app.extensions.pop('otp_store')
+    app.config['OTP_STORE_BACKEND'] = 'memory'
+    store = get_otp_store()
+    assert isinstance(store, MemoryOTPStore)
+    assert get_otp_store() is store
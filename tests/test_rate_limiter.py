@@ -10,7 +10,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 from flask import Flask
 import time
-from MyFlaskapp.rate_limiter import RateLimiter, rate_limit, otp_rate_limit, rate_limiter
+from MyFlaskapp.rate_limiter import RateLimiter, SQLiteRateLimiter, get_rate_limiter, rate_limit, otp_rate_limit, api_rate_limit, rate_limiter
 
 class TestRateLimiter:
     def setup_method(self):
@@ -91,6 +91,232 @@ class TestRateLimiter:
         remaining = rate_limiter.get_remaining_time(key, window_seconds)
         assert remaining == 0
 
+    def test_attempts_per_key_are_bounded(self):
+        """Test a key never stores more than max_attempts timestamps."""
+        key = 'test_key'
+        for i in range(10):
+            rate_limiter.is_rate_limited(key, 3, 60)
+        assert len(rate_limiter.attempts[key]) == 3
+
+    def test_tracked_keys_are_capped(self):
+        """Test the least recently seen keys are forgotten past max_keys."""
+        limiter = RateLimiter(max_keys=2)
+        limiter.is_rate_limited('a', 5, 60)
+        limiter.is_rate_limited('b', 5, 60)
+        limiter.is_rate_limited('a', 5, 60)
+        limiter.is_rate_limited('c', 5, 60)
+        assert list(limiter.attempts) == ['a', 'c']
+
+    def test_idle_keys_are_swept(self):
+        """Test keys whose attempts have all expired are dropped by the periodic sweep."""
+        limiter = RateLimiter(sweep_every=2)
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=1000):
+            limiter.is_rate_limited('idle', 5, 10)
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=1020):
+            limiter.is_rate_limited('active', 5, 10)
+        assert list(limiter.attempts) == ['active']
+
+class TestSQLiteRateLimiter:
+    def test_limit_is_shared_between_workers(self, tmp_path):
+        """Test two limiters on one file (as two workers would) share one budget."""
+        path = str(tmp_path / 'rate_limits.sqlite3')
+        first = SQLiteRateLimiter(path)
+        second = SQLiteRateLimiter(path)
+        
+        assert first.is_rate_limited('key', 3, 60) is False
+        assert second.is_rate_limited('key', 3, 60) is False
+        assert first.is_rate_limited('key', 3, 60) is False
+        assert second.is_rate_limited('key', 3, 60) is True
+        assert first.is_rate_limited('other', 3, 60) is False
+
+    def test_previous_window_is_weighted(self, tmp_path):
+        """Test the previous window's attempts count in proportion to their overlap."""
+        limiter = SQLiteRateLimiter(str(tmp_path / 'rate_limits.sqlite3'))
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=6000):
+            for i in range(4):
+                assert limiter.is_rate_limited('key', 4, 60) is False
+        # 15s into the next window: 4 * 0.75 = 3 earlier attempts still count
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=6075):
+            assert limiter.is_rate_limited('key', 4, 60) is False
+            assert limiter.is_rate_limited('key', 4, 60) is True
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=6180):
+            assert limiter.is_rate_limited('key', 4, 60) is False
+
+    def test_get_remaining_time(self, tmp_path):
+        """Test remaining time runs to the end of the current window."""
+        limiter = SQLiteRateLimiter(str(tmp_path / 'rate_limits.sqlite3'))
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=6010):
+            assert limiter.get_remaining_time('key', 60) == 0
+            limiter.is_rate_limited('key', 1, 60)
+            assert limiter.get_remaining_time('key', 60) == 50
+
+    def test_decorator_uses_configured_backend(self, tmp_path):
+        """Test RATE_LIMIT_BACKEND=sqlite routes the decorator through the shared store."""
+        app = Flask(__name__)
+        app.config['RATE_LIMIT_BACKEND'] = 'sqlite'
+        app.config['RATE_LIMIT_SQLITE_PATH'] = str(tmp_path / 'rate_limits.sqlite3')
+        
+        with app.test_request_context('/'):
+            @rate_limit(max_attempts=1, window_seconds=60, key_func=lambda: 'shared_key')
+            def test_function():
+                return "success"
+            
+            assert test_function() == "success"
+            assert test_function()[1] == 429
+            assert 'shared_key' not in rate_limiter.attempts
+
+    def test_backend_selected_from_environment(self, app_from_env, tmp_path):
+        """Test RATE_LIMIT_BACKEND=sqlite in the environment shares limits between create_app() workers."""
+        env = {'RATE_LIMIT_BACKEND': 'sqlite', 'RATE_LIMIT_SQLITE_PATH': str(tmp_path / 'rate_limits.sqlite3')}
+        workers = [app_from_env(**env), app_from_env(**env)]
+        
+        limiters = []
+        for worker in workers:
+            with worker.app_context():
+                limiters.append(get_rate_limiter())
+        
+        assert all(isinstance(limiter, SQLiteRateLimiter) for limiter in limiters)
+        assert limiters[0].is_rate_limited('login_1.2.3.4', 1, 60) is False
+        assert limiters[1].is_rate_limited('login_1.2.3.4', 1, 60) is True
+
+class TestTokenBucket:
+    def test_burst_then_refill(self):
+        """Test a bucket allows a burst, then refills at the sustained rate."""
+        limiter = RateLimiter()
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=1000):
+            assert [limiter.take_token('key', 1, 3)[0] for i in range(4)] == [True, True, True, False]
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=1001.5):
+            assert limiter.take_token('key', 1, 3) == (True, 0.5)
+            assert limiter.take_token('key', 1, 3)[0] is False
+
+    def test_buckets_are_capped(self):
+        """Test the least recently used buckets are forgotten past max_keys."""
+        limiter = RateLimiter(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            limiter.take_token(key, 1, 3)
+        assert list(limiter.buckets) == ['b', 'c']
+
+    def test_refund_token(self):
+        """Test a refunded token can be taken again, up to the bucket's burst."""
+        for limiter in (RateLimiter(), SQLiteRateLimiter(':memory:')):
+            with patch('MyFlaskapp.rate_limiter.time.time', return_value=1000):
+                assert limiter.take_token('key', 1, 1) == (True, 0)
+                assert limiter.refund_token('key', 1, 1) == 1
+                assert limiter.refund_token('key', 1, 1) == 1
+                assert limiter.take_token('key', 1, 1) == (True, 0)
+                assert limiter.take_token('key', 1, 1)[0] is False
+
+    def test_sqlite_buckets_are_shared(self, tmp_path):
+        """Test workers sharing the SQLite store draw from the same bucket."""
+        path = str(tmp_path / 'rate_limits.sqlite3')
+        first = SQLiteRateLimiter(path)
+        second = SQLiteRateLimiter(path)
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=1000):
+            assert first.take_token('key', 1, 2)[0] is True
+            assert second.take_token('key', 1, 2)[0] is True
+            assert first.take_token('key', 1, 2)[0] is False
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=1001):
+            assert second.take_token('key', 1, 2) == (True, 0)
+
+class TestApiRateLimit:
+    def setup_method(self):
+        """Reset token buckets before each test."""
+        rate_limiter.buckets.clear()
+
+    def make_app(self, policies):
+        app = Flask(__name__)
+        app.config['SECRET_KEY'] = 'test-secret-key'
+        app.config['API_RATE_LIMITS'] = policies
+        
+        @app.route('/data')
+        @api_rate_limit()
+        def data():
+            return {'ok': True}
+        
+        return app
+
+    def test_headers_and_rejection(self):
+        """Test responses carry RateLimit headers and rejections a Retry-After."""
+        app = self.make_app({'data': {'user': (30, 2)}})
+        client = app.test_client()
+        
+        first = client.get('/data')
+        assert first.status_code == 200
+        assert (first.headers['RateLimit-Limit'], first.headers['RateLimit-Remaining']) == ('2', '1')
+        assert first.headers['RateLimit-Reset'] == '2'
+        client.get('/data')
+        
+        rejected = client.get('/data')
+        assert rejected.status_code == 429
+        assert rejected.headers['Retry-After'] == '2'
+        assert rejected.get_json()['success'] is False
+
+    def test_buckets_are_per_user(self):
+        """Test one user exhausting their bucket does not limit another."""
+        app = self.make_app({'data': {'user': (60, 1)}})
+        first, second = app.test_client(), app.test_client()
+        with first.session_transaction() as sess:
+            sess['user_id'] = 'u1'
+        with second.session_transaction() as sess:
+            sess['user_id'] = 'u2'
+        
+        assert first.get('/data').status_code == 200
+        assert first.get('/data').status_code == 429
+        assert second.get('/data').status_code == 200
+
+    def test_route_bucket_is_shared(self):
+        """Test a route-wide bucket limits all callers together."""
+        app = self.make_app({'data': {'user': (60, 5), 'route': (60, 1)}})
+        first, second = app.test_client(), app.test_client()
+        with second.session_transaction() as sess:
+            sess['user_id'] = 'u2'
+        
+        assert first.get('/data').status_code == 200
+        assert second.get('/data').status_code == 429
+
+    def test_route_rejection_keeps_user_token(self):
+        """Test a route-bucket rejection reports that bucket and refunds the caller's token."""
+        app = self.make_app({'data': {'user': (60, 2), 'route': (30, 1)}})
+        first, second = app.test_client(), app.test_client()
+        
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=1000):
+            with second.session_transaction() as sess:
+                sess['user_id'] = 'u2'
+            assert first.get('/data').status_code == 200
+            rejected = second.get('/data')
+        assert rejected.status_code == 429
+        assert rejected.headers['Retry-After'] == '2'
+        assert (rejected.headers['RateLimit-Limit'], rejected.headers['RateLimit-Remaining']) == ('1', '0')
+        assert rejected.headers['RateLimit-Reset'] == '2'
+        assert rate_limiter.buckets['api_data_u2'][0] == 2
+
+    def test_not_modified_is_free(self):
+        """Test a 304 response refunds the tokens its request took."""
+        app = self.make_app({'data': {'user': (60, 1), 'route': (60, 1)}})
+        
+        @app.route('/cached')
+        @api_rate_limit('data')
+        def cached():
+            return '', 304
+        
+        client = app.test_client()
+        with patch('MyFlaskapp.rate_limiter.time.time', return_value=1000):
+            for i in range(3):
+                response = client.get('/cached')
+                assert response.status_code == 304
+                assert response.headers['RateLimit-Remaining'] == '1'
+            assert client.get('/data').status_code == 200
+            assert client.get('/data').status_code == 429
+
+    def test_default_policy(self):
+        """Test routes without a policy use API_RATE_LIMIT_PER_MINUTE and BURST."""
+        app = self.make_app({})
+        app.config['API_RATE_LIMIT_BURST'] = 1
+        client = app.test_client()
+        
+        assert client.get('/data').status_code == 200
+        assert client.get('/data').status_code == 429
+
 class TestRateLimitDecorator:
     def setup_method(self):
         """Reset rate limiter before each test."""
@@ -188,6 +414,38 @@ class TestRateLimitDecorator:
             assert test_function() == "success"
             assert 'custom_key' in rate_limiter.attempts
 
+    def test_rate_limit_decorator_keys_by_endpoint(self):
+        """Test the default IP key is tracked separately for each endpoint."""
+        app = Flask(__name__)
+        
+        with app.test_request_context('/', environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+            @rate_limit(max_attempts=1, window_seconds=60)
+            def first():
+                return "first"
+            
+            @rate_limit(max_attempts=1, window_seconds=60)
+            def second():
+                return "second"
+            
+            assert first() == "first"
+            assert second() == "second"
+            assert 'first_10.0.0.1' in rate_limiter.attempts
+
+    def test_rate_limit_decorator_methods(self):
+        """Test only the listed HTTP methods count as attempts."""
+        app = Flask(__name__)
+        
+        @rate_limit(max_attempts=1, window_seconds=60, methods=('POST',))
+        def test_function():
+            return "success"
+        
+        with app.test_request_context('/', method='GET'):
+            assert test_function() == "success"
+            assert test_function() == "success"
+        with app.test_request_context('/', method='POST'):
+            assert test_function() == "success"
+            assert test_function()[1] == 429
+
     def test_rate_limit_decorator_default_config(self):
         """Test rate limit decorator uses default config."""
         app = Flask(__name__)
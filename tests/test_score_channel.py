@@ -0,0 +1,149 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+from unittest.mock import patch
+from MyFlaskapp.games.score_channel import (
+    ScoreChannel, ScoreReader, SCORE_FD_ENV, MAX_LINE_LENGTH, open_score_pipe
+)
+from MyFlaskapp.games.game_launcher import GameLauncher
+from MyFlaskapp.games.warm_pool import WarmInterpreterPool
+
+GAMES_DIR = os.path.join(ROOT, 'MyFlaskapp', 'games')
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason='score channel needs fd inheritance')
+
+# A headless stand-in for a GameBase game: reports over the channel and prints a different stdout score
+CHANNEL_GAME = '''
+import sys
+sys.path.insert(0, {games_dir!r})
+from score_channel import ScoreChannel
+
+channel = ScoreChannel.from_environment()
+channel.send('event', name='level_up', level=2)
+channel.send('score', score=55, duration=1.5, frames=90)
+channel.close()
+print("FINAL_SCORE:1")
+'''
+
+
+def write_channel_game(tmp_path):
+    game_file = tmp_path / 'channel_game.py'
+    game_file.write_text(CHANNEL_GAME.format(games_dir=GAMES_DIR))
+    return str(game_file)
+
+
+class TestScoreChannel:
+    def test_round_trip(self):
+        """Test messages written by a game are parsed by the launcher's reader."""
+        reader, write_fd = open_score_pipe()
+        with patch.dict(os.environ, {SCORE_FD_ENV: str(write_fd)}):
+            channel = ScoreChannel.from_environment()
+        channel.send('start', title='Test')
+        channel.send('event', name='combo', hits=3)
+        channel.send('score', score=120, duration=30.0, frames=1800)
+        channel.close()
+        os.close(write_fd)
+        reader.wait(timeout=5)
+
+        assert reader.score == 120
+        telemetry = reader.telemetry()
+        assert telemetry['duration'] == 30.0
+        assert telemetry['frames'] == 1800
+        assert [event['name'] for event in telemetry['events']] == ['combo']
+
+    def test_no_channel_in_environment(self):
+        """Test games started without a channel get None and fall back to stdout."""
+        with patch.dict(os.environ, {}, clear=True):
+            assert ScoreChannel.from_environment() is None
+
+    def test_malformed_and_oversized_lines_ignored(self):
+        """Test garbage and overlong lines are dropped without losing later messages."""
+        read_fd, write_fd = os.pipe()
+        reader = ScoreReader(read_fd)
+        with os.fdopen(write_fd, 'w') as stream:
+            stream.write('not json\n')
+            stream.write('x' * (MAX_LINE_LENGTH * 2) + '\n')
+            stream.write('{"type": "score", "score": 7}\n')
+        reader.wait(timeout=5)
+        assert reader.score == 7
+
+    def test_events_bounded(self):
+        """Test only the most recent events are kept."""
+        read_fd, write_fd = os.pipe()
+        reader = ScoreReader(read_fd, max_events=3)
+        with os.fdopen(write_fd, 'w') as stream:
+            for i in range(10):
+                stream.write(f'{{"type": "event", "name": "hit", "n": {i}}}\n')
+        reader.wait(timeout=5)
+        assert [event['n'] for event in reader.events] == [7, 8, 9]
+
+
+class TestLauncherScoreChannel:
+    def test_launcher_prefers_channel_score(self, tmp_path):
+        """Test a game's channel score wins over numbers printed to stdout."""
+        result = GameLauncher(write_channel_game(tmp_path), timeout=30).launch_game()
+        assert result['success'] is True
+        assert result['score'] == 55
+        assert result['telemetry']['frames'] == 90
+        assert result['telemetry']['events'][0]['level'] == 2
+
+    def test_launcher_falls_back_to_stdout(self, tmp_path):
+        """Test games that only print FINAL_SCORE still work."""
+        game_file = tmp_path / 'plain_game.py'
+        game_file.write_text('print("FINAL_SCORE:12")\n')
+        result = GameLauncher(str(game_file), timeout=30).launch_game()
+        assert result['score'] == 12
+        assert result['telemetry'] is None
+
+    def test_warm_pool_uses_channel(self, tmp_path):
+        """Test warm pool workers give each run its own score channel."""
+        pool = WarmInterpreterPool(GAMES_DIR, size=1)
+        pool.start()
+        try:
+            game = write_channel_game(tmp_path)
+            for _ in range(2):
+                result = pool.run_game(game, timeout=30)
+                assert result['score'] == 55
+                assert result['telemetry']['duration'] == 1.5
+        finally:
+            pool.shutdown()
+
+
+class TestGameBaseReporting:
+    def test_report_final_score(self):
+        """Test GameBase sends score, duration and frames, then closes the channel."""
+        if GAMES_DIR not in sys.path:
+            sys.path.append(GAMES_DIR)
+        from game_base import GameBase
+
+        class HeadlessGame(GameBase):
+            def update(self):
+                pass
+
+            def draw(self):
+                pass
+
+        reader, write_fd = open_score_pipe()
+        with patch.dict(os.environ, {SCORE_FD_ENV: str(write_fd)}):
+            channel = ScoreChannel.from_environment()
+        os.close(write_fd)
+
+        game = object.__new__(HeadlessGame)
+        game.score = 42
+        game.frames = 600
+        game.started_at = 0
+        game.score_channel = channel
+        game.report_event('level_up', level=3)
+        game.report_final_score()
+        reader.wait(timeout=5)
+
+        assert game.score_channel is None
+        assert reader.score == 42
+        assert reader.frames == 600
+        assert reader.events[0]['level'] == 3
@@ -0,0 +1,111 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import threading
+from MyFlaskapp.score_events import ScoreEventHub, SCORE, RESET
+
+
+class TestScoreEventHub:
+    def test_wait_returns_newer_events(self):
+        """Test waiters get every event published after the id they have seen."""
+        hub = ScoreEventHub()
+        first = hub.publish(SCORE, 1, {'score': 10})
+        hub.publish(SCORE, 2, {'score': 20})
+
+        events = hub.wait(first, timeout=0)
+        assert [(kind, game_id, data['score']) for _, kind, game_id, data in events] == [(SCORE, 2, 20)]
+        assert hub.last_id == 2
+
+    def test_wait_times_out(self):
+        """Test waiting with nothing new returns no events after the timeout."""
+        hub = ScoreEventHub()
+        assert hub.wait(hub.last_id, timeout=0.01) == []
+
+    def test_one_publish_wakes_every_viewer(self):
+        """Test a single published event is delivered to all waiting streams."""
+        hub = ScoreEventHub()
+        received = []
+        viewers = [threading.Thread(target=lambda: received.append(hub.wait(0, timeout=5)))
+                   for _ in range(5)]
+        for viewer in viewers:
+            viewer.start()
+
+        hub.publish(SCORE, 1, {'score': 10})
+        for viewer in viewers:
+            viewer.join(timeout=5)
+
+        assert len(received) == 5
+        assert all(events[0][0] == 1 for events in received)
+
+    def test_client_behind_history_gets_reset(self):
+        """Test a client that missed events dropped from the history is told to refetch."""
+        hub = ScoreEventHub(history=2)
+        for score in range(4):
+            hub.publish(SCORE, 1, {'score': score})
+
+        assert hub.wait(0, timeout=0) == [(4, RESET, None, {})]
+        assert [event[0] for event in hub.wait(2, timeout=0)] == [3, 4]
+
+    def test_gaps_in_ids_are_not_resets(self):
+        """Test ids from the shared log may skip numbers without forcing a refetch."""
+        hub = ScoreEventHub()
+        hub.publish(SCORE, 1, {'score': 10}, event_id=5)
+        hub.publish(SCORE, 1, {'score': 20}, event_id=9)
+
+        assert [event[0] for event in hub.wait(5, timeout=0)] == [9]
+
+
+class FakeLog:
+    """Stands in for the score_events table."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def latest_id(self):
+        return self.events[-1][0] if self.events else 0
+
+    def events_after(self, event_id, limit):
+        return [event for event in self.events if event[0] > event_id][:limit]
+
+
+class TestSharedScoreEvents:
+    def test_subscribers_receive_events_from_other_workers(self):
+        """Test the poller publishes rows other workers added to the shared log."""
+        log = FakeLog([(3, SCORE, 1, {'score': 10})])
+        hub = ScoreEventHub(source=log, poll_seconds=0.01)
+
+        hub.subscribe()
+        assert hub.last_id == 3
+        log.events.append((7, SCORE, 2, {'score': 20}))
+        events = hub.wait(3, timeout=5)
+        hub.unsubscribe()
+
+        assert events == [(7, SCORE, 2, {'score': 20})]
+
+    def test_resume_from_before_subscription_resets(self):
+        """Test a client resuming from an id this worker never saw is told to refetch."""
+        hub = ScoreEventHub(source=FakeLog([(3, SCORE, 1, {'score': 10})]), poll_seconds=0.01)
+
+        hub.subscribe()
+        hub.publish(SCORE, 1, {'score': 20}, event_id=4)
+        events = hub.wait(1, timeout=0)
+        hub.unsubscribe()
+
+        assert events == [(4, RESET, None, {})]
+
+    def test_poller_stops_without_subscribers(self):
+        """Test the shared log is only read while a stream is open."""
+        hub = ScoreEventHub(source=FakeLog([]), poll_seconds=0.01)
+
+        hub.subscribe()
+        poller = hub._poller
+        hub.unsubscribe()
+        poller.join(timeout=5)
+
+        assert not poller.is_alive()
+        assert hub._poller is None
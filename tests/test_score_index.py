@@ -0,0 +1,260 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from MyFlaskapp.score_index import ScoreIndex
+
+
+def make_row(leaderboard_id, user_id, score, username=None):
+    return {
+        'leaderboard_id': leaderboard_id,
+        'user_id': user_id,
+        'username': username or f'user{user_id}',
+        'score': score,
+        'date_played': None
+    }
+
+
+def make_loader(rows_by_game):
+    return MagicMock(side_effect=lambda game_id: [dict(row) for row in rows_by_game.get(game_id, [])])
+
+
+@pytest.fixture
+def index():
+    return ScoreIndex(make_loader({1: [
+        make_row(1, 10, 50),
+        make_row(2, 11, 90),
+        make_row(3, 10, 70),
+        make_row(4, 12, 70),
+        make_row(5, 13, 20)
+    ]}))
+
+
+class TestScoreIndex:
+    def test_top_orders_by_score_then_age(self, index):
+        """Test rows come back highest first, ties going to the earlier score."""
+        assert [row['leaderboard_id'] for row in index.top(1)] == [2, 3, 4, 1, 5]
+        assert [row['score'] for row in index.top(1, 2)] == [90, 70]
+        assert 'user_id' not in index.top(1)[0]
+
+    def test_game_loaded_once(self, index):
+        """Test repeated lookups are served without hitting the database again."""
+        index.top(1)
+        index.user_scores(1, 10)
+        index.player_rank(1, 10)
+        assert index.loader.call_count == 1
+
+    def test_stale_game_reloaded(self):
+        """Test a game older than max_age is rebuilt from the database."""
+        index = ScoreIndex(make_loader({1: [make_row(1, 10, 5)]}), max_age=60)
+        with patch('MyFlaskapp.score_index.time.time', return_value=1000):
+            index.top(1)
+        with patch('MyFlaskapp.score_index.time.time', return_value=1061):
+            index.top(1)
+        assert index.loader.call_count == 2
+
+    def test_cold_game_loaded_once_by_concurrent_readers(self):
+        """Test concurrent lookups of an unloaded game share a single load."""
+        rows = [make_row(1, 10, 5)]
+
+        def slow_loader(game_id):
+            time.sleep(0.05)
+            return [dict(row) for row in rows]
+
+        index = ScoreIndex(MagicMock(side_effect=slow_loader))
+        results = []
+        readers = [threading.Thread(target=lambda: results.append(index.top(1))) for _ in range(20)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join(timeout=5)
+
+        assert index.loader.call_count == 1
+        assert len(results) == 20 and all(result[0]['score'] == 5 for result in results)
+
+    def test_stale_game_served_while_refreshing(self):
+        """Test readers keep the old index while another thread reloads a stale game."""
+        started, release = threading.Event(), threading.Event()
+        loads = [[make_row(1, 10, 5)], [make_row(1, 10, 5), make_row(2, 11, 9)]]
+
+        def loader(game_id):
+            if index.loader.call_count == 2:
+                started.set()
+                release.wait(5)
+            return [dict(row) for row in loads[index.loader.call_count - 1]]
+
+        index = ScoreIndex(MagicMock(side_effect=loader), max_age=60)
+        with patch('MyFlaskapp.score_index.time.time', return_value=1000):
+            index.top(1)
+        with patch('MyFlaskapp.score_index.time.time', return_value=1061):
+            refresher = threading.Thread(target=index.top, args=(1,))
+            refresher.start()
+            assert started.wait(5)
+            assert [row['score'] for row in index.top(1)] == [5]
+            release.set()
+            refresher.join(timeout=5)
+            assert [row['score'] for row in index.top(1)] == [9, 5]
+        assert index.loader.call_count == 2
+
+    def test_failed_load_releases_game(self):
+        """Test a failed load lets the next reader load the game again."""
+        index = ScoreIndex(MagicMock(side_effect=[Exception('db down'), [make_row(1, 10, 5)]]))
+
+        with pytest.raises(Exception):
+            index.top(1)
+        assert index.top(1)[0]['score'] == 5
+        assert index._loading == {}
+
+    def test_loaded_at_tracks_reloads(self):
+        """Test loaded_at is None until the game is loaded and once it is due for a reload."""
+        index = ScoreIndex(make_loader({1: [make_row(1, 10, 5)]}), max_age=60)
+        assert index.loaded_at(1) is None
+        with patch('MyFlaskapp.score_index.time.time', return_value=1000):
+            index.top(1)
+            assert index.loaded_at(1) == 1000
+        with patch('MyFlaskapp.score_index.time.time', return_value=1061):
+            assert index.loaded_at(1) is None
+
+    def test_add_score_updates_loaded_game(self, index):
+        """Test submitted scores are inserted in rank order without a reload."""
+        index.top(1)
+        index.add_score(1, make_row(6, 13, 80))
+
+        assert [row['leaderboard_id'] for row in index.top(1, 3)] == [2, 6, 3]
+        assert index.player_rank(1, 13)[0] == 2
+        assert index.loader.call_count == 1
+
+    def test_add_score_ignored_for_unloaded_game(self, index):
+        """Test scores for games not yet loaded are left to the database."""
+        index.add_score(2, make_row(6, 13, 80))
+        assert index.top(2) == []
+
+    def test_user_scores(self, index):
+        """Test a player's own scores are returned best first."""
+        assert [row['score'] for row in index.user_scores(1, 10)] == [70, 50]
+        assert index.user_scores(1, 99) == []
+
+    def test_player_rank_uses_best_score_per_player(self, index):
+        """Test players are ranked once each by their best score."""
+        rank, best, total = index.player_rank(1, 10)
+        assert (rank, best['score'], total) == (2, 70, 4)
+        assert index.player_rank(1, 12)[0] == 3
+        assert index.player_rank(1, 99) is None
+
+    def test_score_range(self, index):
+        """Test range queries include both bounds."""
+        assert [row['leaderboard_id'] for row in index.score_range(1, 50, 70)] == [3, 4, 1]
+        assert [row['score'] for row in index.score_range(1, min_score=71)] == [90]
+        assert [row['score'] for row in index.score_range(1, max_score=20)] == [20]
+
+    def test_page_keyset(self, index):
+        """Test pages continue after the cursor row and carry their overall rank."""
+        rows, has_more = index.page(1, limit=2)
+        assert [(row['rank'], row['leaderboard_id']) for row in rows] == [(1, 2), (2, 3)]
+        assert has_more is True
+
+        rows, has_more = index.page(1, after=(70, 3), limit=2)
+        assert [(row['rank'], row['leaderboard_id']) for row in rows] == [(3, 4), (4, 1)]
+        assert has_more is True
+
+        rows, has_more = index.page(1, after=(50, 1), limit=2)
+        assert [row['leaderboard_id'] for row in rows] == [5]
+        assert has_more is False
+
+    def test_page_stable_under_inserts(self, index):
+        """Test a higher score submitted between pages does not shift the next page's rows."""
+        index.page(1, limit=2)
+        index.add_score(1, make_row(6, 14, 95))
+        rows, _ = index.page(1, after=(70, 3), limit=2)
+        assert [row['leaderboard_id'] for row in rows] == [4, 1]
+
+    def test_page_for_player(self, index):
+        """Test a player's own scores can be paged."""
+        rows, has_more = index.page(1, limit=1, user_id=10)
+        assert [row['score'] for row in rows] == [70]
+        assert has_more is True
+        rows, has_more = index.page(1, after=(70, 3), limit=1, user_id=10)
+        assert [row['score'] for row in rows] == [50]
+        assert has_more is False
+
+    def test_invalidate(self, index):
+        """Test an invalidated game is reloaded on next use."""
+        index.top(1)
+        index.invalidate(1)
+        index.top(1)
+        assert index.loader.call_count == 2
+
+
+class FakeLog:
+    """Stands in for the score_events table shared by every worker."""
+
+    def __init__(self):
+        self.events = []  # (event_id, kind, game_id, data, settled)
+
+    def append(self, kind, game_id, data=None, settled=True):
+        self.events.append((len(self.events) + 1, kind, game_id, data or {}, settled))
+
+    def latest_id(self, game_id=None):
+        return max([e[0] for e in self.events if e[2] == game_id and e[4]], default=0)
+
+    def game_events_after(self, game_id, event_id, limit):
+        return [(e[0], e[1], e[3], e[4]) for e in self.events if e[2] == game_id and e[0] > event_id][:limit]
+
+
+class TestSharedLogSync:
+    def setup_method(self):
+        self.log = FakeLog()
+        self.loader = make_loader({1: [make_row(1, 10, 50)]})
+        self.index = ScoreIndex(self.loader, max_age=None, log=self.log, sync_seconds=0)
+
+    def test_scores_from_other_workers_applied(self):
+        """Test scores submitted on another worker appear without reloading the game."""
+        assert [row['score'] for row in self.index.top(1)] == [50]
+        self.log.append('score', 1, dict(make_row(2, 11, 80), game_name='Game'))
+
+        assert [row['score'] for row in self.index.top(1)] == [80, 50]
+        assert self.loader.call_count == 1
+        assert self.index._games[1].version == 1
+
+    def test_own_scores_not_duplicated(self):
+        """Test a score added locally is not counted twice when its event comes back from the log."""
+        self.index.top(1)
+        row = make_row(2, 11, 80)
+        self.index.add_score(1, row)
+        self.log.append('score', 1, row)
+        assert self.index.score_count(1) == 2
+
+    def test_reset_on_other_worker_reloads(self):
+        """Test a reset from another worker drops the game so it is reloaded."""
+        self.index.top(1)
+        self.loader.side_effect = lambda game_id: []
+        self.log.append('reset', 1)
+
+        assert self.index.top(1) == []
+        assert self.loader.call_count == 2
+
+    def test_version_waits_for_settled_events(self):
+        """Test the index only moves past events that can no longer be overtaken by a late commit."""
+        self.index.top(1)
+        self.log.append('score', 1, make_row(2, 11, 80), settled=False)
+        self.log.append('score', 1, make_row(3, 12, 60))
+
+        assert self.index.score_count(1) == 3
+        assert self.index._games[1].version == 0
+
+    def test_far_behind_game_reloaded(self):
+        """Test a game with more unseen events than one sync reads is reloaded instead."""
+        self.index.sync_limit = 2
+        self.index.top(1)
+        for n in range(2, 5):
+            self.log.append('score', 1, make_row(n, 11, n))
+        self.index.top(1)
+        assert self.loader.call_count == 2
@@ -0,0 +1,47 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+from datetime import date
+from MyFlaskapp.score_periods import (
+    DAILY, WEEKLY, MONTHLY, period_start, period_start_sql, next_period_start, is_closed
+)
+
+
+class TestScorePeriods:
+    def test_period_start(self):
+        """Test periods start on the day, the Monday and the first of the month."""
+        day = date(2024, 2, 29)  # a Thursday
+        assert period_start(DAILY, day) == day
+        assert period_start(WEEKLY, day) == date(2024, 2, 26)
+        assert period_start(MONTHLY, day) == date(2024, 2, 1)
+
+    def test_next_period_start(self):
+        """Test the following period starts the next day, week or month."""
+        assert next_period_start(DAILY, date(2024, 12, 31)) == date(2025, 1, 1)
+        assert next_period_start(WEEKLY, date(2024, 2, 26)) == date(2024, 3, 4)
+        assert next_period_start(MONTHLY, date(2024, 1, 1)) == date(2024, 2, 1)
+        assert next_period_start(MONTHLY, date(2024, 12, 1)) == date(2025, 1, 1)
+
+    def test_is_closed(self):
+        """Test a period closes once its last day has passed."""
+        assert is_closed(WEEKLY, date(2024, 2, 26), today=date(2024, 3, 4)) is True
+        assert is_closed(WEEKLY, date(2024, 2, 26), today=date(2024, 3, 3)) is False
+
+    def test_period_start_sql(self):
+        """Test the SQL bucketing matches period_start for each period."""
+        assert period_start_sql(DAILY, 'created_at') == 'DATE(created_at)'
+        assert period_start_sql(WEEKLY, 'created_at') == 'DATE_SUB(DATE(created_at), INTERVAL WEEKDAY(created_at) DAY)'
+        assert period_start_sql(MONTHLY, 'created_at') == "DATE_FORMAT(created_at, '%%Y-%%m-01')"
+        with pytest.raises(ValueError):
+            period_start_sql('yearly', 'created_at')
+
+    def test_unknown_period(self):
+        """Test unsupported periods are rejected."""
+        with pytest.raises(ValueError):
+            period_start('yearly', date(2024, 1, 1))
@@ -3,7 +3,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from unittest.mock import patch, MagicMock
-from MyFlaskapp.utils import generate_otp, verify_otp, store_otp, validate_email, validate_password
+from MyFlaskapp.utils import generate_otp, verify_otp, store_otp, send_otp_email, validate_email, validate_password
 
 class TestOTP:
     def test_generate_otp(self):
@@ -12,8 +12,8 @@ class TestOTP:
         assert len(otp) == 6
         assert otp.isdigit()
 
-    @patch('MyFlaskapp.utils.get_db_connection')
-    def test_store_otp(self, mock_conn):
+    @patch('MyFlaskapp.otp_store.get_db_connection')
+    def test_store_otp(self, mock_conn, app):
         """Test storing OTP in database."""
         mock_cursor = MagicMock()
         mock_conn.return_value.cursor.return_value = mock_cursor
@@ -23,18 +23,19 @@ class TestOTP:
         mock_cursor.execute.assert_called_once()
         mock_conn.return_value.commit.assert_called_once()
 
-    @patch('MyFlaskapp.utils.get_db_connection')
-    def test_verify_otp_valid(self, mock_conn):
+    @patch('MyFlaskapp.otp_store.get_db_connection')
+    def test_verify_otp_valid(self, mock_conn, app):
         """Test verifying valid OTP."""
         mock_cursor = MagicMock()
         mock_conn.return_value.cursor.return_value = mock_cursor
-        mock_cursor.fetchone.return_value = {'id': 1}
+        mock_cursor.fetchone.return_value = {'id': 1, 'otp': '123456'}
+        mock_cursor.rowcount = 1
 
         result = verify_otp('test@example.com', '123456')
         assert result is True
 
-    @patch('MyFlaskapp.utils.get_db_connection')
-    def test_verify_otp_invalid(self, mock_conn):
+    @patch('MyFlaskapp.otp_store.get_db_connection')
+    def test_verify_otp_invalid(self, mock_conn, app):
         """Test verifying invalid OTP."""
         mock_cursor = MagicMock()
         mock_conn.return_value.cursor.return_value = mock_cursor
@@ -43,6 +44,27 @@ class TestOTP:
         result = verify_otp('test@example.com', '123456')
         assert result is False
 
+    @patch('MyFlaskapp.utils.get_mail_queue')
+    def test_send_otp_email_is_queued(self, mock_queue):
+        """Test the OTP email is handed to the mail queue instead of sent inline."""
+        from flask import Flask
+        from flask_mail import Mail
+        app = Flask(__name__)
+        app.config['MAIL_DEFAULT_SENDER'] = 'sender@example.com'
+        app.config['OTP_EXPIRY_MINUTES'] = 15
+        Mail(app)
+        mail = MagicMock(username='sender@example.com', password='secret')
+        mock_queue.return_value.send.return_value = True
+
+        with app.app_context():
+            assert send_otp_email('test@example.com', '123456', mail) is True
+
+        msg = mock_queue.return_value.send.call_args[0][0]
+        assert msg.recipients == ['test@example.com']
+        assert '123456' in msg.body
+        assert 'expires in 15 minutes' in msg.body
+        mail.send.assert_not_called()
+
 class TestValidation:
     def test_validate_email_valid(self):
         """Test valid email."""
@@ -0,0 +1,88 @@
+import os
+import sys
+
+# Ensure the repository root is on sys.path so tests can import the MyFlaskapp package
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import subprocess
+import pytest
+from MyFlaskapp.games.warm_pool import WarmInterpreterPool, get_warm_pool
+
+GAMES_DIR = os.path.join(ROOT, 'MyFlaskapp', 'games')
+
+
+@pytest.fixture
+def pool():
+    pool = WarmInterpreterPool(GAMES_DIR, size=1, max_runs=2)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def write_game(tmp_path, body, name='fake_game.py'):
+    game_file = tmp_path / name
+    game_file.write_text(body)
+    return str(game_file)
+
+
+class TestWarmInterpreterPool:
+    def test_run_game_returns_score(self, pool, tmp_path):
+        """Test a game run on a warm worker reports its FINAL_SCORE."""
+        game = write_game(tmp_path, 'print("loading")\nprint("FINAL_SCORE:77")\n')
+        result = pool.run_game(game, timeout=30)
+        assert result['success'] is True
+        assert result['score'] == 77
+        assert 'loading' in result['stdout']
+        assert result['returncode'] == 0
+
+    def test_game_modules_preloaded(self, pool, tmp_path):
+        """Test workers already have game_base imported when the game starts."""
+        game = write_game(tmp_path, 'import sys\nprint(f"FINAL_SCORE:{int(\'game_base\' in sys.modules)}")\n')
+        assert pool.run_game(game, timeout=30)['score'] == 1
+
+    def test_main_guard_runs(self, pool, tmp_path):
+        """Test games are run as __main__ so their entry point executes."""
+        game = write_game(tmp_path, 'if __name__ == "__main__":\n    print("FINAL_SCORE:5")\n')
+        assert pool.run_game(game, timeout=30)['score'] == 5
+
+    def test_sys_exit_and_errors_captured(self, pool, tmp_path):
+        """Test sys.exit codes and tracebacks are reported without killing the worker."""
+        exits = write_game(tmp_path, 'import sys\nsys.exit(3)\n', 'exit_game.py')
+        broken = write_game(tmp_path, 'raise ValueError("bad game")\n', 'broken_game.py')
+
+        assert pool.run_game(exits, timeout=30)['returncode'] == 3
+        result = pool.run_game(broken, timeout=30)
+        assert result['returncode'] == 1
+        assert 'bad game' in result['stderr']
+
+    def test_worker_recycled_after_max_runs(self, pool, tmp_path):
+        """Test a worker is replaced once it has run max_runs games."""
+        game = write_game(tmp_path, 'import os\nprint(f"FINAL_SCORE:{os.getpid()}")\n')
+        pids = [pool.run_game(game, timeout=30)['score'] for _ in range(3)]
+        assert pids[0] == pids[1]
+        assert pids[2] != pids[0]
+
+    def test_timeout_kills_worker(self, pool, tmp_path):
+        """Test a game that overruns raises TimeoutExpired and the pool recovers."""
+        slow = write_game(tmp_path, 'import time\ntime.sleep(30)\n', 'slow_game.py')
+        pool.wait_ready()
+        with pytest.raises(subprocess.TimeoutExpired):
+            pool.run_game(slow, timeout=0.5)
+
+        game = write_game(tmp_path, 'print("FINAL_SCORE:9")\n')
+        assert pool.run_game(game, timeout=30)['score'] == 9
+
+    def test_status(self, pool):
+        """Test the pool reports its idle worker count."""
+        assert pool.status() == {'size': 1, 'idle': 1, 'max_runs': 2}
+
+
+class TestGetWarmPool:
+    def test_disabled_when_size_zero(self, app):
+        """Test a pool size of 0 disables warm workers."""
+        app.extensions.pop('warm_pool', None)
+        app.config['LAUNCH_WARM_POOL_SIZE'] = 0
+        assert get_warm_pool() is None
+        app.extensions.pop('warm_pool', None)